@@ -1,10 +1,17 @@
 import streamlit as st
+import streamlit.components.v1 as components # Pre-rendered HTML (comparison diff) in an iframe
+import pandas as pd # Used for report and display tables (module scope, imported once per process)
 import io
 import os
 import sys
+import hashlib # For keying the parse and analysis caches on uploaded file content
+import pickle # For serialising saved analysis profiles
+import zlib # For compressing saved analysis profiles
 import traceback # Import traceback for better error handling
+import logging # Server-side record of errors shown in the UI
 import subprocess # For checking Graphviz
-import difflib # For basic text diffing (can be enhanced)
+from concurrent.futures import ThreadPoolExecutor, wait # Render the diagram off the script thread
+import time # For the diagram rendering progress label
 
 # --- Increase Recursion Limit ---
 # Set a higher recursion limit for handling deeply nested configurations
@@ -18,10 +25,6 @@ try:
 except Exception as e:
     st.warning(f"Could not set recursion limit to {RECURSION_LIMIT}: {e}. Using default.")
 
-# --- Add imports for PDF generation ---
-from io import BytesIO
-from xhtml2pdf import pisa
-
 # Add the project root to the Python path to allow importing modules
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
@@ -45,46 +48,815 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+# --- Saved Profiles ---
+PROFILE_PICKLE_PROTOCOL = 5 # Supports out-of-band buffers for large frames
+PROFILE_COMPRESS_LEVEL = 3 # zlib level: good ratio without slowing the Save button
+
+# --- Analysis Cache ---
+ANALYSIS_CACHE_MAX_ENTRIES = 4 # Per-session analysis results kept, oldest evicted first
+# Session keys produced by the analysis steps; restored together on a cache hit
+_ANALYSIS_RESULT_KEYS = (
+    'audit_findings',
+    'diagram_file_path',
+    'legend_file_path',
+    'diagram_file_basename',
+    'legend_file_basename',
+    'diagram_bytes',
+    'legend_bytes',
+    'unused_report_data',
+    'summary_data',
+    'connectivity_tree',
+)
+
+# --- Diagram Rendering ---
+DIAGRAM_POLL_INTERVAL = 0.5 # Seconds between status label updates while the diagram renders
+
+# --- Audit Severities ---
+AUDIT_SEVERITY_LEVELS = ("Critical", "High", "Medium", "Low", "Info", "Unknown") # Most to least severe
+
+# --- Trace Display ---
+# Hop fields shown as "- Label: `value`": (key, label, skip_empty).
+# Fields are shown whenever present; skip_empty also hides falsy values.
+_HOP_DETAIL_FIELDS = (
+    ('detail', 'Detail', False),
+    ('interface', 'Interface', False),
+    ('policy_id', 'Policy ID', True),
+    ('egress_interface', 'Egress IF', False),
+)
+# NAT hop fields: (pre-NAT key, post-NAT key, label); shown only when the value changed
+_HOP_NAT_FIELDS = (
+    ('pre_nat_src', 'post_nat_src', 'NAT Src'),
+    ('pre_nat_dst', 'post_nat_dst', 'NAT Dst'),
+    ('pre_nat_port', 'post_nat_port', 'NAT Port'),
+)
+
+# --- Unused Objects Display ---
+# (unused_report_data key, label) in display order
+_UNUSED_SECTIONS = (
+    ('addresses', 'Unused Addresses'),
+    ('addr_groups', 'Unused Address Groups'),
+    ('services', 'Unused Services'),
+    ('svc_groups', 'Unused Service Groups'),
+    ('interfaces', 'Unused Interfaces'),
+    ('zones', 'Unused Zones'),
+    ('vips', 'Unused VIPs'),
+    ('ippools', 'Unused IP Pools'),
+    ('routes', 'Unused Static Routes'),
+    ('phase1', 'Unused VPN Phase 1'),
+    ('phase2', 'Unused VPN Phase 2'),
+)
+
+UNUSED_INLINE_MAX = 50 # Longer unused lists are shown as a scrollable table instead of one joined line
+
+# --- Configuration Tables ---
+# Low-cardinality display columns sent to the browser as categoricals (Arrow dictionary arrays)
+TABLE_CATEGORICAL_COLUMNS = frozenset({'Type', 'Role', 'Action', 'Status', 'NAT', 'Protocol', 'Mode', 'VDOM'})
+
+# --- Comparison Display ---
+DIFF_VIEW_HEIGHT = 800 # Pixel height of the scrollable diff frame
+
+# --- PDF Export ---
+PDF_SPOOL_MAX_SIZE = 4 * 1024 * 1024 # Bytes kept in memory before the PDF buffer spills to disk
+
+# --- Report Template ---
+# Static head/CSS of the exported report, built once at import time.
+# Placeholders: {file_name}, {version}. Literal CSS braces are doubled for str.format.
+_REPORT_HTML_HEADER = """<!DOCTYPE html>
+<html lang='en'>
+<head>
+    <meta charset='UTF-8'>
+    <title>FortiGate Analysis Report: {file_name}</title>
+    <style>
+        body {{ font-family: sans-serif; margin: 20px; }}
+        h1, h2, h3 {{ color: #333; border-bottom: 1px solid #ccc; padding-bottom: 5px; margin-top: 30px; }}
+        h1 {{ font-size: 1.8em; }}
+        h2 {{ font-size: 1.5em; }}
+        h3 {{ font-size: 1.2em; margin-top: 20px; border-bottom: none; }}
+        table {{ width: 100%; border-collapse: collapse; margin-bottom: 20px; }}
+        th, td {{ border: 1px solid #cccccc; padding: 8px; text-align: left; vertical-align: top; font-size: 0.9em; }}
+        th {{ background-color: #e0e0e0; font-weight: bold; }}
+        pre {{ background-color: #f8f8f8; padding: 10px; border: 1px solid #ddd; white-space: pre-wrap; word-wrap: break-word; }}
+        .summary-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 15px; margin-bottom: 20px; }}
+        .summary-item {{ background-color: #f0f0f0; padding: 10px; border-radius: 5px; text-align: center; }}
+        .summary-item .label {{ font-weight: bold; display: block; margin-bottom: 5px; font-size: 0.9em; }}
+        .summary-item .value {{ font-size: 1.1em; }}
+        .audit-Critical {{ border-left: 5px solid #dc3545; padding-left: 10px; background-color: #f8d7da; }}
+        .audit-High {{ border-left: 5px solid #fd7e14; padding-left: 10px; background-color: #fff3cd; }}
+        .audit-Medium {{ border-left: 5px solid #ffc107; padding-left: 10px; background-color: #fff9e0; }}
+        .audit-Low {{ border-left: 5px solid #0dcaf0; padding-left: 10px; background-color: #cff4fc; }}
+        .audit-Info {{ border-left: 5px solid #adb5bd; padding-left: 10px; background-color: #e2e3e5; }}
+        .audit-Unknown {{ border-left: 5px solid #6c757d; padding-left: 10px; background-color: #f1f3f5; }}
+    </style>
+</head>
+<body>
+<h1>FortiGate Analysis Report</h1>
+<p><strong>Configuration File:</strong> {file_name}</p>
+<p><strong>Detected Version:</strong> {version}</p>"""
+
+_REPORT_HTML_FOOTER = """</body>
+</html>"""
+
 # --- Initialise Session State ---
-if 'model1' not in st.session_state:
-    st.session_state.model1 = None
-if 'model2' not in st.session_state:
-    st.session_state.model2 = None
-if 'uploaded_file_name_1' not in st.session_state:
-    st.session_state.uploaded_file_name_1 = None
-if 'uploaded_file_name_2' not in st.session_state:
-    st.session_state.uploaded_file_name_2 = None
-if 'analysis_done' not in st.session_state:
-    st.session_state.analysis_done = False
-if 'comparison_done' not in st.session_state:
-    st.session_state.comparison_done = False
-if 'trace_done' not in st.session_state:
-    st.session_state.trace_done = False
-if 'diff_results' not in st.session_state:
-    st.session_state.diff_results = None
-if 'diff_formatted' not in st.session_state:
-    st.session_state.diff_formatted = None
-if 'audit_findings' not in st.session_state:
-    st.session_state.audit_findings = None
-if 'diagram_file_path' not in st.session_state:
-    st.session_state.diagram_file_path = None
-if 'legend_file_path' not in st.session_state:
-    st.session_state.legend_file_path = None
-if 'unused_report_data' not in st.session_state:
-    st.session_state.unused_report_data = None
-if 'summary_data' not in st.session_state:
-    st.session_state.summary_data = None
-if 'connectivity_tree' not in st.session_state:
-    st.session_state.connectivity_tree = None
-if 'trace_result' not in st.session_state:
-    st.session_state.trace_result = None
-if 'trace_status_msg' not in st.session_state:
-    st.session_state.trace_status_msg = None
-if 'processing_error' not in st.session_state:
-    st.session_state.processing_error = False
-# --- Add key for saved analysis profiles ---
-if 'saved_profiles' not in st.session_state:
-    st.session_state.saved_profiles = {}
+# Default value for every session key; applied once per session via setdefault.
+_SESSION_DEFAULTS = {
+    'model1': None,
+    'model2': None,
+    'uploaded_file_name_1': None,
+    'uploaded_file_name_2': None,
+    'analysis_done': False,
+    'comparison_done': False,
+    'trace_done': False,
+    'diff_results': None,
+    'diff_formatted': None,
+    'audit_findings': None,
+    'diagram_file_path': None,
+    'legend_file_path': None,
+    'diagram_file_basename': None, # os.path.basename of the paths above, computed when they are set
+    'legend_file_basename': None,
+    'diagram_bytes': None, # Contents of the files above, read once on first display
+    'legend_bytes': None,
+    'unused_report_data': None,
+    'summary_data': None,
+    'connectivity_tree': None,
+    'trace_result': None,
+    'trace_status_msg': None,
+    'trace_generator': None, # Generator reused by path traces on the current model (see _trace_generator)
+    'processing_error': False,
+    'saved_profiles': {}, # Saved analysis profiles (name -> {'hash': model content hash, 'blob': compressed pickle})
+    'config_hash': None, # Content hashes of the uploaded files (parse cache keys)
+    'config_hash_2': None,
+    'analysis_cache': {}, # (config_hash, output_basename) -> analysis outputs (incl. diagram bytes), reused on re-analysis
+}
+for key, default in _SESSION_DEFAULTS.items():
+    st.session_state.setdefault(key, default)
+
+
+# --- Cached Helpers ---
+def _content_hash(raw: bytes) -> str:
+    """Return a short hex digest identifying uploaded config bytes."""
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _parse_config(config_hash: str, _raw: bytes) -> ConfigModel:
+    """Parse raw configuration bytes into a ConfigModel.
+
+    Results are cached by Streamlit on `config_hash` (the `_content_hash` of
+    `_raw`, already computed by the upload handler), so re-uploading (or
+    re-running with) identical bytes skips the parser entirely without
+    Streamlit hashing the whole file again. Streamlit pickles the model and
+    hands every caller its own copy, so the derived indexes and caches that
+    fill as a session uses the model stay in that session.
+    """
+    # Decode line-by-line straight into the parser; avoids a full decoded copy of the file
+    config_lines = io.TextIOWrapper(io.BytesIO(_raw), encoding="utf-8", newline="")
+    model = FortiParser(config_lines).parse()
+    model.content_hash = config_hash # Identifies the source config (e.g. for profile saves)
+    return model
+
+
+def _trace_generator(model):
+    """Generator for path traces of `model`, reused for the rest of the session.
+
+    Tracing only reads the model and fills the generator's lookup caches, so
+    repeated traces reuse one instance. It lives in session_state rather than
+    a cross-session cache because those caches change on every trace.
+    """
+    generator = st.session_state.trace_generator
+    if generator is None or generator.model is not model: # New upload or loaded profile
+        generator = st.session_state.trace_generator = NetworkDiagramGenerator(model)
+    return generator
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _relationship_summary(config_hash, _generator):
+    """Relationship summary for an analysed (and drawn) generator, cached on the config content."""
+    return _generator.generate_relationship_summary()
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _connectivity_tree(config_hash, _generator):
+    """Interface connectivity tree for an analysed generator, cached on the config content."""
+    return _generator.generate_connectivity_tree()
+
+
+def _metric_grid(counts, n_cols=3):
+    """Lay out (label, value) pairs as st.metric widgets across `n_cols` columns, row by row."""
+    cols = st.columns(n_cols)
+    for i, (name, count) in enumerate(counts):
+        cols[i % n_cols].metric(label=name, value=count)
+
+
+def _severity_dtype(severities):
+    """Ordered categorical dtype for severities: AUDIT_SEVERITY_LEVELS first, then any others seen."""
+    extra = sorted(set(severities).difference(AUDIT_SEVERITY_LEVELS), key=str)
+    return pd.CategoricalDtype([*AUDIT_SEVERITY_LEVELS, *extra], ordered=True)
+
+
+def _audit_findings_frame(findings):
+    """Build the audit findings DataFrame with dictionary-encoded low-cardinality columns.
+
+    'severity' and 'category' hold a handful of distinct values, so they are
+    stored as categoricals (codes + categories); Streamlit ships them to the
+    browser as Arrow dictionary arrays instead of repeating every string.
+    Severity is ordered from most to least severe.
+    """
+    df = pd.DataFrame(findings)
+    if 'severity' in df.columns:
+        df['severity'] = df['severity'].astype(_severity_dtype(df['severity'].dropna().unique()))
+    if 'category' in df.columns:
+        df['category'] = df['category'].astype('category')
+    return df
+
+
+def _show_traceback():
+    """Report the exception being handled: always to the server log, in the UI only in debug mode.
+
+    Must be called from inside an `except` block.
+    """
+    logging.exception("FortiParser UI error")
+    if st.session_state.get('debug_mode'):
+        # Collapsed by default; the error message above stays the focus
+        with st.expander("Traceback", expanded=False):
+            st.code(traceback.format_exc())
+
+
+def _read_file_bytes(path):
+    """Returns the contents of `path`, or None if it is unset or can't be read."""
+    if not path:
+        return None
+    try:
+        with open(path, "rb") as fp:
+            return fp.read()
+    except OSError as read_e:
+        logging.warning(f"Could not read {path}: {read_e}")
+        return None
+
+
+def _df_from_named_dict(data, columns, display_columns=None, name_key='name'):
+    """Build a display DataFrame column-by-column from a name -> attributes dict.
+
+    Equivalent to `get_table_dataframe([{**v, name_key: k} for k, v in data.items()], ...)`
+    but fills each column straight from the model's dicts, without a merged
+    per-row dict copy.
+
+    Args:
+        data: Dict mapping object names to attribute dicts (e.g. model.interfaces).
+        columns: Keys to include as columns; `name_key` holds the dict key.
+        display_columns: Optional mapping of keys to display names.
+        name_key: Column name used for the object name.
+
+    Returns:
+        A Pandas DataFrame with missing values filled with '-'.
+    """
+    if not data:
+        return get_table_dataframe([], columns, display_columns)
+    records = {}
+    for col in columns:
+        if col == name_key:
+            records[col] = list(data.keys())
+        elif any(col in v for v in data.values()): # Mirror get_table_dataframe: skip keys no row has
+            records[col] = [v.get(col) for v in data.values()]
+    df = pd.DataFrame(records)
+    if display_columns:
+        df = df.rename(columns={orig: disp for orig, disp in display_columns.items() if orig in records})
+    return df.fillna('-')
+
+
+# Characters escaped by DataFrame.to_html(escape=True); '&' must come first
+_HTML_ESCAPE = [('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;')]
+
+def _escape_html_text(text):
+    """Escape a single string the same way as `_df_to_report_html`."""
+    for char, entity in _HTML_ESCAPE:
+        text = text.replace(char, entity)
+    return text
+
+
+def _join_list_cell(value):
+    """Cell formatter: join list values with ', ', pass others through."""
+    return ', '.join(map(str, value)) if isinstance(value, list) else value
+
+
+def _flatten_list_col(series):
+    """Join list cells of a column into comma-separated strings.
+
+    Iterates the underlying array with a list comprehension instead of a
+    per-row `Series.apply` lambda. Non-list cells are passed through unchanged.
+    """
+    return [_join_list_cell(v) for v in series.to_numpy()]
+
+
+def _stringify_col(df, col):
+    """Make a free-text column (if present) all strings, in place.
+
+    List cells are joined with ', ' and every other cell goes through str(),
+    in a single pass over the underlying array.
+    """
+    if col in df.columns:
+        df[col] = [', '.join(map(str, v)) if isinstance(v, list) else str(v) for v in df[col].to_numpy()]
+
+
+def _mask_col(df, col):
+    """Blank out a secret column in place (if present) with a constant '***'.
+
+    Built as a one-category Categorical from codes, so no per-row strings are
+    allocated and Arrow sends it as a dictionary column.
+    """
+    if col in df.columns:
+        df[col] = pd.Categorical.from_codes([0] * len(df), categories=['***'])
+
+
+def _categorize_columns(df):
+    """Convert the TABLE_CATEGORICAL_COLUMNS present in `df` to categoricals, in place.
+
+    Columns holding unhashable cells (e.g. unexpected lists) are left as they are.
+    """
+    for col in TABLE_CATEGORICAL_COLUMNS.intersection(df.columns):
+        try:
+            df[col] = df[col].astype('category')
+        except TypeError:
+            pass
+
+
+# --- Configuration Tables ---
+# One builder per summary tab: model -> display DataFrame (or a label -> value Series
+# for single settings blocks). Builders are only called for non-empty sections.
+def _table_interfaces(model):
+    intf_cols = ['name', 'ip', 'type', 'description', 'alias', 'role', 'vdom', 'status', 'allowaccess', 'secondary_ip']
+    intf_display_cols = {
+        'name': 'Name', 'ip': 'IP/Mask', 'type': 'Type', 'description': 'Description',
+        'alias': 'Alias', 'role': 'Role', 'vdom': 'VDOM', 'status': 'Status',
+        'allowaccess': 'Allow Access', 'secondary_ip': 'Secondary IPs'
+    }
+    df_intf = _df_from_named_dict(model.interfaces, intf_cols, intf_display_cols) # No per-row {**v, 'name': k} copies
+    # Joined here (the table is cached per config by _config_table), not stored on the parsed objects
+    for col_name in set(df_intf.columns) & {'Allow Access', 'Secondary IPs', 'Alias'}:
+        df_intf[col_name] = _flatten_list_col(df_intf[col_name])
+    return df_intf
+
+
+def _table_zones(model):
+    zone_cols = ['name', 'interface', 'intrazone']
+    zone_display_cols = {'name': 'Name', 'interface': 'Members', 'intrazone': 'Intrazone Action'}
+    df_zone = _df_from_named_dict(model.zones, zone_cols, zone_display_cols)
+    if 'Members' in df_zone.columns:
+        df_zone['Members'] = _flatten_list_col(df_zone['Members'])
+    return df_zone
+
+
+def _table_routes(model):
+    route_list = model.routes
+    route_cols = ['name', 'dst', 'gateway', 'device', 'distance', 'priority', 'status', 'comment']
+    route_display_cols = {
+        'name': 'Name/Seq', 'dst': 'Destination', 'gateway': 'Gateway', 'device': 'Interface',
+        'distance': 'Distance', 'priority': 'Priority', 'status': 'Status', 'comment': 'Comment'
+    }
+    return get_table_dataframe(route_list, route_cols, route_display_cols)
+
+
+def _table_policies(model):
+    pol_list = model.policies
+    pol_cols = ['id', 'name', 'srcintf', 'dstintf', 'srcaddr', 'dstaddr', 'service', 'action', 'status', 'nat', 'ippool', 'poolname', 'logtraffic', 'comments']
+    pol_display_cols = {
+        'id': 'ID', 'name': 'Name', 'srcintf': 'Src Intf', 'dstintf': 'Dst Intf',
+        'srcaddr': 'Src Addr', 'dstaddr': 'Dst Addr', 'service': 'Service',
+        'action': 'Action', 'status': 'Status', 'nat': 'NAT', 'ippool': 'IP Pool',
+        'poolname': 'Pool Name', 'logtraffic': 'Log', 'comments': 'Comments'
+    }
+    pol_list_cols = {'srcintf', 'dstintf', 'srcaddr', 'dstaddr', 'service'} # Joined for display
+    # Gather each column straight from the policy dicts (one list per field),
+    # joining list fields on the way, then hand pandas the finished columns
+    columns = {}
+    for col in pol_cols:
+        if not any(col in p for p in pol_list): # Mirror get_table_dataframe: skip keys no policy has
+            continue
+        values = [p.get(col) for p in pol_list]
+        if col in pol_list_cols:
+            values = [_join_list_cell(v) for v in values]
+        columns[pol_display_cols[col]] = values
+    if not columns:
+        return get_table_dataframe([], pol_cols, pol_display_cols)
+    return pd.DataFrame(columns).fillna('-')
+
+
+def _table_addresses(model):
+    addr_cols = ['obj_name', 'type', 'subnet', 'fqdn', 'start_ip', 'end_ip', 'wildcard', 'comment']
+    addr_display_cols = {
+        'obj_name': 'Name', 'type': 'Type', 'subnet': 'Subnet', 'fqdn': 'FQDN',
+        'start_ip': 'Start IP', 'end_ip': 'End IP', 'wildcard': 'Wildcard', 'comment': 'Comment'
+    }
+    return _df_from_named_dict(model.addresses, addr_cols, addr_display_cols, name_key='obj_name')
+
+
+def _table_addr_groups(model):
+    addrgrp_list = [{'name': k, 'member': _join_list_cell(v)} for k, v in model.addr_groups.items()] # Joined while building rows
+    addrgrp_cols = ['name', 'member']
+    addrgrp_display_cols = {'name': 'Name', 'member': 'Members'}
+    return get_table_dataframe(addrgrp_list, addrgrp_cols, addrgrp_display_cols)
+
+
+def _table_services(model):
+    svc_cols = ['obj_name', 'protocol', 'port', 'tcp_portrange', 'udp_portrange', 'icmptype', 'icmpcode', 'comment']
+    svc_display_cols = {
+        'obj_name': 'Name', 'protocol': 'Protocol', 'port': 'Port Info (Combined)',
+        'tcp_portrange': 'TCP Ports', 'udp_portrange': 'UDP Ports',
+        'icmptype': 'ICMP Type', 'icmpcode': 'ICMP Code', 'comment': 'Comment'
+    }
+    df_svc = _df_from_named_dict(model.services, svc_cols, svc_display_cols, name_key='obj_name')
+    for col_name in set(df_svc.columns) & {'Port Info (Combined)', 'TCP Ports', 'UDP Ports'}:
+        df_svc[col_name] = _flatten_list_col(df_svc[col_name])
+    return df_svc
+
+
+def _table_svc_groups(model):
+    svcgrp_list = [{'name': k, 'member': _join_list_cell(v)} for k, v in model.svc_groups.items()] # Joined while building rows
+    svcgrp_cols = ['name', 'member']
+    svcgrp_display_cols = {'name': 'Name', 'member': 'Members'}
+    return get_table_dataframe(svcgrp_list, svcgrp_cols, svcgrp_display_cols)
+
+
+def _table_vips(model):
+    vip_cols = ['name', 'extip', 'mappedip', 'extintf', 'portforward', 'protocol', 'extport', 'mappedport', 'comment']
+    vip_display_cols = {
+        'name': 'Name', 'extip': 'External IP', 'mappedip': 'Mapped IP(s)',
+        'extintf': 'Ext Interface', 'portforward': 'Port Fwd', 'protocol': 'Protocol',
+        'extport': 'Ext Port', 'mappedport': 'Mapped Port', 'comment': 'Comment'
+    }
+    df_vip = _df_from_named_dict(model.vips, vip_cols, vip_display_cols)
+    if 'Mapped IP(s)' in df_vip.columns:
+        # Ranges the parser extracted into mappedip_parsed; a plain 'set mappedip x' string is kept as is
+        df_vip['Mapped IP(s)'] = [
+            (', '.join(vip.get('mappedip_parsed', ())) or (vip['mappedip'] if isinstance(vip['mappedip'], str) else ''))
+            if 'mappedip' in vip else '-'
+            for vip in model.vips.values()
+        ]
+    return df_vip
+
+
+def _table_ippools(model):
+    pool_cols = ['name', 'type', 'startip', 'endip', 'comment']
+    pool_display_cols = {'name': 'Name', 'type': 'Type', 'startip': 'Start IP', 'endip': 'End IP', 'comment': 'Comment'}
+    return _df_from_named_dict(model.ippools, pool_cols, pool_display_cols)
+
+
+def _table_phase1(model):
+    p1_cols = ['name', 'interface', 'remote_gw', 'psksecret', 'proposal', 'mode', 'status', 'peerid', 'comments']
+    p1_display_cols = {
+        'name': 'Name', 'interface': 'Interface', 'remote_gw': 'Remote GW',
+        'psksecret': 'PSK', 'proposal': 'Proposal', 'mode': 'Mode',
+        'status': 'Status', 'peerid': 'Peer ID', 'comments': 'Comments'
+    }
+    df_p1 = _df_from_named_dict(model.phase1, p1_cols, p1_display_cols)
+    _mask_col(df_p1, 'PSK')
+    _stringify_col(df_p1, 'Comments')
+    return df_p1
+
+
+def _table_phase2(model):
+    p2_cols = ['name', 'phase1name', 'proposal', 'src_subnet', 'dst_subnet', 'src_name', 'dst_name', 'auto_negotiate', 'keylifeseconds', 'comments']
+    p2_display_cols = {
+        'name': 'Name', 'phase1name': 'Phase1 Name', 'proposal': 'Proposal',
+        'src_subnet': 'Src Subnet', 'dst_subnet': 'Dst Subnet',
+        'src_name': 'Src Name Obj', 'dst_name': 'Dst Name Obj',
+        'auto_negotiate': 'Auto Neg', 'keylifeseconds': 'Keylife (s)', 'comments': 'Comments'
+    }
+    return _df_from_named_dict(model.phase2, p2_cols, p2_display_cols)
+
+
+def _table_dhcp(model):
+    dhcp_list = model.dhcp_servers # Already list of dicts
+    dhcp_cols = ['id', 'interface', 'ip_range_str', 'default_gateway', 'netmask', 'dns_service', 'status', 'reserved_addresses']
+    dhcp_display_cols = {
+        'id': 'ID', 'interface': 'Interface', 'ip_range_str': 'IP Range',
+        'default_gateway': 'Gateway', 'netmask': 'Netmask', 'dns_service': 'DNS Service',
+        'status': 'Status', 'reserved_addresses': 'Reserved IPs'
+    }
+    df_dhcp = get_table_dataframe(dhcp_list, dhcp_cols, dhcp_display_cols)
+    if 'Reserved IPs' in df_dhcp.columns:
+         reserved = df_dhcp['Reserved IPs']
+         # Count list cells; anything else (e.g. the '-' fill) counts as 0
+         df_dhcp['Reserved IPs'] = reserved.str.len().where(reserved.map(type).eq(list), 0).astype('int32')
+    return df_dhcp
+
+
+def _table_dns(model):
+    # Single settings block: a label -> value Series, shown with st.table
+    dns_display_cols = {'primary': 'Primary', 'secondary': 'Secondary', 'domain': 'Domain'}
+    return pd.Series({disp: model.dns[key] for key, disp in dns_display_cols.items() if key in model.dns}, name='Value')
+
+
+def _table_ntp(model):
+    # Single settings block: a label -> value Series, shown with st.table
+    ntp_enabled = model.ntp.get('ntpsync') == 'enable'
+    server_mode = model.ntp.get('type','fortiguard')
+    server_details = model.ntp.get('ntpserver','FortiGuard Servers') if server_mode == 'fortiguard' else model.ntp.get('server','?')
+    return pd.Series({'Enabled': 'Yes' if ntp_enabled else 'No', 'Mode': server_mode, 'Server(s)': server_details}, name='Value')
+
+
+def _table_admins(model):
+    admin_cols = ['name', 'accprofile', 'trusted_hosts', 'vdoms']
+    admin_display_cols = {'name': 'Name', 'accprofile': 'Access Profile', 'trusted_hosts': 'Trusted Hosts', 'vdoms': 'VDOMs'}
+    df_admin = _df_from_named_dict(model.admins, admin_cols, admin_display_cols)
+
+    # Format trusted hosts and VDOMs for display (one pass over each column's array)
+    if 'Trusted Hosts' in df_admin.columns:
+        df_admin['Trusted Hosts'] = [
+            ', '.join(map(str, x)) if isinstance(x, list) and x else 'Any'
+            for x in df_admin['Trusted Hosts'].to_numpy()
+        ]
+    if 'VDOMs' in df_admin.columns:
+        df_admin['VDOMs'] = [
+            ', '.join(map(str, x)) if isinstance(x, list) and x else (x if x else '-')
+            for x in df_admin['VDOMs'].to_numpy()
+        ]
+    return df_admin
+
+
+def _table_antivirus(model):
+    av_cols = ['name', 'comment', 'botnet_c_c_scan']
+    av_display_cols = {'name': 'Name', 'comment': 'Comment', 'botnet_c_c_scan': 'Botnet C&C Scan'}
+    df_av = _df_from_named_dict(model.antivirus, av_cols, av_display_cols)
+    if 'Botnet C&C Scan' in df_av.columns:
+         df_av['Botnet C&C Scan'] = df_av['Botnet C&C Scan'].apply(lambda x: 'Yes' if x == 'enable' else 'No')
+    _stringify_col(df_av, 'Comment')
+    return df_av
+
+
+def _table_ips(model):
+    ips_cols = ['name', 'comment']
+    ips_display_cols = {'name': 'Name', 'comment': 'Comment'}
+    df_ips = _df_from_named_dict(model.ips, ips_cols, ips_display_cols)
+    _stringify_col(df_ips, 'Comment')
+    return df_ips
+
+
+def _table_web_filter(model):
+    wf_cols = ['name', 'comment', 'fortiguard_category']
+    wf_display_cols = {'name': 'Name', 'comment': 'Comment', 'fortiguard_category': 'FortiGuard Category Action'}
+    df_wf = _df_from_named_dict(model.web_filter, wf_cols, wf_display_cols)
+    # Fortiguard category data might be complex, just display raw for now
+    _stringify_col(df_wf, 'Comment')
+    return df_wf
+
+
+def _table_app_control(model):
+    app_cols = ['name', 'comment']
+    app_display_cols = {'name': 'Name', 'comment': 'Comment'}
+    df_app = _df_from_named_dict(model.app_control, app_cols, app_display_cols)
+    _stringify_col(df_app, 'Comment')
+    return df_app
+
+
+def _table_radius(model):
+    radius_cols = ['name', 'server', 'secret']
+    radius_display_cols = {'name': 'Name', 'server': 'Server IP', 'secret': 'Secret'}
+    df_radius = _df_from_named_dict(model.radius_servers, radius_cols, radius_display_cols)
+    _mask_col(df_radius, 'Secret')
+    return df_radius
+
+
+def _table_ldap(model):
+    ldap_cols = ['name', 'server', 'cnid', 'dn', 'password']
+    ldap_display_cols = {'name': 'Name', 'server': 'Server IP', 'cnid': 'User ID Field', 'dn': 'Distinguished Name', 'password': 'Password'}
+    df_ldap = _df_from_named_dict(model.ldap_servers, ldap_cols, ldap_display_cols)
+    _mask_col(df_ldap, 'Password')
+    return df_ldap
+
+
+# Tab title -> (heading, model attribute, builder), in display order
+_CONFIG_TABLES = {
+    "Interfaces": ("System Interfaces", 'interfaces', _table_interfaces),
+    "Zones": ("Firewall Zones", 'zones', _table_zones),
+    "Static Routes": ("Static Routes", 'routes', _table_routes),
+    "Policies": ("Firewall Policies", 'policies', _table_policies),
+    "Addresses": ("Address Objects", 'addresses', _table_addresses),
+    "Addr Groups": ("Address Groups", 'addr_groups', _table_addr_groups),
+    "Services": ("Custom Services", 'services', _table_services),
+    "Svc Groups": ("Service Groups", 'svc_groups', _table_svc_groups),
+    "VIPs": ("Virtual IPs (VIPs)", 'vips', _table_vips),
+    "IP Pools": ("IP Pools", 'ippools', _table_ippools),
+    "VPN P1": ("VPN Phase 1", 'phase1', _table_phase1),
+    "VPN P2": ("VPN Phase 2", 'phase2', _table_phase2),
+    "DHCP": ("DHCP Servers", 'dhcp_servers', _table_dhcp),
+    "DNS": ("System DNS", 'dns', _table_dns),
+    "NTP": ("System NTP", 'ntp', _table_ntp),
+    "Admins": ("Administrators", 'admins', _table_admins),
+    "Antivirus": ("Antivirus Profiles", 'antivirus', _table_antivirus),
+    "IPS": ("IPS Sensors", 'ips', _table_ips),
+    "Web Filter": ("Web Filter Profiles", 'web_filter', _table_web_filter),
+    "App Control": ("Application Control Profiles", 'app_control', _table_app_control),
+    "RADIUS Servers": ("RADIUS Servers", 'radius_servers', _table_radius),
+    "LDAP Servers": ("LDAP Servers", 'ldap_servers', _table_ldap),
+}
+# _CONFIG_TABLES tabs included in the HTML/PDF report, in report order
+_REPORT_TABLES = (
+    "Interfaces", "Zones", "Static Routes", "Policies", "Addresses", "Addr Groups",
+    "Services", "Svc Groups", "VIPs", "Admins",
+)
+
+
+@st.cache_data(show_spinner=False, max_entries=4 * len(_CONFIG_TABLES))
+def _config_table(config_hash, title, _model):
+    """Display table (DataFrame or Series) for one configuration tab, cached on the config content.
+
+    Reruns (and repeated analyses of the same file) get the prebuilt table
+    back instead of rebuilding it from the model. The model itself is not
+    hashed (leading underscore); `config_hash` identifies it.
+    """
+    table = _CONFIG_TABLES[title][2](_model)
+    if isinstance(table, pd.DataFrame):
+        _categorize_columns(table)
+    return table
+
+
+@st.fragment
+def _config_tables_view(config_hash, model):
+    """Section picker plus the selected configuration table.
+
+    Only the chosen section's DataFrame is built and sent to the browser.
+    Runs as a fragment, so picking another section reruns just this block
+    and leaves the analysis results above it on the page.
+    """
+    try:
+        title = st.radio("Section", list(_CONFIG_TABLES), horizontal=True, key='config_table_section')
+        heading, attr, _ = _CONFIG_TABLES[title]
+        st.write(heading)
+        if not getattr(model, attr, None):
+            st.caption(f"No {heading} configured.") # Nothing to tabulate; skip building an empty frame
+        else:
+            table = _config_table(config_hash, title, model)
+            if isinstance(table, pd.Series):
+                st.table(table) # Settings block: plain label/value rows
+            else:
+                st.dataframe(table, use_container_width=True)
+    except Exception as table_e:
+        # Don't set global processing error here, tables are supplementary
+        st.error(f"An error occurred during table generation: {table_e}")
+        _show_traceback()
+
+
+def _df_to_report_html(df, formatters=None):
+    """Render a DataFrame as a report table, escaping text columns vectorised.
+
+    Text columns (object, string or categorical) are escaped with `Series.str.replace`
+    up front so `to_html` can skip its per-cell escaping pass. Columns listed
+    in `formatters` are left untouched and formatted (then escaped)
+    cell-by-cell while the HTML is emitted, so list columns need no
+    intermediate rewritten Series.
+
+    Args:
+        df: The DataFrame to render.
+        formatters: Optional mapping of column name -> cell formatter.
+
+    Returns:
+        The HTML table as a string.
+    """
+    formatters = formatters or {}
+    formatters = {col: formatters[col] for col in formatters.keys() & set(df.columns)}
+    df = df.copy()
+    # 'string' named explicitly: pandas 3 stores text as the str dtype, which
+    # 'object' only matches through a deprecated fallback
+    for col in df.select_dtypes(include=['object', 'string', 'category']).columns:
+        if col in formatters:
+            continue
+        is_categorical = isinstance(df[col].dtype, pd.CategoricalDtype)
+        # Categoricals only need their distinct values escaped
+        col_str = df[col].cat.categories.astype(str).to_series() if is_categorical else df[col].astype(str)
+        for char, entity in _HTML_ESCAPE:
+            col_str = col_str.str.replace(char, entity, regex=False)
+        df[col] = df[col].cat.rename_categories(col_str.tolist()) if is_categorical else col_str
+    html_formatters = {col: (lambda value, func=func: _escape_html_text(str(func(value)))) for col, func in formatters.items()}
+    return df.to_html(escape=False, index=False, border=0, formatters=html_formatters)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _build_report_html(config_hash, file_name, _model, summary_data, audit_findings,
+                       diagram_file_basename, legend_file_basename, unused_report_data, connectivity_tree) -> bytes:
+    """Assemble the full HTML analysis report.
+
+    Cached by Streamlit on the config hash and the analysis results, so
+    repeat exports (e.g. switching between HTML and PDF) reuse the built
+    bytes. The model itself is not hashed (leading underscore); `config_hash`
+    stands in for it.
+
+    Returns:
+        The complete report as UTF-8 encoded HTML, ready for either download format.
+    """
+    model = _model
+    report_html = []
+
+    # --- Basic HTML Structure and CSS (static template, see _REPORT_HTML_HEADER) --- 
+    report_html.append(_REPORT_HTML_HEADER.format(
+        file_name=file_name,
+        version=model.fortios_version or 'Not Found'
+    ))
+
+    # --- Summary Section --- 
+    if summary_data:
+        summary_items = ''.join(
+            f"<div class='summary-item'><span class='label'>{name} (Parsed)</span><span class='value'>{count}</span></div>"
+            for name, count in (summary_data['parsed_counts'] or {}).items()
+        )
+        report_html.append(f"<h2>Configuration Summary</h2>\n<div class='summary-grid'>{summary_items}</div>")
+        # Add other summary parts (complexity, high usage etc.) if desired
+        # ... (Could add more details from summary_data here)
+
+    # --- Audit Findings Section --- 
+    if audit_findings:
+        audit_parts = ["<h2>Audit Findings</h2>"]
+        df_audit = _audit_findings_frame(audit_findings)
+        if 'severity' in df_audit.columns:
+             # AUDIT_SEVERITY_LEVELS, then any other severity seen (see _severity_dtype)
+             severity_levels = df_audit['severity'].cat.categories
+             findings_by_severity = dict(tuple(df_audit.groupby('severity', sort=False, observed=True)))
+             for level in severity_levels:
+                 df_level = findings_by_severity.get(level)
+                 if df_level is not None:
+                     # Select and rename columns for the report table
+                     report_cols = [col for col in ['category', 'message', 'object_name'] if col in df_level.columns]
+                     audit_parts.append(
+                         f"<h3 class='audit-{level}'>{level} Findings ({len(df_level)})</h3>\n"
+                         f"{_df_to_report_html(df_level[report_cols])}"
+                     )
+        else:
+             audit_parts.append(f"<h3>Findings (Severity Missing)</h3>\n{_df_to_report_html(df_audit)}")
+        report_html.append("\n".join(audit_parts))
+
+    # --- Diagram Link Section --- 
+    if diagram_file_basename:
+        legend_html = f"<p>Legend generated: <strong>{legend_file_basename}</strong></p>\n" if legend_file_basename else ""
+        report_html.append(
+            f"<h2>Network Diagram</h2>\n"
+            f"<p>Diagram generated: <strong>{diagram_file_basename}</strong></p>\n"
+            f"{legend_html}"
+            "<p><i>Note: The diagram image is saved separately in the same directory where the application was run.</i></p>"
+        )
+    else:
+        report_html.append("<h2>Network Diagram</h2>\n<p>Diagram was not generated or generation failed.</p>")
+
+    # --- Unused Objects Section --- 
+    if unused_report_data:
+        # Format keys nicely (e.g., addr_groups -> Addr Groups)
+        unused_items = ''.join(
+            f"<li><strong>{key.replace('_', ' ').title()}:</strong> {', '.join(items)}</li>"
+            for key, items in unused_report_data.items() if items
+        )
+        if unused_items:
+            report_html.append(f"<h2>Unused Objects</h2>\n<ul>{unused_items}</ul>")
+        else:
+            report_html.append("<h2>Unused Objects</h2>\n<p>No potentially unused objects found based on analysis scope.</p>")
+
+    # --- Connectivity Tree Section --- 
+    if connectivity_tree:
+        report_html.append(f"<h2>Interface Connectivity Tree</h2>\n<pre>{connectivity_tree}</pre>")
+
+    # --- Configuration Tables Section --- 
+    report_html.append("<h2>Configuration Details</h2>")
+    # Each table section appends its heading and table as a single entry
+    try:
+        # Same tables as the configuration tabs (see _CONFIG_TABLES)
+        for title in _REPORT_TABLES:
+            heading, attr, _ = _CONFIG_TABLES[title]
+            if getattr(model, attr, None):
+                table = _config_table(config_hash, title, model)
+                report_html.append(f"<h3>{heading}</h3>\n" + _df_to_report_html(table))
+            else:
+                report_html.append(f"<h3>{heading}</h3>\n<p>None configured.</p>")
+
+    except Exception as report_table_e:
+        st.error(f"Error generating tables for report: {report_table_e}")
+        report_html.append(f"<p><strong>Error generating table section:</strong> {report_table_e}</p>")
+
+    # --- Finish HTML --- 
+    report_html.append(_REPORT_HTML_FOOTER)
+
+    return "\n".join(report_html).encode("utf-8") # Encoded once; cached alongside the build
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _build_report_pdf(html_bytes: bytes):
+    """Render report HTML to PDF bytes with xhtml2pdf.
+
+    Cached on the HTML content, so reruns with the PDF format selected don't
+    re-render an unchanged report.
+
+    Returns:
+        A tuple (pdf_bytes, error_count); pdf_bytes is None if rendering failed.
+    """
+    # Imported lazily: xhtml2pdf pulls in ReportLab/PIL, which HTML-only users never need
+    from tempfile import SpooledTemporaryFile # Keeps small PDFs in RAM, spills large ones to disk
+    from xhtml2pdf import pisa
+    # File-backed buffer: stays in memory up to 4 MiB, then spills to a temp file
+    with SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_SIZE) as pdf_buffer:
+        # Convert HTML to PDF
+        pisa_status = pisa.CreatePDF(
+            io.BytesIO(html_bytes),            # Source HTML (already UTF-8 encoded) as a file-like object
+            dest=pdf_buffer)                   # Destination buffer
+        if pisa_status.err:
+            return None, pisa_status.err
+        pdf_buffer.seek(0)
+        return pdf_buffer.read(), 0
 
 
 # --- Main Application Logic ---
@@ -98,9 +870,13 @@ output_basename = st.sidebar.text_input("Output File Basename", value="network_t
 
 # --- Logic to handle file uploads and reset state ---
 if uploaded_file is not None:
+    # Hash the uploaded bytes once; the digest keys the parse cache
+    raw_config_1 = uploaded_file.getvalue()
+    config_hash_1 = _content_hash(raw_config_1)
     # Check if it's a new file compared to the one stored in session state
-    if uploaded_file.name != st.session_state.uploaded_file_name_1:
+    if uploaded_file.name != st.session_state.uploaded_file_name_1 or config_hash_1 != st.session_state.config_hash:
         st.session_state.uploaded_file_name_1 = uploaded_file.name
+        st.session_state.config_hash = config_hash_1
         st.session_state.model1 = None # Clear the previous model
         st.session_state.analysis_done = False # Reset analysis flag
         st.session_state.trace_done = False    # Reset trace flag
@@ -109,11 +885,18 @@ if uploaded_file is not None:
         st.session_state.audit_findings = None
         st.session_state.diagram_file_path = None
         st.session_state.legend_file_path = None
+        st.session_state.diagram_file_basename = None
+        st.session_state.legend_file_basename = None
+        st.session_state.diagram_bytes = None
+        st.session_state.legend_bytes = None
         st.session_state.unused_report_data = None
         st.session_state.summary_data = None
         st.session_state.connectivity_tree = None
         st.session_state.trace_result = None
         st.session_state.trace_status_msg = None
+        st.session_state.comparison_done = False # Diff (or identical-file shortcut) depended on the old file
+        st.session_state.diff_results = None
+        st.session_state.diff_formatted = None
         st.info(f"New file '{uploaded_file.name}' loaded. Ready for analysis.") # Inform user
     # Add explicit check here to prevent AttributeError if uploaded_file becomes None unexpectedly
     elif uploaded_file is not None and uploaded_file.name == st.session_state.uploaded_file_name_1 and not st.session_state.model1:
@@ -141,8 +924,11 @@ run_compare = st.sidebar.button("Compare Configurations", disabled=(uploaded_fil
 
 # --- Logic to handle second file upload for comparison ---
 if uploaded_file_compare is not None:
-    if uploaded_file_compare.name != st.session_state.uploaded_file_name_2:
+    raw_config_2 = uploaded_file_compare.getvalue()
+    config_hash_2 = _content_hash(raw_config_2)
+    if uploaded_file_compare.name != st.session_state.uploaded_file_name_2 or config_hash_2 != st.session_state.config_hash_2:
         st.session_state.uploaded_file_name_2 = uploaded_file_compare.name
+        st.session_state.config_hash_2 = config_hash_2
         st.session_state.model2 = None # Clear previous model 2
         st.session_state.comparison_done = False # Reset comparison flag
         st.session_state.diff_results = None
@@ -157,6 +943,7 @@ st.sidebar.markdown("---") # Separator
 # --- Generation Options ---
 st.sidebar.subheader("Generation Options")
 run_analysis = st.sidebar.button("Parse & Analyse Configuration", disabled=(uploaded_file is None))
+st.sidebar.checkbox("Debug mode", key='debug_mode', help="Show full Python tracebacks for errors in the app.")
 # skip_diagram = st.sidebar.checkbox("Skip Diagram Generation", value=False, disabled=run_trace)
 # skip_tables = st.sidebar.checkbox("Skip Console Table Generation", value=False, disabled=run_trace) # We'll use web tables instead
 
@@ -181,24 +968,39 @@ profile_name_to_save = st.sidebar.text_input(
 # SAVE BUTTON
 if st.sidebar.button("💾 Save Current Analysis", disabled=not can_save or not profile_name_to_save):
     # Create a dictionary to hold the current analysis state
-    # Note: Storing the model itself might consume memory. Consider saving derived data if models get very large.
+    # Note: The profile (including the model) is pickled and zlib-compressed to keep its session footprint small.
     profile_data = {
         'model1': st.session_state.get('model1'),
         'uploaded_file_name_1': st.session_state.get('uploaded_file_name_1'),
+        'config_hash': st.session_state.get('config_hash'),
         'audit_findings': st.session_state.get('audit_findings'),
         'diagram_file_path': st.session_state.get('diagram_file_path'),
         'legend_file_path': st.session_state.get('legend_file_path'),
+        'diagram_file_basename': st.session_state.get('diagram_file_basename'),
+        'legend_file_basename': st.session_state.get('legend_file_basename'),
         'unused_report_data': st.session_state.get('unused_report_data'),
         'summary_data': st.session_state.get('summary_data'),
         'connectivity_tree': st.session_state.get('connectivity_tree'),
         'analysis_done': True, # Mark as analysed
         'output_basename': output_basename # Save the basename used for generation
     }
-    # Store it in the saved_profiles dict
-    st.session_state.saved_profiles[profile_name_to_save] = profile_data
-    st.sidebar.success(f"Analysis saved as profile: '{profile_name_to_save}'")
-    # Trigger a rerun to update the selectbox immediately
-    st.rerun()
+    # Key the skip on the whole payload (model, audit results, output paths...),
+    # so re-saving after re-analysing under a new basename is never a no-op
+    payload = pickle.dumps(profile_data, protocol=PROFILE_PICKLE_PROTOCOL)
+    payload_hash = hashlib.blake2b(payload).hexdigest()
+    existing_profile = st.session_state.saved_profiles.get(profile_name_to_save)
+    if existing_profile and existing_profile.get('hash') == payload_hash:
+        # Identical analysis already saved under this name - skip re-compressing it
+        st.sidebar.info(f"Profile '{profile_name_to_save}' is already up to date.")
+    else:
+        # Store it in the saved_profiles dict as a compressed pickle blob
+        st.session_state.saved_profiles[profile_name_to_save] = {
+            'hash': payload_hash,
+            'blob': zlib.compress(payload, PROFILE_COMPRESS_LEVEL),
+        }
+        st.sidebar.success(f"Analysis saved as profile: '{profile_name_to_save}'")
+        # Trigger a rerun to update the selectbox immediately
+        st.rerun()
 
 # --- Load / Delete Section ---
 if can_load_delete:
@@ -214,15 +1016,21 @@ if can_load_delete:
     # LOAD BUTTON
     with col1:
         if st.button("📂 Load Analysis", disabled=not profile_to_manage):
-            # Retrieve the saved data
-            loaded_data = st.session_state.saved_profiles.get(profile_to_manage)
+            # Retrieve and unpack the saved data
+            saved_profile = st.session_state.saved_profiles.get(profile_to_manage)
+            loaded_data = pickle.loads(zlib.decompress(saved_profile['blob'])) if saved_profile else None
             if loaded_data:
                 # Overwrite current session state with loaded data
                 st.session_state.model1 = loaded_data.get('model1')
                 st.session_state.uploaded_file_name_1 = loaded_data.get('uploaded_file_name_1')
+                st.session_state.config_hash = loaded_data.get('config_hash')
                 st.session_state.audit_findings = loaded_data.get('audit_findings')
                 st.session_state.diagram_file_path = loaded_data.get('diagram_file_path')
                 st.session_state.legend_file_path = loaded_data.get('legend_file_path')
+                st.session_state.diagram_file_basename = loaded_data.get('diagram_file_basename')
+                st.session_state.legend_file_basename = loaded_data.get('legend_file_basename')
+                st.session_state.diagram_bytes = None # Re-read from the restored paths on display
+                st.session_state.legend_bytes = None
                 st.session_state.unused_report_data = loaded_data.get('unused_report_data')
                 st.session_state.summary_data = loaded_data.get('summary_data')
                 st.session_state.connectivity_tree = loaded_data.get('connectivity_tree')
@@ -279,291 +1087,45 @@ if st.sidebar.button(f"📄 Generate {export_format} Report", disabled=not can_e
     if st.session_state.get('model1') and st.session_state.get('uploaded_file_name_1'):
         model = st.session_state.model1
         file_name = st.session_state.uploaded_file_name_1
-        report_html = []
-
-        # --- Basic HTML Structure and CSS --- 
-        report_html.append("<!DOCTYPE html>")
-        report_html.append("<html lang='en'>")
-        report_html.append("<head>")
-        report_html.append("    <meta charset='UTF-8'>")
-        report_html.append(f"    <title>FortiGate Analysis Report: {file_name}</title>")
-        report_html.append("    <style>")
-        report_html.append("        body { font-family: sans-serif; margin: 20px; }")
-        report_html.append("        h1, h2, h3 { color: #333; border-bottom: 1px solid #ccc; padding-bottom: 5px; margin-top: 30px; }")
-        report_html.append("        h1 { font-size: 1.8em; }")
-        report_html.append("        h2 { font-size: 1.5em; }")
-        report_html.append("        h3 { font-size: 1.2em; margin-top: 20px; border-bottom: none; }")
-        report_html.append("        table { width: 100%; border-collapse: collapse; margin-bottom: 20px; }")
-        report_html.append("        th, td { border: 1px solid #cccccc; padding: 8px; text-align: left; vertical-align: top; font-size: 0.9em; }")
-        report_html.append("        th { background-color: #e0e0e0; font-weight: bold; }")
-        report_html.append("        pre { background-color: #f8f8f8; padding: 10px; border: 1px solid #ddd; white-space: pre-wrap; word-wrap: break-word; }")
-        report_html.append("        .summary-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 15px; margin-bottom: 20px; }")
-        report_html.append("        .summary-item { background-color: #f0f0f0; padding: 10px; border-radius: 5px; text-align: center; }")
-        report_html.append("        .summary-item .label { font-weight: bold; display: block; margin-bottom: 5px; font-size: 0.9em; }")
-        report_html.append("        .summary-item .value { font-size: 1.1em; }")
-        report_html.append("        .audit-Critical { border-left: 5px solid #dc3545; padding-left: 10px; background-color: #f8d7da; }")
-        report_html.append("        .audit-High { border-left: 5px solid #fd7e14; padding-left: 10px; background-color: #fff3cd; }")
-        report_html.append("        .audit-Medium { border-left: 5px solid #ffc107; padding-left: 10px; background-color: #fff9e0; }")
-        report_html.append("        .audit-Low { border-left: 5px solid #0dcaf0; padding-left: 10px; background-color: #cff4fc; }")
-        report_html.append("        .audit-Info { border-left: 5px solid #adb5bd; padding-left: 10px; background-color: #e2e3e5; }")
-        report_html.append("    </style>")
-        report_html.append("</head>")
-        report_html.append("<body>")
-        report_html.append(f"<h1>FortiGate Analysis Report</h1>")
-        report_html.append(f"<p><strong>Configuration File:</strong> {file_name}</p>")
-        report_html.append(f"<p><strong>Detected Version:</strong> {model.fortios_version or 'Not Found'}</p>")
-
-        # --- Summary Section --- 
-        if st.session_state.summary_data:
-            summary_data = st.session_state.summary_data
-            report_html.append("<h2>Configuration Summary</h2>")
-            report_html.append("<div class='summary-grid'>")
-            if summary_data['parsed_counts']:
-                for name, count in summary_data['parsed_counts'].items():
-                     report_html.append(f"<div class='summary-item'><span class='label'>{name} (Parsed)</span><span class='value'>{count}</span></div>")
-            report_html.append("</div>")
-            # Add other summary parts (complexity, high usage etc.) if desired
-            # ... (Could add more details from summary_data here)
-
-        # --- Audit Findings Section --- 
-        if st.session_state.audit_findings:
-            report_html.append("<h2>Audit Findings</h2>")
-            audit_findings = st.session_state.audit_findings
-            if audit_findings:
-                import pandas as pd
-                df_audit = pd.DataFrame(audit_findings)
-                severity_levels = ["Critical", "High", "Medium", "Low", "Info"]
-                if 'severity' in df_audit.columns:
-                     for level in severity_levels:
-                         df_level = df_audit[df_audit['severity'] == level]
-                         if not df_level.empty:
-                             report_html.append(f"<h3 class='audit-{level}'>{level} Findings ({len(df_level)})</h3>")
-                             # Select and rename columns for the report table
-                             report_cols = [col for col in ['category', 'message', 'object_name'] if col in df_level.columns]
-                             df_display_audit = df_level[report_cols]
-                             report_html.append(df_display_audit.to_html(escape=True, index=False, border=0)) # Use escape=True for safety
-                else:
-                     report_html.append("<h3>Findings (Severity Missing)</h3>")
-                     report_html.append(df_audit.to_html(escape=True, index=False, border=0))
-            else:
-                report_html.append("<p>No significant audit findings.</p>")
-
-        # --- Diagram Link Section --- 
-        report_html.append("<h2>Network Diagram</h2>")
-        if st.session_state.diagram_file_path:
-            diagram_filename = os.path.basename(st.session_state.diagram_file_path)
-            legend_filename = os.path.basename(st.session_state.legend_file_path) if st.session_state.legend_file_path else None
-            report_html.append(f"<p>Diagram generated: <strong>{diagram_filename}</strong></p>")
-            if legend_filename:
-                report_html.append(f"<p>Legend generated: <strong>{legend_filename}</strong></p>")
-            report_html.append("<p><i>Note: The diagram image is saved separately in the same directory where the application was run.</i></p>")
-        else:
-            report_html.append("<p>Diagram was not generated or generation failed.</p>")
-
-        # --- Unused Objects Section --- 
-        if st.session_state.unused_report_data:
-            report_html.append("<h2>Unused Objects</h2>")
-            unused_data = st.session_state.unused_report_data
-            has_unused = False
-            unused_list_html = ["<ul>"]
-            for key, items in unused_data.items():
-                if items:
-                    has_unused = True
-                    # Format key nicely (e.g., addr_groups -> Address Groups)
-                    title = key.replace('_', ' ').title()
-                    unused_list_html.append(f"<li><strong>{title}:</strong> {', '.join(items)}</li>")
-            unused_list_html.append("</ul>")
-            if has_unused:
-                report_html.extend(unused_list_html)
-            else:
-                report_html.append("<p>No potentially unused objects found based on analysis scope.</p>")
-
-        # --- Connectivity Tree Section --- 
-        if st.session_state.connectivity_tree:
-            report_html.append("<h2>Interface Connectivity Tree</h2>")
-            report_html.append(f"<pre>{st.session_state.connectivity_tree}</pre>")
-
-        # --- Configuration Tables Section --- 
-        report_html.append("<h2>Configuration Details</h2>")
-        # Add tables similar to the tabs
-        try:
-            # --- Interfaces Table ---
-            report_html.append("<h3>System Interfaces</h3>")
-            intf_list = [{**v, 'name': k} for k, v in model.interfaces.items()]
-            intf_cols = ['name', 'ip', 'type', 'description', 'alias', 'role', 'vdom', 'status', 'allowaccess', 'secondary_ip']
-            intf_display_cols = {
-                'name': 'Name', 'ip': 'IP/Mask', 'type': 'Type', 'description': 'Description',
-                'alias': 'Alias', 'role': 'Role', 'vdom': 'VDOM', 'status': 'Status',
-                'allowaccess': 'Allow Access', 'secondary_ip': 'Secondary IPs'
-            }
-            df_intf = get_table_dataframe(intf_list, intf_cols, intf_display_cols)
-            list_cols_to_convert = ['Allow Access', 'Secondary IPs', 'Alias']
-            for col_name in list_cols_to_convert:
-                if col_name in df_intf.columns:
-                     df_intf[col_name] = df_intf[col_name].apply(
-                         lambda x: ', '.join(map(str, x)) if isinstance(x, list) else x
-                     )
-            report_html.append(df_intf.to_html(escape=True, index=False, border=0))
-
-            # --- Zones Table ---
-            report_html.append("<h3>Firewall Zones</h3>")
-            zone_list = [{**v, 'name': k} for k, v in model.zones.items()]
-            zone_cols = ['name', 'interface', 'intrazone']
-            zone_display_cols = {'name': 'Name', 'interface': 'Members', 'intrazone': 'Intrazone Action'}
-            df_zone = get_table_dataframe(zone_list, zone_cols, zone_display_cols)
-            report_html.append(df_zone.to_html(escape=True, index=False, border=0))
-
-            # --- Static Routes Table ---
-            report_html.append("<h3>Static Routes</h3>")
-            route_list = model.routes
-            route_cols = ['name', 'dst', 'gateway', 'device', 'distance', 'priority', 'status', 'comment']
-            route_display_cols = {
-                'name': 'Name/Seq', 'dst': 'Destination', 'gateway': 'Gateway', 'device': 'Interface',
-                'distance': 'Distance', 'priority': 'Priority', 'status': 'Status', 'comment': 'Comment'
-            }
-            df_route = get_table_dataframe(route_list, route_cols, route_display_cols)
-            report_html.append(df_route.to_html(escape=True, index=False, border=0))
-
-            # --- Policies Table ---
-            report_html.append("<h3>Firewall Policies</h3>")
-            pol_list = model.policies
-            pol_cols = ['id', 'name', 'srcintf', 'dstintf', 'srcaddr', 'dstaddr', 'service', 'action', 'status', 'nat', 'ippool', 'poolname', 'logtraffic', 'comments']
-            pol_display_cols = {
-                'id': 'ID', 'name': 'Name', 'srcintf': 'Src Intf', 'dstintf': 'Dst Intf',
-                'srcaddr': 'Src Addr', 'dstaddr': 'Dst Addr', 'service': 'Service',
-                'action': 'Action', 'status': 'Status', 'nat': 'NAT', 'ippool': 'IP Pool',
-                'poolname': 'Pool Name', 'logtraffic': 'Log', 'comments': 'Comments'
-            }
-            df_pol = get_table_dataframe(pol_list, pol_cols, pol_display_cols)
-            for col in ['srcintf', 'dstintf', 'srcaddr', 'dstaddr', 'service']:
-                if col in df_pol.columns:
-                    df_pol[col] = df_pol[col].apply(lambda x: ', '.join(map(str, x)) if isinstance(x, list) else x)
-            report_html.append(df_pol.to_html(escape=True, index=False, border=0))
-
-            # --- Addresses Table ---
-            report_html.append("<h3>Address Objects</h3>")
-            addr_list = [{**v, 'obj_name': k} for k, v in model.addresses.items()]
-            addr_cols = ['obj_name', 'type', 'subnet', 'fqdn', 'start_ip', 'end_ip', 'wildcard', 'comment']
-            addr_display_cols = {
-                'obj_name': 'Name', 'type': 'Type', 'subnet': 'Subnet', 'fqdn': 'FQDN',
-                'start_ip': 'Start IP', 'end_ip': 'End IP', 'wildcard': 'Wildcard', 'comment': 'Comment'
-            }
-            df_addr = get_table_dataframe(addr_list, addr_cols, addr_display_cols)
-            report_html.append(df_addr.to_html(escape=True, index=False, border=0))
-
-            # --- Address Groups Table ---
-            report_html.append("<h3>Address Groups</h3>")
-            addrgrp_list = [{'name': k, 'member': v} for k, v in model.addr_groups.items()]
-            addrgrp_cols = ['name', 'member']
-            addrgrp_display_cols = {'name': 'Name', 'member': 'Members'}
-            df_addrgrp = get_table_dataframe(addrgrp_list, addrgrp_cols, addrgrp_display_cols)
-            if 'Members' in df_addrgrp.columns:
-                 df_addrgrp['Members'] = df_addrgrp['Members'].apply(lambda x: ', '.join(map(str, x)) if isinstance(x, list) else x)
-            report_html.append(df_addrgrp.to_html(escape=True, index=False, border=0))
-
-            # --- Services Table ---
-            report_html.append("<h3>Custom Services</h3>")
-            svc_list = [{**v, 'obj_name': k} for k, v in model.services.items()]
-            svc_cols = ['obj_name', 'protocol', 'port', 'tcp_portrange', 'udp_portrange', 'icmptype', 'icmpcode', 'comment']
-            svc_display_cols = {
-                'obj_name': 'Name', 'protocol': 'Protocol', 'port': 'Port Info (Combined)',
-                'tcp_portrange': 'TCP Ports', 'udp_portrange': 'UDP Ports',
-                'icmptype': 'ICMP Type', 'icmpcode': 'ICMP Code', 'comment': 'Comment'
-            }
-            df_svc = get_table_dataframe(svc_list, svc_cols, svc_display_cols)
-            svc_list_cols = ['Port Info (Combined)', 'TCP Ports', 'UDP Ports']
-            for col_name in svc_list_cols:
-                if col_name in df_svc.columns:
-                    df_svc[col_name] = df_svc[col_name].apply(
-                        lambda x: ', '.join(map(str, x)) if isinstance(x, list) else x
-                    )
-            report_html.append(df_svc.to_html(escape=True, index=False, border=0))
-
-            # --- Service Groups Table ---
-            report_html.append("<h3>Service Groups</h3>")
-            svcgrp_list = [{'name': k, 'member': v} for k, v in model.svc_groups.items()]
-            svcgrp_cols = ['name', 'member']
-            svcgrp_display_cols = {'name': 'Name', 'member': 'Members'}
-            df_svcgrp = get_table_dataframe(svcgrp_list, svcgrp_cols, svcgrp_display_cols)
-            if 'Members' in df_svcgrp.columns:
-                 df_svcgrp['Members'] = df_svcgrp['Members'].apply(lambda x: ', '.join(map(str, x)) if isinstance(x, list) else x)
-            report_html.append(df_svcgrp.to_html(escape=True, index=False, border=0))
-
-            # --- VIPs Table ---
-            report_html.append("<h3>Virtual IPs (VIPs)</h3>")
-            vip_list = [{**v, 'name': k} for k, v in model.vips.items()]
-            vip_cols = ['name', 'extip', 'mappedip', 'extintf', 'portforward', 'protocol', 'extport', 'mappedport', 'comment']
-            vip_display_cols = {
-                'name': 'Name', 'extip': 'External IP', 'mappedip': 'Mapped IP(s)',
-                'extintf': 'Ext Interface', 'portforward': 'Port Fwd', 'protocol': 'Protocol',
-                'extport': 'Ext Port', 'mappedport': 'Mapped Port', 'comment': 'Comment'
-            }
-            df_vip = get_table_dataframe(vip_list, vip_cols, vip_display_cols)
-            if 'Mapped IP(s)' in df_vip.columns:
-                df_vip['Mapped IP(s)'] = df_vip['Mapped IP(s)'].apply(lambda x: ', '.join([item.get('range','?') for item in x]) if isinstance(x, list) else x)
-            report_html.append(df_vip.to_html(escape=True, index=False, border=0))
-
-            # Add other tables as needed (VPN, DHCP, DNS, NTP, Admins, Security Profiles etc.)
-            # ... (Example: Admins)
-            report_html.append("<h3>Administrators</h3>")
-            admin_list = [{**v, 'name': k} for k, v in model.admins.items()]
-            admin_cols = ['name', 'accprofile', 'trusted_hosts', 'vdoms']
-            admin_display_cols = {'name': 'Name', 'accprofile': 'Access Profile', 'trusted_hosts': 'Trusted Hosts', 'vdoms': 'VDOMs'}
-            df_admin = get_table_dataframe(admin_list, admin_cols, admin_display_cols)
-            if 'Trusted Hosts' in df_admin.columns:
-                df_admin['Trusted Hosts'] = df_admin['Trusted Hosts'].apply(
-                    lambda x: ', '.join(map(str, x)) if isinstance(x, list) and x else 'Any'
-                )
-            if 'VDOMs' in df_admin.columns:
-                df_admin['VDOMs'] = df_admin['VDOMs'].apply(
-                    lambda x: ', '.join(map(str, x)) if isinstance(x, list) and x else (x if x else '-')
-                )
-            report_html.append(df_admin.to_html(escape=True, index=False, border=0))
-
-            # ... (Add more tables here following the pattern) ...
-
-        except Exception as report_table_e:
-            st.error(f"Error generating tables for report: {report_table_e}")
-            report_html.append(f"<p><strong>Error generating table section:</strong> {report_table_e}</p>")
-
-        # --- Finish HTML --- 
-        report_html.append("</body>")
-        report_html.append("</html>")
-
-        final_html_content = "\n".join(report_html)
+        final_html_bytes = _build_report_html(
+            st.session_state.config_hash,
+            file_name,
+            model,
+            st.session_state.summary_data,
+            st.session_state.audit_findings,
+            st.session_state.diagram_file_basename,
+            st.session_state.legend_file_basename,
+            st.session_state.unused_report_data,
+            st.session_state.connectivity_tree,
+        )
 
         # --- Provide Download Button based on selected format --- 
         if export_format == 'HTML':
             report_filename = f"FortiGate_Analysis_{file_name}.html"
             st.download_button(
                 label="📥 Download HTML Report",
-                data=final_html_content,
+                data=final_html_bytes,
                 file_name=report_filename,
                 mime="text/html"
             )
         elif export_format == 'PDF':
             report_filename = f"FortiGate_Analysis_{file_name}.pdf"
-            pdf_buffer = BytesIO()
-            # Convert HTML to PDF
-            pisa_status = pisa.CreatePDF(
-                final_html_content,                # Source HTML string
-                dest=pdf_buffer)                   # Destination buffer
+            pdf_bytes, pdf_err = _build_report_pdf(final_html_bytes)
 
             # Check if PDF creation was successful
-            if not pisa_status.err:
-                pdf_buffer.seek(0)
+            if pdf_bytes is not None:
                 st.download_button(
                     label="📥 Download PDF Report",
-                    data=pdf_buffer,
+                    data=pdf_bytes,
                     file_name=report_filename,
                     mime="application/pdf"
                 )
             else:
-                st.error(f"Error generating PDF: {pisa_status.err}")
+                st.error(f"Error generating PDF: {pdf_err}")
                 st.error("Could not convert HTML to PDF. Please try exporting as HTML.")
                 # Optionally show the raw HTML for debugging
                 # with st.expander("Raw HTML Content (for debugging PDF error)"):
-                #    st.code(final_html_content, language='html')
+                #    st.code(final_html_bytes.decode('utf-8'), language='html')
 
     else:
         st.sidebar.warning("Analysis data not found in session state.")
@@ -575,14 +1137,10 @@ if run_analysis and uploaded_file is not None:
 
     # Check if we need to parse the file (only if model1 is not already in session state)
     if st.session_state.model1 is None:
-        # Read file content
-        stringio = io.StringIO(uploaded_file.getvalue().decode("utf-8"))
-        config_lines = stringio.readlines()
         main_status = st.status(f"Parsing {st.session_state.uploaded_file_name_1}...", expanded=True)
         try:
             main_status.write(f"Parsing configuration file...")
-            parser = FortiParser(config_lines)
-            st.session_state.model1 = parser.parse() # Store model in session state
+            st.session_state.model1 = _parse_config(config_hash_1, raw_config_1) # Cached on content; store model in session state
             main_status.write("Parsing complete.")
             st.write(f"Detected FortiOS Version: {st.session_state.model1.fortios_version if st.session_state.model1.fortios_version else 'Not Found'}")
             main_status.update(label="Parsing complete.", state="complete", expanded=False)
@@ -594,23 +1152,21 @@ if run_analysis and uploaded_file is not None:
             if 'main_status' in locals(): main_status.update(label=f"Initialisation Error (Missing Module: {import_err})", state="error", expanded=True)
             st.error(f"Error importing core modules: {import_err}")
             st.error("Please ensure fortiparser.py, config_model.py, diagram_generator.py, and utils.py are available and required dependencies (like 'pandas') are installed.")
-            st.code(traceback.format_exc())
+            _show_traceback()
             st.stop()
         except Exception as parse_e:
             st.session_state.processing_error = True
             if 'main_status' in locals(): main_status.update(label=f"Critical Parsing Error: {parse_e}", state="error", expanded=True)
             st.error(f"Critical parsing error: {parse_e}")
             st.error("The application could not understand the structure of the configuration file. Please verify the file format.")
-            st.code(traceback.format_exc()) # Show detailed traceback
+            _show_traceback()
             st.stop() # Stop if parsing fails critically
 
     # --- Processing Logic (Analysis or Trace) ---
     # Only run if model exists and analysis/trace hasn't been done or requested again
     if st.session_state.model1 and not st.session_state.processing_error:
 
-        # Initialise Generator/Auditor using the model from session state
-        generator = NetworkDiagramGenerator(st.session_state.model1)
-        auditor = ConfigAuditor(st.session_state.model1)
+        # Generator/Auditor are created below only when processing actually runs
 
         # Determine if we need to run processing (analysis or trace)
         should_run_processing = False
@@ -636,6 +1192,7 @@ if run_analysis and uploaded_file is not None:
                         # Don't set trace_done=True here, allow retry if parameters are entered
                     else:
                         try:
+                            generator = _trace_generator(st.session_state.model1)
                             path_result, status_msg = generator.trace_network_path(
                                 source_ip=trace_src,
                                 dest_ip=trace_dst,
@@ -651,13 +1208,13 @@ if run_analysis and uploaded_file is not None:
                             st.session_state.processing_error = True
                             st.error(f"Error during path trace execution: {ve}")
                             st.error("Please ensure the provided IP addresses and port are valid.")
-                            st.code(traceback.format_exc())
+                            _show_traceback()
                             main_status.update(label="Path trace failed (Invalid Input).", state="error", expanded=False)
                         except Exception as trace_e:
                             st.session_state.processing_error = True
                             st.error(f"An unexpected error occurred during path trace: {trace_e}")
                             st.error("Please check the logs or the configuration file for potential issues.")
-                            st.code(traceback.format_exc())
+                            _show_traceback()
                             main_status.update(label="Path trace failed (Error).", state="error", expanded=False)
 
                 # --- Analysis and Diagram Logic ---
@@ -668,46 +1225,84 @@ if run_analysis and uploaded_file is not None:
                     # (Error handling within each step)
                     analysis_step_error = False
 
+                    # 0. Reuse earlier results for identical content and output name
+                    analysis_cache_key = (st.session_state.config_hash, output_basename)
+                    cached_results = st.session_state.analysis_cache.get(analysis_cache_key)
+                    if cached_results and cached_results['diagram_file_path'] and cached_results['diagram_bytes'] is None:
+                        cached_results = None # Diagram contents weren't captured; regenerate everything
+                    analysis_cached = cached_results is not None
+                    if analysis_cached:
+                        for key, value in cached_results.items():
+                            st.session_state[key] = value
+                        main_status.write("Configuration unchanged; reusing previous analysis results.")
+
                     # 1. Run Analysis
-                    try:
-                        main_status.write("Analysing object relationships...")
-                        generator.analyze_relationships()
-                        main_status.write("Analysis complete.")
-                    except Exception as ana_e:
-                        st.error(f"Error during relationship analysis: {ana_e}")
-                        st.code(traceback.format_exc())
-                        analysis_step_error = True
+                    if not analysis_cached:
+                        # Fresh instances: generate_diagram() draws into the generator's graph,
+                        # so a generator can't be reused for another analysis run
+                        generator = NetworkDiagramGenerator(st.session_state.model1)
+                        auditor = ConfigAuditor(st.session_state.model1)
+                        try:
+                            main_status.write("Analysing object relationships...")
+                            generator.analyze_relationships()
+                            main_status.write("Analysis complete.")
+                        except Exception as ana_e:
+                            st.error(f"Error during relationship analysis: {ana_e}")
+                            _show_traceback()
+                            analysis_step_error = True
 
                     # 2. Run Audit
-                    if not analysis_step_error:
+                    # The audit and the diagram run one after the other: both read the
+                    # session's model, whose derived indexes are built on first use.
+                    if not analysis_step_error and not analysis_cached:
                         try:
                             main_status.write("Running configuration audit...")
                             st.session_state.audit_findings = auditor.run_audit() # Store results
                             main_status.write("Audit complete.")
                         except Exception as aud_e:
                             st.error(f"Error during configuration audit: {aud_e}")
-                            st.code(traceback.format_exc())
+                            _show_traceback()
                             analysis_step_error = True
 
                     # 3. Generate Diagram
-                    if not analysis_step_error:
+                    if not analysis_step_error and not analysis_cached:
                         try:
                             main_status.write("Generating network diagram...")
-                            diagram_file = generator.generate_diagram(output_basename)
-                            if diagram_file and os.path.exists(diagram_file):
+                            # Drawn on one worker thread so this thread can keep the status
+                            # label ticking while Graphviz renders (Streamlit elements can't
+                            # be written from worker threads)
+                            with ThreadPoolExecutor(max_workers=1) as executor:
+                                diagram_future = executor.submit(generator.generate_diagram, output_basename)
+                                render_start = time.monotonic()
+                                while wait([diagram_future], timeout=DIAGRAM_POLL_INTERVAL).not_done:
+                                    main_status.update(label=f"Rendering network diagram... {time.monotonic() - render_start:.1f}s")
+                            main_status.update(label="Analysing configuration and generating outputs...")
+                            diagram_file = diagram_future.result()
+                            # Capture the rendered files now: the paths are shared by every config
+                            # analysed under this basename, so a later run overwrites them and
+                            # cache hits must serve these bytes rather than re-read the path
+                            st.session_state.diagram_bytes = _read_file_bytes(diagram_file)
+                            st.session_state.legend_bytes = None
+                            if diagram_file and st.session_state.diagram_bytes is not None:
                                 st.session_state.diagram_file_path = diagram_file # Store path
+                                st.session_state.diagram_file_basename = os.path.basename(diagram_file)
                                 main_status.write(f"Diagram saved: {diagram_file}")
                                 # Store legend path
                                 legend_file = f"{output_basename}_legend.png"
-                                if os.path.exists(legend_file):
+                                st.session_state.legend_bytes = _read_file_bytes(legend_file)
+                                if st.session_state.legend_bytes is not None:
                                     st.session_state.legend_file_path = legend_file
+                                    st.session_state.legend_file_basename = os.path.basename(legend_file)
                                 else:
                                     st.session_state.legend_file_path = None
+                                    st.session_state.legend_file_basename = None
                             else:
                                 main_status.write("Diagram generation did not produce a viewable file or failed.")
                                 st.warning("Diagram generation did not produce a viewable file. Check logs or Graphviz installation.")
                                 st.session_state.diagram_file_path = None
                                 st.session_state.legend_file_path = None
+                                st.session_state.diagram_file_basename = None
+                                st.session_state.legend_file_basename = None
                         except ImportError as import_err:
                              main_status.write(f"Diagram Generation Failed: Missing dependency - {import_err}")
                              st.error(f"Diagram Generation Failed: Missing dependency - {import_err}")
@@ -728,26 +1323,36 @@ if run_analysis and uploaded_file is not None:
                         except Exception as diag_e:
                              main_status.write(f"Diagram Generation Failed: Unexpected error.")
                              st.error(f"An unexpected error occurred during diagram generation: {diag_e}")
-                             st.code(traceback.format_exc())
+                             _show_traceback()
                              analysis_step_error = True
 
                     # 4. Generate Reports (Unused, Summary, Connectivity)
-                    if not analysis_step_error:
+                    if not analysis_step_error and not analysis_cached:
                         try:
                             main_status.write("Generating reports...")
-                            st.session_state.unused_report_data = generator.generate_unused_report(output_basename)
-                            st.session_state.summary_data = generator.generate_relationship_summary()
-                            st.session_state.connectivity_tree = generator.generate_connectivity_tree()
+                            # generate_diagram() already built the unused report unless that failed
+                            unused_report_data = generator.unused_report_data
+                            if unused_report_data is None:
+                                unused_report_data = generator.generate_unused_report(output_basename)
+                            st.session_state.unused_report_data = unused_report_data
+                            # Side-effect free reports are shared across sessions by content hash
+                            st.session_state.summary_data = _relationship_summary(st.session_state.config_hash, generator)
+                            st.session_state.connectivity_tree = _connectivity_tree(st.session_state.config_hash, generator)
                             main_status.write("Reports generated.")
                         except Exception as report_e:
                              main_status.write("Report Generation Failed.")
                              st.error(f"An error occurred during report generation: {report_e}")
-                             st.code(traceback.format_exc())
+                             _show_traceback()
                              analysis_step_error = True # Mark error for this step
 
                     # --- Final Analysis Status Update ---
                     if not analysis_step_error:
                         st.session_state.analysis_done = True # Mark analysis as complete
+                        if not analysis_cached:
+                            analysis_cache = st.session_state.analysis_cache
+                            analysis_cache[analysis_cache_key] = {key: st.session_state[key] for key in _ANALYSIS_RESULT_KEYS}
+                            while len(analysis_cache) > ANALYSIS_CACHE_MAX_ENTRIES:
+                                analysis_cache.pop(next(iter(analysis_cache))) # Evict oldest
                         main_status.update(label="Analysis processing complete.", state="complete", expanded=False)
                     else:
                         st.session_state.processing_error = True # Set global error flag if any step failed
@@ -763,7 +1368,7 @@ if run_analysis and uploaded_file is not None:
                 main_status.update(label="Analysis/Generation Failed (Error)", state="error", expanded=True)
                 st.error(f"Error during analysis/generation: {gen_e}")
                 st.error("There was an issue processing the configuration after parsing. Check the details below.")
-                st.code(traceback.format_exc())
+                _show_traceback()
 
         # --- Display Results (Reading from Session State) ---
 
@@ -771,21 +1376,22 @@ if run_analysis and uploaded_file is not None:
         if run_trace and st.session_state.trace_done and not st.session_state.processing_error:
             st.subheader("Trace Result")
             st.write(f"**Status:** {st.session_state.trace_status_msg}")
-            if st.session_state.trace_result:
+            trace_result = st.session_state.trace_result # Read session state once per rerun
+            if trace_result:
                 st.write("**Path Details (Simulated Hops):**")
-                for hop_info in st.session_state.trace_result:
-                    hop_md = f"**Hop {hop_info.get('hop')}: [{hop_info.get('type')}]**\\n"
-                    details = []
-                    if 'detail' in hop_info: details.append(f"- Detail: `{hop_info['detail']}`")
-                    if 'interface' in hop_info: details.append(f"- Interface: `{hop_info['interface']}`")
-                    if 'policy_id' in hop_info and hop_info['policy_id']: details.append(f"- Policy ID: `{hop_info['policy_id']}`")
-                    if 'egress_interface' in hop_info: details.append(f"- Egress IF: `{hop_info['egress_interface']}`")
-                    if 'post_nat_src' in hop_info and hop_info.get('pre_nat_src') != hop_info.get('post_nat_src'): details.append(f"- NAT Src: `{hop_info.get('pre_nat_src')} -> {hop_info.get('post_nat_src')}`")
-                    if 'post_nat_dst' in hop_info and hop_info.get('pre_nat_dst') != hop_info.get('post_nat_dst'): details.append(f"- NAT Dst: `{hop_info.get('pre_nat_dst')} -> {hop_info.get('post_nat_dst')}`")
-                    if 'post_nat_port' in hop_info and hop_info.get('pre_nat_port') != hop_info.get('post_nat_port'): details.append(f"- NAT Port: `{hop_info.get('pre_nat_port')} -> {hop_info.get('post_nat_port')}`")
-                    if details:
-                        hop_md += "\\n".join(details)
-                    st.markdown(hop_md)
+                for hop_info in trace_result:
+                    hop_get = hop_info.get
+                    hop_parts = [f"**Hop {hop_get('hop')}: [{hop_get('type')}]**"]
+                    for key, label, skip_empty in _HOP_DETAIL_FIELDS:
+                        if key in hop_info:
+                            value = hop_info[key]
+                            if value or not skip_empty:
+                                hop_parts.append(f"- {label}: `{value}`")
+                    for pre_key, post_key, label in _HOP_NAT_FIELDS:
+                        pre, post = hop_get(pre_key), hop_get(post_key) # One probe per key
+                        if post is not None and pre != post:
+                            hop_parts.append(f"- {label}: `{pre} -> {post}`")
+                    st.markdown("\n".join(hop_parts))
                     st.markdown("---") # Separator between hops
         elif run_trace and not st.session_state.trace_done and not st.session_state.processing_error:
              st.info("Enter trace parameters and click 'Parse & Analyse Configuration' again to run the trace.")
@@ -793,24 +1399,31 @@ if run_analysis and uploaded_file is not None:
         # Display Analysis Results if available (and not tracing)
         elif not run_trace and st.session_state.analysis_done and not st.session_state.processing_error:
             # --- Display Audit Findings --- 
+            # Bind the session results once; reused by every section below
+            audit_findings = st.session_state.audit_findings
+            unused_report_data = st.session_state.unused_report_data
+            summary_data = st.session_state.summary_data
+            connectivity_tree = st.session_state.connectivity_tree
+
             with st.expander("Configuration Audit Findings", expanded=True):
-                if st.session_state.audit_findings:
-                    import pandas as pd
-                    df_audit = pd.DataFrame(st.session_state.audit_findings)
+                if audit_findings:
+                    df_audit = _audit_findings_frame(audit_findings)
                     desired_cols_ordered = ['severity', 'category', 'message', 'object_name']
                     present_cols = [col for col in desired_cols_ordered if col in df_audit.columns]
                     if present_cols:
                         df_display = df_audit[present_cols]
-                        severity_levels = ["Critical", "High", "Medium", "Low", "Info"]
                         has_severity_col = 'severity' in df_display.columns
+                        # AUDIT_SEVERITY_LEVELS, then any other severity seen (see _severity_dtype)
+                        severity_levels = df_display['severity'].cat.categories if has_severity_col else ()
                         found_findings = False
-                        for level in severity_levels:
-                            if has_severity_col:
-                                df_level = df_display[df_display['severity'] == level]
-                                cols_to_show = [col for col in df_display.columns if col != 'severity']
-                                if not df_level.empty:
+                        if has_severity_col:
+                            # Split by severity in one pass instead of one boolean scan per level
+                            findings_by_severity = dict(tuple(df_display.groupby('severity', sort=False, observed=True)))
+                            for level in severity_levels:
+                                df_level = findings_by_severity.get(level)
+                                if df_level is not None:
                                     st.write(f"{level} Findings:")
-                                    st.dataframe(df_level[cols_to_show], use_container_width=True)
+                                    st.dataframe(df_level.drop(columns='severity'), use_container_width=True)
                                     found_findings = True
                         if not found_findings and has_severity_col:
                             st.success("No audit findings in defined severity levels.")
@@ -820,7 +1433,7 @@ if run_analysis and uploaded_file is not None:
                             found_findings = True
                     else:
                         st.warning("Could not format audit findings. Displaying raw data:")
-                        st.json(st.session_state.audit_findings)
+                        st.json(audit_findings)
                         found_findings = True
 
                     if not found_findings: # Handle cases where df_audit might be non-empty but processing failed
@@ -842,82 +1455,88 @@ if run_analysis and uploaded_file is not None:
                     file_type = 'svg'
                     mime_type = 'image/svg+xml'
 
-                # Display Download Button
-                if file_type and mime_type:
+                # Read the diagram once; later reruns reuse the bytes kept in session state
+                diagram_bytes = st.session_state.diagram_bytes
+                if file_type and diagram_bytes is None:
                     try:
                         with open(diagram_file, "rb") as fp:
-                            st.download_button(
-                                label=f"Download Diagram ({file_type.upper()})",
-                                data=fp,
-                                file_name=os.path.basename(diagram_file),
-                                mime=mime_type
-                            )
+                            diagram_bytes = st.session_state.diagram_bytes = fp.read()
+                    except Exception as read_e:
+                        st.error(f"Error reading diagram file: {read_e}")
+
+                # Display Download Button
+                if file_type and mime_type and diagram_bytes is not None:
+                    try:
+                        st.download_button(
+                            label=f"Download Diagram ({file_type.upper()})",
+                            data=diagram_bytes,
+                            file_name=st.session_state.diagram_file_basename or os.path.basename(diagram_file),
+                            mime=mime_type
+                        )
                     except Exception as dl_e:
                         st.error(f"Error preparing diagram download button: {dl_e}")
 
                 # Display Diagram Image
                 st.subheader("Network Diagram")
                 if file_type == 'png':
-                    st.image(diagram_file, caption="Network Diagram", use_container_width=True)
+                    if diagram_bytes is not None:
+                        st.image(diagram_bytes, caption="Network Diagram", use_container_width=True)
                 elif file_type == 'svg':
-                    try:
-                        with open(diagram_file, 'r', encoding='utf-8') as f_svg:
-                            svg_content = f_svg.read()
-                        st.image(svg_content, caption="Network Diagram (SVG)", use_container_width=True)
-                    except Exception as svg_e:
-                        st.error(f"Error reading or displaying SVG diagram: {svg_e}")
+                    if diagram_bytes is not None:
+                        try:
+                            st.image(diagram_bytes.decode('utf-8'), caption="Network Diagram (SVG)", use_container_width=True)
+                        except Exception as svg_e:
+                            st.error(f"Error reading or displaying SVG diagram: {svg_e}")
                 else:
                     st.warning(f"Diagram generated ({diagram_file}), but preview for this format is not supported. Check the file directly.")
 
                 # Display Legend
-                if st.session_state.legend_file_path:
-                    st.image(st.session_state.legend_file_path, caption="Diagram Legend")
+                legend_file_path = st.session_state.legend_file_path
+                if legend_file_path:
+                    legend_bytes = st.session_state.legend_bytes
+                    if legend_bytes is None:
+                        try:
+                            with open(legend_file_path, "rb") as fp:
+                                legend_bytes = st.session_state.legend_bytes = fp.read()
+                        except OSError as legend_e:
+                            st.error(f"Error reading diagram legend: {legend_e}")
+                    if legend_bytes is not None:
+                        st.image(legend_bytes, caption="Diagram Legend")
             else:
                 st.info("Diagram was not generated or failed.")
 
             # --- Display Reports --- 
             # Unused Objects Report
-            if st.session_state.unused_report_data:
+            if unused_report_data:
                 with st.expander("Unused Objects Report", expanded=False):
-                    unused_report_data = st.session_state.unused_report_data
-                    if any(unused_report_data.values()):
-                        if unused_report_data.get('addresses'): st.markdown(f"**Unused Addresses:** {', '.join(unused_report_data['addresses'])}")
-                        if unused_report_data.get('addr_groups'): st.markdown(f"**Unused Address Groups:** {', '.join(unused_report_data['addr_groups'])}")
-                        if unused_report_data.get('services'): st.markdown(f"**Unused Services:** {', '.join(unused_report_data['services'])}")
-                        if unused_report_data.get('svc_groups'): st.markdown(f"**Unused Service Groups:** {', '.join(unused_report_data['svc_groups'])}")
-                        if unused_report_data.get('interfaces'): st.markdown(f"**Unused Interfaces:** {', '.join(unused_report_data['interfaces'])}")
-                        if unused_report_data.get('zones'): st.markdown(f"**Unused Zones:** {', '.join(unused_report_data['zones'])}")
-                        if unused_report_data.get('vips'): st.markdown(f"**Unused VIPs:** {', '.join(unused_report_data['vips'])}")
-                        if unused_report_data.get('ippools'): st.markdown(f"**Unused IP Pools:** {', '.join(unused_report_data['ippools'])}")
-                        if unused_report_data.get('routes'): st.markdown(f"**Unused Static Routes:** {', '.join(unused_report_data['routes'])}")
-                        if unused_report_data.get('phase1'): st.markdown(f"**Unused VPN Phase 1:** {', '.join(unused_report_data['phase1'])}")
-                        if unused_report_data.get('phase2'): st.markdown(f"**Unused VPN Phase 2:** {', '.join(unused_report_data['phase2'])}")
-                    else:
+                    rendered_unused = False
+                    for key, label in _UNUSED_SECTIONS:
+                        items = unused_report_data.get(key)
+                        if items:
+                            if len(items) > UNUSED_INLINE_MAX:
+                                # Arrow-serialised and virtualised in the browser instead of one huge Markdown string
+                                st.markdown(f"**{label}** ({len(items)}):")
+                                st.dataframe(pd.Series(items, name=label), use_container_width=True, height=200, hide_index=True)
+                            else:
+                                st.markdown(f"**{label}:** {', '.join(items)}")
+                            rendered_unused = True
+                    if not rendered_unused:
                         st.success("No potentially unused objects found based on analysis scope.")
             else:
                  with st.expander("Unused Objects Report", expanded=False):
                      st.info("Unused object report data not available.")
 
             # Relationship Summary
-            if st.session_state.summary_data:
+            if summary_data:
                 st.subheader("Relationship Summary")
-                summary_data = st.session_state.summary_data
                 with st.expander("Object Counts (Parsed)", expanded=False):
                     if summary_data['parsed_counts']:
-                        cols = st.columns(3)
-                        col_idx = 0
-                        for name, count in summary_data['parsed_counts'].items():
-                            cols[col_idx].metric(label=name, value=count)
-                            col_idx = (col_idx + 1) % 3
+                        _metric_grid(summary_data['parsed_counts'].items())
                     else:
                         st.write("No objects parsed.")
                 with st.expander("Object Counts (Used & Drawn)", expanded=False):
                     if summary_data['used_counts']:
-                        cols = st.columns(3)
-                        col_idx = 0
-                        for name, count in summary_data['used_counts'].items():
-                            cols[col_idx].metric(label=name, value=count)
-                            col_idx = (col_idx + 1) % 3
+                        _metric_grid(summary_data['used_counts'].items())
                     else:
                         st.write("No objects found to be used in the drawn diagram scope.")
 
@@ -931,7 +1550,6 @@ if run_analysis and uploaded_file is not None:
                         st.warning(f"Cycle detected involving Service Group(s): {', '.join(complexity['service_group_cycles'])}")
 
                 with st.expander("High Usage Objects (Top 5 by Policy Reference)", expanded=False):
-                    import pandas as pd # Ensure pandas is available here too
                     high_usage = summary_data['high_usage_objects']
                     st.write("**Interfaces/Zones/Tunnels:**")
                     if high_usage['interfaces']:
@@ -952,12 +1570,7 @@ if run_analysis and uploaded_file is not None:
                 with st.expander("Potentially Unused Objects Summary", expanded=False):
                     unused = summary_data['unused_counts']
                     if unused.get("_has_unused"):
-                        cols = st.columns(3)
-                        col_idx = 0
-                        for name, count in unused.items():
-                            if name != "_has_unused":
-                                cols[col_idx].metric(label=name, value=count)
-                                col_idx = (col_idx + 1) % 3
+                        _metric_grid([(name, count) for name, count in unused.items() if name != "_has_unused"])
                         st.caption("See separate unused report file/expander for details")
                     else:
                         st.success("No potentially unused objects identified based on analysis scope.")
@@ -967,14 +1580,11 @@ if run_analysis and uploaded_file is not None:
                     if audit['total_findings'] > 0:
                         st.metric("Total Potential Issues Found", audit['total_findings'])
                         st.write("**Findings by Severity:**")
-                        cols = st.columns(len(audit['severity_counts']))
-                        col_idx = 0
-                        # Sort severity for consistent display
-                        severity_order = {"Critical": 0, "High": 1, "Medium": 2, "Low": 3, "Info": 4, "Unknown": 5}
-                        sorted_severities = sorted(audit['severity_counts'].items(), key=lambda item: severity_order.get(item[0], 99))
-                        for sev, count in sorted_severities:
-                            cols[col_idx].metric(label=sev, value=count)
-                            col_idx += 1
+                        # Sort severity for consistent display (ordered categorical index, sorted by pandas)
+                        severity_counts = pd.Series(audit['severity_counts'])
+                        severity_counts.index = pd.CategoricalIndex(severity_counts.index, dtype=_severity_dtype(severity_counts.index))
+                        sorted_severities = list(severity_counts.sort_index().items())
+                        _metric_grid(sorted_severities, n_cols=len(sorted_severities)) # One row
                         st.caption("See audit findings expander/section for details")
                     else:
                         st.success("No potential issues identified by the audit.")
@@ -982,325 +1592,16 @@ if run_analysis and uploaded_file is not None:
                 st.info("Relationship summary data not available.")
 
             # Connectivity Tree
-            if st.session_state.connectivity_tree:
+            if connectivity_tree:
                 with st.expander("Interface Connectivity Tree", expanded=False):
-                    st.code(st.session_state.connectivity_tree, language='text')
+                    st.code(connectivity_tree, language='text')
             else:
                  with st.expander("Interface Connectivity Tree", expanded=False):
                      st.info("Connectivity tree data not available.")
 
             # --- Generate and Display Tables --- 
             st.subheader("Configuration Tables (Summary)")
-            try:
-                # Use tabs for better organisation of tables
-                tab_titles = [
-                    "Interfaces", "Zones", "Static Routes", "Policies",
-                    "Addresses", "Addr Groups", "Services", "Svc Groups",
-                    "VIPs", "IP Pools", "VPN P1", "VPN P2", "DHCP",
-                    "DNS", "NTP", "Admins", "Antivirus", "IPS", "Web Filter", "App Control",
-                    "RADIUS Servers", "LDAP Servers"
-                ]
-                tabs = st.tabs(tab_titles)
-                model = st.session_state.model1 # Use model from session state
-
-                # --- Interfaces Table --- 
-                with tabs[0]:
-                    st.write("System Interfaces")
-                    intf_list = [{**v, 'name': k} for k, v in model.interfaces.items()]
-                    intf_cols = ['name', 'ip', 'type', 'description', 'alias', 'role', 'vdom', 'status', 'allowaccess', 'secondary_ip']
-                    intf_display_cols = {
-                        'name': 'Name', 'ip': 'IP/Mask', 'type': 'Type', 'description': 'Description',
-                        'alias': 'Alias', 'role': 'Role', 'vdom': 'VDOM', 'status': 'Status',
-                        'allowaccess': 'Allow Access', 'secondary_ip': 'Secondary IPs'
-                    }
-                    df_intf = get_table_dataframe(intf_list, intf_cols, intf_display_cols)
-                    list_cols_to_convert = ['Allow Access', 'Secondary IPs', 'Alias']
-                    for col_name in list_cols_to_convert:
-                        if col_name in df_intf.columns:
-                             df_intf[col_name] = df_intf[col_name].apply(
-                                 lambda x: ', '.join(map(str, x)) if isinstance(x, list) else x
-                             )
-                    st.dataframe(df_intf, use_container_width=True)
-
-                # --- Zones Table --- 
-                with tabs[1]:
-                    st.write("Firewall Zones")
-                    zone_list = [{**v, 'name': k} for k, v in model.zones.items()]
-                    zone_cols = ['name', 'interface', 'intrazone']
-                    zone_display_cols = {'name': 'Name', 'interface': 'Members', 'intrazone': 'Intrazone Action'}
-                    df_zone = get_table_dataframe(zone_list, zone_cols, zone_display_cols)
-                    st.dataframe(df_zone, use_container_width=True)
-
-                # --- Static Routes Table --- 
-                with tabs[2]:
-                    st.write("Static Routes")
-                    route_list = model.routes
-                    route_cols = ['name', 'dst', 'gateway', 'device', 'distance', 'priority', 'status', 'comment']
-                    route_display_cols = {
-                        'name': 'Name/Seq', 'dst': 'Destination', 'gateway': 'Gateway', 'device': 'Interface',
-                        'distance': 'Distance', 'priority': 'Priority', 'status': 'Status', 'comment': 'Comment'
-                    }
-                    df_route = get_table_dataframe(route_list, route_cols, route_display_cols)
-                    st.dataframe(df_route, use_container_width=True)
-
-                # --- Policies Table --- 
-                with tabs[3]:
-                    st.write("Firewall Policies")
-                    pol_list = model.policies
-                    pol_cols = ['id', 'name', 'srcintf', 'dstintf', 'srcaddr', 'dstaddr', 'service', 'action', 'status', 'nat', 'ippool', 'poolname', 'logtraffic', 'comments']
-                    pol_display_cols = {
-                        'id': 'ID', 'name': 'Name', 'srcintf': 'Src Intf', 'dstintf': 'Dst Intf',
-                        'srcaddr': 'Src Addr', 'dstaddr': 'Dst Addr', 'service': 'Service',
-                        'action': 'Action', 'status': 'Status', 'nat': 'NAT', 'ippool': 'IP Pool',
-                        'poolname': 'Pool Name', 'logtraffic': 'Log', 'comments': 'Comments'
-                    }
-                    df_pol = get_table_dataframe(pol_list, pol_cols, pol_display_cols)
-                    for col in ['srcintf', 'dstintf', 'srcaddr', 'dstaddr', 'service']:
-                        if col in df_pol.columns:
-                            df_pol[col] = df_pol[col].apply(lambda x: ', '.join(map(str, x)) if isinstance(x, list) else x)
-                    st.dataframe(df_pol, use_container_width=True)
-
-                # --- Addresses Table --- 
-                with tabs[4]:
-                    st.write("Address Objects")
-                    addr_list = [{**v, 'obj_name': k} for k, v in model.addresses.items()]
-                    addr_cols = ['obj_name', 'type', 'subnet', 'fqdn', 'start_ip', 'end_ip', 'wildcard', 'comment']
-                    addr_display_cols = {
-                        'obj_name': 'Name', 'type': 'Type', 'subnet': 'Subnet', 'fqdn': 'FQDN',
-                        'start_ip': 'Start IP', 'end_ip': 'End IP', 'wildcard': 'Wildcard', 'comment': 'Comment'
-                    }
-                    df_addr = get_table_dataframe(addr_list, addr_cols, addr_display_cols)
-                    st.dataframe(df_addr, use_container_width=True)
-
-                # --- Address Groups Table --- 
-                with tabs[5]:
-                    st.write("Address Groups")
-                    addrgrp_list = [{'name': k, 'member': v} for k, v in model.addr_groups.items()]
-                    addrgrp_cols = ['name', 'member']
-                    addrgrp_display_cols = {'name': 'Name', 'member': 'Members'}
-                    df_addrgrp = get_table_dataframe(addrgrp_list, addrgrp_cols, addrgrp_display_cols)
-                    if 'Members' in df_addrgrp.columns:
-                         df_addrgrp['Members'] = df_addrgrp['Members'].apply(lambda x: ', '.join(map(str, x)) if isinstance(x, list) else x)
-                    st.dataframe(df_addrgrp, use_container_width=True)
-
-                # --- Services Table --- 
-                with tabs[6]:
-                    st.write("Custom Services")
-                    svc_list = [{**v, 'obj_name': k} for k, v in model.services.items()]
-                    svc_cols = ['obj_name', 'protocol', 'port', 'tcp_portrange', 'udp_portrange', 'icmptype', 'icmpcode', 'comment']
-                    svc_display_cols = {
-                        'obj_name': 'Name', 'protocol': 'Protocol', 'port': 'Port Info (Combined)',
-                        'tcp_portrange': 'TCP Ports', 'udp_portrange': 'UDP Ports',
-                        'icmptype': 'ICMP Type', 'icmpcode': 'ICMP Code', 'comment': 'Comment'
-                    }
-                    df_svc = get_table_dataframe(svc_list, svc_cols, svc_display_cols)
-                    svc_list_cols = ['Port Info (Combined)', 'TCP Ports', 'UDP Ports']
-                    for col_name in svc_list_cols:
-                        if col_name in df_svc.columns:
-                            df_svc[col_name] = df_svc[col_name].apply(
-                                lambda x: ', '.join(map(str, x)) if isinstance(x, list) else x
-                            )
-                    st.dataframe(df_svc, use_container_width=True)
-
-                # --- Service Groups Table --- 
-                with tabs[7]:
-                    st.write("Service Groups")
-                    svcgrp_list = [{'name': k, 'member': v} for k, v in model.svc_groups.items()]
-                    svcgrp_cols = ['name', 'member']
-                    svcgrp_display_cols = {'name': 'Name', 'member': 'Members'}
-                    df_svcgrp = get_table_dataframe(svcgrp_list, svcgrp_cols, svcgrp_display_cols)
-                    if 'Members' in df_svcgrp.columns:
-                         df_svcgrp['Members'] = df_svcgrp['Members'].apply(lambda x: ', '.join(map(str, x)) if isinstance(x, list) else x)
-                    st.dataframe(df_svcgrp, use_container_width=True)
-
-                # --- VIPs Table --- 
-                with tabs[8]:
-                    st.write("Virtual IPs (VIPs)")
-                    vip_list = [{**v, 'name': k} for k, v in model.vips.items()]
-                    vip_cols = ['name', 'extip', 'mappedip', 'extintf', 'portforward', 'protocol', 'extport', 'mappedport', 'comment']
-                    vip_display_cols = {
-                        'name': 'Name', 'extip': 'External IP', 'mappedip': 'Mapped IP(s)',
-                        'extintf': 'Ext Interface', 'portforward': 'Port Fwd', 'protocol': 'Protocol',
-                        'extport': 'Ext Port', 'mappedport': 'Mapped Port', 'comment': 'Comment'
-                    }
-                    df_vip = get_table_dataframe(vip_list, vip_cols, vip_display_cols)
-                    if 'Mapped IP(s)' in df_vip.columns:
-                        df_vip['Mapped IP(s)'] = df_vip['Mapped IP(s)'].apply(lambda x: ', '.join([item.get('range','?') for item in x]) if isinstance(x, list) else x)
-                    st.dataframe(df_vip, use_container_width=True)
-
-                # --- IP Pools Table --- 
-                with tabs[9]:
-                    st.write("IP Pools")
-                    pool_list = [{**v, 'name': k} for k, v in model.ippools.items()]
-                    pool_cols = ['name', 'type', 'startip', 'endip', 'comment']
-                    pool_display_cols = {'name': 'Name', 'type': 'Type', 'startip': 'Start IP', 'endip': 'End IP', 'comment': 'Comment'}
-                    df_pool = get_table_dataframe(pool_list, pool_cols, pool_display_cols)
-                    st.dataframe(df_pool, use_container_width=True)
-
-                # --- VPN Phase 1 Table --- 
-                with tabs[10]:
-                    st.write("VPN Phase 1")
-                    p1_list = [{**v, 'name': k} for k, v in model.phase1.items()]
-                    p1_cols = ['name', 'interface', 'remote_gw', 'psksecret', 'proposal', 'mode', 'status', 'peerid', 'comments']
-                    p1_display_cols = {
-                        'name': 'Name', 'interface': 'Interface', 'remote_gw': 'Remote GW',
-                        'psksecret': 'PSK', 'proposal': 'Proposal', 'mode': 'Mode',
-                        'status': 'Status', 'peerid': 'Peer ID', 'comments': 'Comments'
-                    }
-                    df_p1 = get_table_dataframe(p1_list, p1_cols, p1_display_cols)
-                    if 'PSK' in df_p1.columns: df_p1['PSK'] = '***'
-                    # Convert Comment column to string
-                    if 'Comments' in df_p1.columns:
-                        df_p1['Comments'] = df_p1['Comments'].apply(lambda x: ', '.join(map(str, x)) if isinstance(x, list) else str(x))
-                    st.dataframe(df_p1, use_container_width=True)
-
-                # --- VPN Phase 2 Table --- 
-                with tabs[11]:
-                    st.write("VPN Phase 2")
-                    p2_list = [{**v, 'name': k} for k, v in model.phase2.items()]
-                    p2_cols = ['name', 'phase1name', 'proposal', 'src_subnet', 'dst_subnet', 'src_name', 'dst_name', 'auto_negotiate', 'keylifeseconds', 'comments']
-                    p2_display_cols = {
-                        'name': 'Name', 'phase1name': 'Phase1 Name', 'proposal': 'Proposal',
-                        'src_subnet': 'Src Subnet', 'dst_subnet': 'Dst Subnet',
-                        'src_name': 'Src Name Obj', 'dst_name': 'Dst Name Obj',
-                        'auto_negotiate': 'Auto Neg', 'keylifeseconds': 'Keylife (s)', 'comments': 'Comments'
-                    }
-                    df_p2 = get_table_dataframe(p2_list, p2_cols, p2_display_cols)
-                    st.dataframe(df_p2, use_container_width=True)
-
-                # --- DHCP Servers Table --- 
-                with tabs[12]:
-                    st.write("DHCP Servers")
-                    dhcp_list = model.dhcp_servers # Already list of dicts
-                    dhcp_cols = ['id', 'interface', 'ip_range_str', 'default_gateway', 'netmask', 'dns_service', 'status', 'reserved_addresses']
-                    dhcp_display_cols = {
-                        'id': 'ID', 'interface': 'Interface', 'ip_range_str': 'IP Range',
-                        'default_gateway': 'Gateway', 'netmask': 'Netmask', 'dns_service': 'DNS Service',
-                        'status': 'Status', 'reserved_addresses': 'Reserved IPs'
-                    }
-                    df_dhcp = get_table_dataframe(dhcp_list, dhcp_cols, dhcp_display_cols)
-                    if 'Reserved IPs' in df_dhcp.columns:
-                         df_dhcp['Reserved IPs'] = df_dhcp['Reserved IPs'].apply(lambda x: len(x) if isinstance(x, list) else 0)
-                    st.dataframe(df_dhcp, use_container_width=True)
-
-                # --- System DNS Table --- 
-                with tabs[13]:
-                    st.write("System DNS")
-                    dns_data = [model.dns] if model.dns else []
-                    dns_cols = ['primary', 'secondary', 'domain']
-                    dns_display_cols = {'primary': 'Primary', 'secondary': 'Secondary', 'domain': 'Domain'}
-                    df_dns = get_table_dataframe(dns_data, dns_cols, dns_display_cols)
-                    st.dataframe(df_dns, use_container_width=True)
-
-                # --- System NTP Table --- 
-                with tabs[14]:
-                    st.write("System NTP")
-                    ntp_data = []
-                    if model.ntp:
-                        ntp_enabled = model.ntp.get('ntpsync') == 'enable'
-                        server_mode = model.ntp.get('type','fortiguard')
-                        server_details = model.ntp.get('ntpserver','FortiGuard Servers') if server_mode == 'fortiguard' else model.ntp.get('server','?')
-                        ntp_data = [{'enabled': 'Yes' if ntp_enabled else 'No', 'mode': server_mode, 'server': server_details}]
-
-                    ntp_cols = ['enabled', 'mode', 'server']
-                    ntp_display_cols = {'enabled': 'Enabled', 'mode': 'Mode', 'server': 'Server(s)'}
-                    df_ntp = get_table_dataframe(ntp_data, ntp_cols, ntp_display_cols)
-                    st.dataframe(df_ntp, use_container_width=True)
-
-                # --- Administrators Table --- 
-                with tabs[15]:
-                    st.write("Administrators")
-                    admin_list = [{**v, 'name': k} for k, v in model.admins.items()]
-                    admin_cols = ['name', 'accprofile', 'trusted_hosts', 'vdoms']
-                    admin_display_cols = {'name': 'Name', 'accprofile': 'Access Profile', 'trusted_hosts': 'Trusted Hosts', 'vdoms': 'VDOMs'}
-                    df_admin = get_table_dataframe(admin_list, admin_cols, admin_display_cols)
-
-                    # Format trusted hosts and VDOMs for display
-                    if 'Trusted Hosts' in df_admin.columns:
-                        df_admin['Trusted Hosts'] = df_admin['Trusted Hosts'].apply(
-                            lambda x: ', '.join(map(str, x)) if isinstance(x, list) and x else 'Any'
-                        )
-                    if 'VDOMs' in df_admin.columns:
-                        df_admin['VDOMs'] = df_admin['VDOMs'].apply(
-                            lambda x: ', '.join(map(str, x)) if isinstance(x, list) and x else (x if x else '-')
-                        )
-                    st.dataframe(df_admin, use_container_width=True)
-
-                # --- Antivirus Profiles Table --- 
-                with tabs[16]:
-                    st.write("Antivirus Profiles")
-                    av_list = [{**v, 'name': k} for k, v in model.antivirus.items()]
-                    av_cols = ['name', 'comment', 'botnet_c_c_scan']
-                    av_display_cols = {'name': 'Name', 'comment': 'Comment', 'botnet_c_c_scan': 'Botnet C&C Scan'}
-                    df_av = get_table_dataframe(av_list, av_cols, av_display_cols)
-                    if 'Botnet C&C Scan' in df_av.columns:
-                         df_av['Botnet C&C Scan'] = df_av['Botnet C&C Scan'].apply(lambda x: 'Yes' if x == 'enable' else 'No')
-                    # Convert Comment column to string
-                    if 'Comment' in df_av.columns:
-                        df_av['Comment'] = df_av['Comment'].apply(lambda x: ', '.join(map(str, x)) if isinstance(x, list) else str(x))
-                    st.dataframe(df_av, use_container_width=True)
-
-                # --- IPS Sensors Table --- 
-                with tabs[17]:
-                    st.write("IPS Sensors")
-                    ips_list = [{**v, 'name': k} for k, v in model.ips.items()]
-                    ips_cols = ['name', 'comment']
-                    ips_display_cols = {'name': 'Name', 'comment': 'Comment'}
-                    df_ips = get_table_dataframe(ips_list, ips_cols, ips_display_cols)
-                    if 'Comment' in df_ips.columns:
-                        df_ips['Comment'] = df_ips['Comment'].apply(lambda x: ', '.join(map(str, x)) if isinstance(x, list) else str(x))
-                    st.dataframe(df_ips, use_container_width=True)
-
-                # --- Web Filter Profiles Table --- 
-                with tabs[18]:
-                    st.write("Web Filter Profiles")
-                    wf_list = [{**v, 'name': k} for k, v in model.web_filter.items()]
-                    wf_cols = ['name', 'comment', 'fortiguard_category']
-                    wf_display_cols = {'name': 'Name', 'comment': 'Comment', 'fortiguard_category': 'FortiGuard Category Action'}
-                    df_wf = get_table_dataframe(wf_list, wf_cols, wf_display_cols)
-                    # Fortiguard category data might be complex, just display raw for now
-                    # Convert Comment column to string
-                    if 'Comment' in df_wf.columns:
-                        df_wf['Comment'] = df_wf['Comment'].apply(lambda x: ', '.join(map(str, x)) if isinstance(x, list) else str(x))
-                    st.dataframe(df_wf, use_container_width=True)
-
-                # --- Application Control Profiles Table --- 
-                with tabs[19]:
-                    st.write("Application Control Profiles")
-                    app_list = [{**v, 'name': k} for k, v in model.app_control.items()]
-                    app_cols = ['name', 'comment']
-                    app_display_cols = {'name': 'Name', 'comment': 'Comment'}
-                    df_app = get_table_dataframe(app_list, app_cols, app_display_cols)
-                    if 'Comment' in df_app.columns:
-                        df_app['Comment'] = df_app['Comment'].apply(lambda x: ', '.join(map(str, x)) if isinstance(x, list) else str(x))
-                    st.dataframe(df_app, use_container_width=True)
-
-                # --- RADIUS Servers Table (Example - Add if model.radius_servers exists) ---
-                if hasattr(model, 'radius_servers') and model.radius_servers:
-                    with tabs[20]:
-                        st.write("RADIUS Servers")
-                        radius_list = [{**v, 'name': k} for k, v in model.radius_servers.items()]
-                        radius_cols = ['name', 'server', 'secret']
-                        radius_display_cols = {'name': 'Name', 'server': 'Server IP', 'secret': 'Secret'}
-                        df_radius = get_table_dataframe(radius_list, radius_cols, radius_display_cols)
-                        if 'Secret' in df_radius.columns: df_radius['Secret'] = '***'
-                        st.dataframe(df_radius, use_container_width=True)
-
-                # --- LDAP Servers Table (Example - Add if model.ldap_servers exists) ---
-                if hasattr(model, 'ldap_servers') and model.ldap_servers:
-                    with tabs[21]:
-                        st.write("LDAP Servers")
-                        ldap_list = [{**v, 'name': k} for k, v in model.ldap_servers.items()]
-                        ldap_cols = ['name', 'server', 'cnid', 'dn', 'password']
-                        ldap_display_cols = {'name': 'Name', 'server': 'Server IP', 'cnid': 'User ID Field', 'dn': 'Distinguished Name', 'password': 'Password'}
-                        df_ldap = get_table_dataframe(ldap_list, ldap_cols, ldap_display_cols)
-                        if 'Password' in df_ldap.columns: df_ldap['Password'] = '***'
-                        st.dataframe(df_ldap, use_container_width=True)
-
-            except Exception as table_e:
-                # Don't set global processing error here, tables are supplementary
-                st.error(f"An error occurred during table generation: {table_e}")
-                st.code(traceback.format_exc())
+            _config_tables_view(st.session_state.config_hash, st.session_state.model1)
         elif not run_trace and not st.session_state.analysis_done:
              st.info("Click 'Parse & Analyse Configuration' to generate analysis, diagrams, and reports.")
         elif st.session_state.processing_error:
@@ -1321,54 +1622,62 @@ elif run_compare and uploaded_file is not None and uploaded_file_compare is not
     if st.session_state.model1 is None:
         main_status = st.status(f"Parsing {st.session_state.uploaded_file_name_1} for comparison...", expanded=True)
         try:
-            stringio1 = io.StringIO(uploaded_file.getvalue().decode("utf-8"))
-            config_lines1 = stringio1.readlines()
-            parser1 = FortiParser(config_lines1)
-            st.session_state.model1 = parser1.parse()
+            model1 = _parse_config(config_hash_1, raw_config_1)
+            st.session_state.update({'model1': model1, 'comparison_done': False}) # Reset comparison if re-parsing
             main_status.update(label=f"Parsing {st.session_state.uploaded_file_name_1} complete.", state="complete", expanded=False)
-            st.session_state.comparison_done = False # Reset comparison if re-parsing
         except Exception as parse_e1:
             comparison_error = True
             if 'main_status' in locals(): main_status.update(label=f"Parsing Error (File 1): {parse_e1}", state="error", expanded=True)
             st.error(f"Error parsing {st.session_state.uploaded_file_name_1}: {parse_e1}")
-            st.code(traceback.format_exc())
+            _show_traceback()
+
+    # --- Short-circuit byte-identical uploads (no second parse or diff needed) ---
+    files_identical = st.session_state.config_hash is not None and st.session_state.config_hash == st.session_state.config_hash_2
+    if not comparison_error and files_identical and not st.session_state.comparison_done:
+        st.session_state.update({
+            'diff_results': {},
+            'diff_formatted': "Files are byte-identical.",
+            'comparison_done': True,
+        })
 
     # --- Parse File 2 (if not already parsed) ---
-    if not comparison_error and st.session_state.model2 is None:
+    if not comparison_error and not files_identical and st.session_state.model2 is None:
         main_status = st.status(f"Parsing {st.session_state.uploaded_file_name_2} for comparison...", expanded=True)
         try:
-            stringio2 = io.StringIO(uploaded_file_compare.getvalue().decode("utf-8"))
-            config_lines2 = stringio2.readlines()
-            parser2 = FortiParser(config_lines2)
-            st.session_state.model2 = parser2.parse()
+            model2 = _parse_config(config_hash_2, raw_config_2)
+            st.session_state.update({'model2': model2, 'comparison_done': False}) # Reset comparison if re-parsing
             main_status.update(label=f"Parsing {st.session_state.uploaded_file_name_2} complete.", state="complete", expanded=False)
-            st.session_state.comparison_done = False # Reset comparison if re-parsing
         except Exception as parse_e2:
             comparison_error = True
             if 'main_status' in locals(): main_status.update(label=f"Parsing Error (File 2): {parse_e2}", state="error", expanded=True)
             st.error(f"Error parsing {st.session_state.uploaded_file_name_2}: {parse_e2}")
-            st.code(traceback.format_exc())
+            _show_traceback()
 
     # --- Run Comparison (if models exist and comparison not done) ---
-    if not comparison_error and st.session_state.model1 and st.session_state.model2 and not st.session_state.comparison_done:
+    if not comparison_error and not files_identical and st.session_state.model1 and st.session_state.model2 and not st.session_state.comparison_done:
         main_status = st.status(f"Comparing {st.session_state.uploaded_file_name_1} and {st.session_state.uploaded_file_name_2}...", expanded=True)
         try:
             main_status.write("Comparing models...")
-            st.session_state.diff_results = compare_models(st.session_state.model1, st.session_state.model2)
-            st.session_state.diff_formatted = format_diff_results(st.session_state.diff_results)
-            st.session_state.comparison_done = True # Mark comparison as done
+            diff_results = compare_models(st.session_state.model1, st.session_state.model2)
+            # Store the results together once both steps succeed
+            st.session_state.update({
+                'diff_results': diff_results,
+                'diff_formatted': format_diff_results(diff_results),
+                'comparison_done': True, # Mark comparison as done
+            })
             main_status.update(label="Comparison complete.", state="complete", expanded=False)
         except Exception as comp_e:
             comparison_error = True
             if 'main_status' in locals(): main_status.update(label=f"Comparison Failed: {comp_e}", state="error", expanded=True)
             st.error(f"An error occurred during comparison: {comp_e}")
-            st.code(traceback.format_exc())
+            _show_traceback()
 
     # --- Display Comparison Results (if available) ---
     if not comparison_error and st.session_state.comparison_done:
         st.subheader("Structured Configuration Differences")
         if st.session_state.diff_formatted:
-            st.markdown(st.session_state.diff_formatted, unsafe_allow_html=True)
+            # Already complete HTML: render it as-is instead of through the frontend markdown parser
+            components.html(st.session_state.diff_formatted, height=DIFF_VIEW_HEIGHT, scrolling=True)
         else:
             # This case might occur if comparison ran but produced no diff_formatted (e.g., empty diff)
             st.info("Comparison ran, but no formatted differences were generated (possibly identical files or an issue in formatting).")
@@ -3,157 +3,522 @@
 """
 Data model for storing parsed FortiGate configuration.
 """
+from __future__ import annotations
+
 import ipaddress
+import sys
+from bisect import bisect_right
+from itertools import chain
+from typing import Iterable, Optional, Union
 
 class ConfigModel:
     """Holds all parsed FortiGate objects and resolves references."""
-    def __init__(self):
-        self.routes            = []
-        self.addresses         = {}
-        self.addr_groups       = {}
-        self.services          = {}
-        self.svc_groups        = {}
-        self.interfaces        = {}
-        self.vlans             = {}
-        self.zones             = {}
-        self.policies          = []
-        self.vips              = {}
-        self.vip_groups        = {}
-        self.ippools           = {}
-        self.dhcp_servers      = []
-        self.ospf              = {}
-        self.bgp               = {}
-        self.bgp_neighbors     = []
-        self.bgp_networks      = []
-        self.phase1            = {}
-        self.phase2            = {}
-        self.traffic_shapers   = {}
-        self.shaper_per_ip     = {}
-        self.dos_policies      = []
-        self.snmp_sysinfo      = {}
-        self.snmp_communities  = {}
-        self.ldap_servers      = {}
-        self.admins            = {}
-        self.ha                = {}
-        self.ntp               = {}
-        self.dns               = {}
-        self.ssl_settings      = {}
-        self.ssl_portals       = {}
-        self.ssl_policies      = []
-        self.vrrp              = {}
-        
+    # Section containers, each created empty per model: list-valued first, then dict-valued
+    _LIST_FIELDS = (
+        'routes',
+        'policies',
+        'dhcp_servers',
+        'bgp_neighbors',
+        'bgp_networks',
+        'dos_policies',
+        'ssl_policies',
         # New sections
-        self.policy_routes     = []
-        self.system_global     = {}  # Global system settings
-        self.antivirus        = {}  # Antivirus profiles
-        self.ips              = {}  # IPS profiles
-        self.web_filter       = {}  # Web filter profiles
-        self.app_control      = {}  # Application control profiles
-        self.ssl_inspection   = {}  # SSL/SSH inspection profiles
-        self.waf              = {}  # Web Application Firewall profiles
-        self.email_filter     = {}  # Email filter profiles
-        self.dlp              = {}  # Data Leak Prevention profiles
-        self.voip             = {}  # VoIP profiles
-        self.icap             = {}  # ICAP profiles
-        self.gtp              = {}  # GTP profiles
-        self.radius_servers   = {}  # RADIUS servers
-        self.user_groups      = {}  # User groups
-        self.schedule_groups  = {}  # Schedule groups
-        self.schedule_onetime = {}  # One-time schedules
-        self.schedule_recurring = {}  # Recurring schedules
-        self.sniffer_profile  = {}  # Sniffer profiles
-        self.wan_opt          = {}   # WAN optimization profiles
-        self.fortitoken       = {}   # FortiToken configuration
-        self.fortiguard       = {}    # FortiGuard settings
-        self.log_settings     = {}     # Logging settings
-        self.sd_wan           = {}     # SD-WAN configuration
-        self.load_balance     = {}     # Server load balancing
-        self.wireless_controller = {}  # Wireless controller settings
-        self.switch_controller = {}   # Switch controller settings
-        self.sandbox          = {}      # FortiSandbox settings
-        self.certificate      = {}      # SSL certificates
-        self.saml             = {}       # SAML settings
-        self.fsso             = {}       # Fortinet Single Sign-On
-        self.automation       = {}       # Security Fabric automation
-        self.sdn_connector    = {}       # SDN connectors
-        self.extender         = {}       # FortiExtender settings
-        self.vpn_l2tp         = {}       # L2TP VPN settings
-        self.vpn_pptp         = {}       # PPTP VPN settings
-        self.vpn_ssl_client   = {}       # SSL VPN client settings
-        self.system_replacemsg = {}       # Replacement messages
-        self.system_accprofile = {}       # Admin access profiles
-        self.system_api_user  = {}        # API users
-        self.system_sso_admin = {}         # SSO admin settings
-        self.system_password_policy = {}    # Password policy
-        self.system_interface_policy = {}     # Interface policies
-        self.system_csf        = {}            # Security Fabric settings
-        self.system_central_mgmt = {}         # Central management settings
-        self.system_auto_update = {}           # Auto-update settings
-        self.system_session_ttl = {}            # Session TTL settings
-        self.system_gre_tunnel = {}              # GRE tunnel settings
-        self.system_ddns       = {}                # Dynamic DNS settings
-        self.system_dns_database = {}              # DNS database settings
-        self.system_dns_server = {}                # DNS server settings
-        self.system_proxy_arp  = {}                  # Proxy ARP settings
-        self.system_virtual_wire_pair = {}            # Virtual wire pair settings
-        self.system_wccp      = {}                     # WCCP settings
-        self.system_sit_tunnel = {}                     # SIT tunnel settings
-        self.system_ipip_tunnel = {}                     # IPIP tunnel settings
-        self.system_vxlan     = {}                         # VXLAN settings
-        self.system_geneve    = {}                          # GENEVE settings
-        self.system_network_visibility = {}                # Network visibility settings
-        self.system_ptp       = {}                             # PTP settings
-        self.system_tos_based_priority = {}                    # ToS-based priority settings
-        self.system_email_server = {}                             # Email server settings
-        self.system_dns_filter = {}                                # DNS filter settings
-        self.system_ips_urlfilter_dns = {}                            # IPS URL filter DNS settings
-        self.system_fortiguard = {}                                    # FortiGuard settings
-        self.system_fm        = {}                                         # FortiManager settings
-        self.system_fortianalyzer = {}                                     # FortiAnalyzer settings
-        self.system_fortisandbox = {}                                        # FortiSandbox settings
-        self.vdoms = {} # Dictionary to store VDOM-specific configurations
+        'policy_routes',
+    )
+    _DICT_FIELDS = (
+        'addresses',
+        'addr_groups',
+        'services',
+        'svc_groups',
+        'interfaces',
+        'vlans',
+        'zones',
+        'vips',
+        'vip_groups',
+        'ippools',
+        'ospf',
+        'bgp',
+        'phase1',
+        'phase2',
+        'traffic_shapers',
+        'shaper_per_ip',
+        'snmp_sysinfo',
+        'snmp_communities',
+        'ldap_servers',
+        'admins',
+        'ha',
+        'ntp',
+        'dns',
+        'ssl_settings',
+        'ssl_portals',
+        'vrrp',
+        'system_global', # Global system settings
+        'antivirus', # Antivirus profiles
+        'ips', # IPS profiles
+        'web_filter', # Web filter profiles
+        'app_control', # Application control profiles
+        'ssl_inspection', # SSL/SSH inspection profiles
+        'waf', # Web Application Firewall profiles
+        'email_filter', # Email filter profiles
+        'dlp', # Data Leak Prevention profiles
+        'voip', # VoIP profiles
+        'icap', # ICAP profiles
+        'gtp', # GTP profiles
+        'radius_servers', # RADIUS servers
+        'user_groups', # User groups
+        'schedule_groups', # Schedule groups
+        'schedule_onetime', # One-time schedules
+        'schedule_recurring', # Recurring schedules
+        'sniffer_profile', # Sniffer profiles
+        'wan_opt', # WAN optimization profiles
+        'fortitoken', # FortiToken configuration
+        'fortiguard', # FortiGuard settings
+        'log_settings', # Logging settings
+        'sd_wan', # SD-WAN configuration
+        'load_balance', # Server load balancing
+        'wireless_controller', # Wireless controller settings
+        'switch_controller', # Switch controller settings
+        'sandbox', # FortiSandbox settings
+        'certificate', # SSL certificates
+        'saml', # SAML settings
+        'fsso', # Fortinet Single Sign-On
+        'automation', # Security Fabric automation
+        'sdn_connector', # SDN connectors
+        'extender', # FortiExtender settings
+        'vpn_l2tp', # L2TP VPN settings
+        'vpn_pptp', # PPTP VPN settings
+        'vpn_ssl_client', # SSL VPN client settings
+        'system_replacemsg', # Replacement messages
+        'system_accprofile', # Admin access profiles
+        'system_api_user', # API users
+        'system_sso_admin', # SSO admin settings
+        'system_password_policy', # Password policy
+        'system_interface_policy', # Interface policies
+        'system_csf', # Security Fabric settings
+        'system_central_mgmt', # Central management settings
+        'system_auto_update', # Auto-update settings
+        'system_session_ttl', # Session TTL settings
+        'system_gre_tunnel', # GRE tunnel settings
+        'system_ddns', # Dynamic DNS settings
+        'system_dns_database', # DNS database settings
+        'system_dns_server', # DNS server settings
+        'system_proxy_arp', # Proxy ARP settings
+        'system_virtual_wire_pair', # Virtual wire pair settings
+        'system_wccp', # WCCP settings
+        'system_sit_tunnel', # SIT tunnel settings
+        'system_ipip_tunnel', # IPIP tunnel settings
+        'system_vxlan', # VXLAN settings
+        'system_geneve', # GENEVE settings
+        'system_network_visibility', # Network visibility settings
+        'system_ptp', # PTP settings
+        'system_tos_based_priority', # ToS-based priority settings
+        'system_email_server', # Email server settings
+        'system_dns_filter', # DNS filter settings
+        'system_ips_urlfilter_dns', # IPS URL filter DNS settings
+        'system_fortiguard', # FortiGuard settings
+        'system_fm', # FortiManager settings
+        'system_fortianalyzer', # FortiAnalyzer settings
+        'system_fortisandbox', # FortiSandbox settings
+        'vdoms', # Dictionary to store VDOM-specific configurations
+        'generic_configs', # Sections without a dedicated handler ('generic_<name>' -> raw data)
+        'fortios_version_details', # e.g., {'major': 7, 'minor': 2, 'patch': 5, 'build': 1517}
+    )
+    # Dict sections the app, diff and diagram read on every model; the rest are
+    # empty on most configs and only created on first access (see __getattr__)
+    _EAGER_DICT_FIELDS = (
+        'addresses', 'addr_groups', 'services', 'svc_groups', 'interfaces', 'zones',
+        'vips', 'vip_groups', 'ippools', 'phase1', 'phase2', 'ha', 'ntp', 'dns', 'admins',
+        'ldap_servers', 'radius_servers', 'system_global', 'system_fortianalyzer', 'fortiguard',
+        'log_settings', 'sd_wan', 'antivirus', 'ips', 'web_filter', 'app_control',
+        'ssl_inspection', 'vdoms', 'fortios_version_details',
+    )
+    _LAZY_DICT_FIELDS = frozenset(_DICT_FIELDS).difference(_EAGER_DICT_FIELDS)
+    # Expanded policies cached beyond len(policies), for dicts not in the model (see expand_policy)
+    _EXPANDED_POLICIES_SLACK = 256
+    # Derived index -> method that builds it from the parsed sections. Each one is
+    # left unset until first read (see __getattr__) and dropped by finalize().
+    _DERIVED_BUILDERS = {
+        'addr_groups_flat': '_build_address_index',
+        '_address_index': '_build_address_index',
+        'svc_groups_flat': '_build_service_index',
+        '_service_index': '_build_service_index',
+        'address_ranges': '_build_address_ranges',
+    }
+    # Derived attributes left out of pickles (see __getstate__): the indexes above
+    # plus the caches filled while they are used
+    _DERIVED_FIELDS = tuple(_DERIVED_BUILDERS) + ('_cyclic_groups', '_expanded_policies')
+    # Fixed attribute layout (no per-instance __dict__); every attribute the parser
+    # sets must be listed here, as a section above or one of the names below.
+    __slots__ = _LIST_FIELDS + _DICT_FIELDS + (
+        'has_vdoms', 'fortios_version', 'content_hash',
+    ) + _DERIVED_FIELDS
+    # Types of the non-section attributes (declarations only; values are set in
+    # __init__, or by the _DERIVED_BUILDERS methods for the derived indexes)
+    has_vdoms: bool
+    fortios_version: Optional[str]
+    content_hash: Optional[str]
+    addr_groups_flat: dict[str, tuple[str, ...]]
+    svc_groups_flat: dict[str, tuple[str, ...]]
+    address_ranges: dict[str, dict[int, tuple[list[int], list[int]]]]
+    _address_index: dict[str, tuple[str, ...]]
+    _service_index: dict[str, tuple[str, ...]]
+    _cyclic_groups: dict[str, set[str]]
+    _expanded_policies: dict[int, tuple[dict, dict]]
+
+    def __init__(self) -> None:
+        for field in self._LIST_FIELDS:
+            setattr(self, field, [])
+        for field in self._EAGER_DICT_FIELDS:
+            setattr(self, field, {})
         self.has_vdoms = False # Flag to indicate if VDOMs were parsed
         self.fortios_version = None # e.g., "v7.2.5,build1517"
-        self.fortios_version_details = {} # e.g., {'major': 7, 'minor': 2, 'patch': 5, 'build': 1517}
+        self.content_hash = None # BLAKE2b hex digest of the source config bytes (set by the loader)
+        # Section name ('addr_groups'/'svc_groups') -> set of group names caught in a
+        # membership cycle (A -> B -> A, or A -> A). Filled as each group index is built.
+        self._cyclic_groups = {}
+        # id(policy dict) -> (policy dict, expanded policy); emptied by finalize()
+        self._expanded_policies = {}
+
+    def __getattr__(self, name: str):
+        # Only reached when normal lookup fails: a lazy section not yet created, or a
+        # derived index not yet built (or dropped by finalize())
+        cls = type(self)
+        if name in cls._LAZY_DICT_FIELDS:
+            section = {}
+            setattr(self, name, section)
+            return section
+        builder = cls._DERIVED_BUILDERS.get(name)
+        if builder is not None:
+            getattr(self, builder)()
+            return object.__getattribute__(self, name)
+        raise AttributeError(f"{cls.__name__!r} object has no attribute {name!r}")
+
+    def __getstate__(self) -> dict:
+        # Parsed sections and scalars only: the derived indexes and caches are
+        # often larger than the config itself and are rebuilt on demand
+        state = {}
+        for name in self.__slots__:
+            if name in self._DERIVED_FIELDS:
+                continue
+            try:
+                state[name] = object.__getattribute__(self, name) # Skips unset lazy sections
+            except AttributeError:
+                pass
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        derived = self._DERIVED_FIELDS
+        for name, value in state.items():
+            if name not in derived: # Profiles saved by older versions may still carry them
+                setattr(self, name, value)
+        # The derived indexes stay unset and are built on first use (see __getattr__)
+        self._cyclic_groups = {}
+        self._expanded_policies = {}
+
+    def finalize(self) -> None:
+        """Discards the derived indexes and caches so they are rebuilt on next use.
+
+        The indexes in _DERIVED_BUILDERS (flattened groups, name -> leaves,
+        address ranges, policies and routes by id) are built from the
+        sections the first time one of them is read, so parsing pays nothing
+        for the ones a session never uses. Call this after editing addresses,
+        addr_groups, services, svc_groups, policies or routes.
+        """
+        for name in self._DERIVED_BUILDERS:
+            try:
+                delattr(self, name)
+            except AttributeError: # Not built
+                pass
+        self._cyclic_groups = {}
+        self._expanded_policies = {}
+
+    def _build_address_index(self) -> None:
+        """Flattens every address group into its leaf subnets (addr_groups_flat).
+
+        _address_index then maps every address object and group to its
+        leaves, so resolving any name is a single lookup instead of a walk
+        over nested groups; objects win over same-named groups. Members that
+        name nothing known contribute nothing. Groups on a membership cycle
+        all resolve to the leaves of the whole cycle (see _flatten_groups);
+        their names are kept in _cyclic_groups for group_cycles().
+        """
+        leaves = {name: self._address_leaves(name) for name in self.addresses}
+        nodes = self._group_nodes(self.addr_groups, leaves)
+        self.addr_groups_flat, cyclic = self._flatten_groups(nodes)
+        self._cyclic_groups['addr_groups'] = cyclic
+        self._address_index = dict(self.addr_groups_flat)
+        self._address_index.update(leaves)
+
+    def _build_service_index(self) -> None:
+        """Same as _build_address_index, for services (svc_groups_flat, _service_index)."""
+        leaves = {name: self._service_leaves(name) for name in self.services}
+        nodes = self._group_nodes(self.svc_groups, leaves)
+        self.svc_groups_flat, cyclic = self._flatten_groups(nodes)
+        self._cyclic_groups['svc_groups'] = cyclic
+        self._service_index = dict(self.svc_groups_flat)
+        self._service_index.update(leaves)
+
+    def _build_address_ranges(self) -> None:
+        """Merges each address and group's IP spans into integer ranges (address_ranges).
+
+        address_ranges maps every address and group to {ip version: (sorted
+        lows, highs)} of merged ranges, for containment queries via contains().
+        Subnets ('ipmask') and start-ip/end-ip ranges ('iprange') are covered;
+        FQDN, geography and other address types have no range. Groups are
+        walked over the same _group_nodes table as _build_address_index.
+        """
+        spans = {name: self._address_spans(addr) for name, addr in self.addresses.items()}
+        group_spans, _ = self._flatten_groups(self._group_nodes(self.addr_groups, spans))
+        merge = self._merge_ranges
+        self.address_ranges = {name: merge(s) for name, s in group_spans.items()}
+        self.address_ranges.update((name, merge(s)) for name, s in spans.items())
+
+    def group_cycles(self, section: str) -> set[str]:
+        """Names of the groups in a section that lie on a membership cycle.
+
+        The model does not print these; callers that resolve names report
+        them as they see fit.
+
+        Args:
+            section: 'addr_groups' or 'svc_groups'.
+
+        Returns:
+            The set of cyclic group names (empty if there are none).
+        """
+        if section not in self._cyclic_groups: # Filled when the section's index is built
+            if section == 'addr_groups':
+                self._build_address_index()
+            elif section == 'svc_groups':
+                self._build_service_index()
+            else:
+                raise ValueError(f"Unknown group section: {section!r}")
+        return self._cyclic_groups[section]
+
+    @staticmethod
+    def route_id(route: dict) -> str:
+        """Returns the route's name, or an ID built from its dst/device/gateway."""
+        return route.get('name') or f"route_{route.get('dst', '')}_{route.get('device', '')}_{route.get('gateway', '')}"
+
+    @staticmethod
+    def _address_spans(addr: dict) -> tuple[tuple[int, int, int], ...]:
+        """(ip version, first, last) integer span of an address object, or () if it has none."""
+        addr_type = addr.get('type', 'ipmask') # Parser default when no type is set
+        try:
+            if addr_type == 'ipmask':
+                net = ipaddress.ip_network(addr['subnet'], strict=False)
+                return ((net.version, int(net.network_address), int(net.broadcast_address)),)
+            if addr_type == 'iprange':
+                first = ipaddress.ip_address(addr['start_ip'])
+                last = ipaddress.ip_address(addr['end_ip'])
+                if first.version == last.version:
+                    return ((first.version, int(first), int(last)),)
+        except (KeyError, ValueError): # Missing or malformed fields
+            pass
+        return ()
+
+    @staticmethod
+    def _merge_ranges(spans: Iterable[tuple[int, int, int]]) -> dict[int, tuple[list[int], list[int]]]:
+        """Merges (ip version, first, last) spans into sorted, disjoint integer ranges per IP version."""
+        by_version = {}
+        for version, first, last in spans:
+            by_version.setdefault(version, []).append((first, last))
+        ranges = {}
+        for version, pairs in by_version.items():
+            pairs.sort()
+            lows, highs = [pairs[0][0]], [pairs[0][1]]
+            for low, high in pairs[1:]:
+                if low <= highs[-1] + 1: # Overlapping or adjacent
+                    highs[-1] = max(highs[-1], high)
+                else:
+                    lows.append(low)
+                    highs.append(high)
+            ranges[version] = (lows, highs)
+        return ranges
+
+    # Tags for _group_nodes entries
+    _LEAF, _GROUP = 0, 1
+
+    @classmethod
+    def _group_nodes(cls, groups: dict[str, list[str]],
+                     leaves: dict[str, tuple[str, ...]]) -> dict[str, tuple[int, tuple]]:
+        """Merges objects and groups into one name -> (tag, payload) table.
+
+        Payload is the leaf tuple for _LEAF nodes and the member list for
+        _GROUP nodes, so a walk classifies each member with a single probe.
+        Objects take precedence over same-named groups.
+        """
+        nodes = {name: (cls._GROUP, members) for name, members in groups.items()}
+        nodes.update((name, (cls._LEAF, leaf)) for name, leaf in leaves.items())
+        return nodes
+
+    @classmethod
+    def _flatten_groups(cls, nodes: dict[str, tuple[int, tuple]]) -> tuple[dict[str, tuple], set[str]]:
+        """Flattens the groups of a _group_nodes table into tuples of leaves.
+
+        Groups are visited as strongly connected components (iterative
+        Tarjan); a component is only completed after every component its
+        members reach, so each group is built from already flattened
+        members. Mutually referencing groups form one component (a
+        membership cycle, as does a group that contains itself), and each of
+        its groups gets the leaves of the whole component, whichever group
+        the walk reached first.
+
+        Args:
+            nodes: Dict mapping names to (_LEAF, leaf tuple) or
+                (_GROUP, member names), as built by _group_nodes.
+
+        Returns:
+            (flat, cyclic): flat maps every group name to a tuple of leaf
+            values in member order (duplicates kept; within a cycle each
+            group's leaves are counted once). cyclic is the set of group
+            names on a membership cycle.
+        """
+        GROUP = cls._GROUP
+        index, low = {}, {}
+        path, on_path = [], set()
+        flat, cyclic = {}, set()
+
+        def visit(name):
+            index[name] = low[name] = len(index)
+            path.append(name)
+            on_path.add(name)
+            work.append((name, iter(nodes[name][1])))
+
+        def collect(start):
+            # Leaves reached from `start`, entering each group of its (unfinished)
+            # component once; every other member group is already in `flat`
+            out, seen = [], {start}
+            stack = [iter(nodes[start][1])]
+            while stack:
+                for m in stack[-1]:
+                    node = nodes.get(m)
+                    if node is None: # Unknown name
+                        continue
+                    if node[0] != GROUP:
+                        out.extend(node[1])
+                    elif m in flat:
+                        out.extend(flat[m])
+                    elif m not in seen: # Same component
+                        seen.add(m)
+                        stack.append(iter(node[1]))
+                        break
+                else:
+                    stack.pop()
+            return tuple(out)
+
+        for root, (tag, _) in nodes.items():
+            if tag != GROUP or root in index:
+                continue
+            work = []
+            visit(root)
+            while work:
+                name, members = work[-1]
+                for m in members:
+                    node = nodes.get(m)
+                    if node is None or node[0] != GROUP:
+                        continue
+                    if m not in index:
+                        visit(m)
+                        break
+                    if m in on_path:
+                        low[name] = min(low[name], index[m])
+                        if m == name: # Self-membership
+                            cyclic.add(name)
+                else: # All members done
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[name])
+                    if low[name] == index[name]: # Root of a strongly connected component
+                        component = []
+                        while True:
+                            m = path.pop()
+                            on_path.discard(m)
+                            component.append(m)
+                            if m == name:
+                                break
+                        if len(component) > 1:
+                            cyclic.update(component)
+                        # Build every group before publishing any, so each one
+                        # walks the whole component rather than a sibling's result
+                        flat.update([(m, collect(m)) for m in component])
+        return flat, cyclic
+
+    def _address_leaves(self, name: str) -> Optional[tuple[str, ...]]:
+        """Subnet tuple for an address object, or None if `name` is not one."""
+        addr = self.addresses.get(name)
+        if addr is None:
+            return None
+        return (addr['subnet'],) if 'subnet' in addr else ()
+
+    def _service_leaves(self, name: str) -> Optional[tuple[str, ...]]:
+        """'PROTOCOL/port' tuple for a custom service, or None if `name` is not one.
+
+        Built once per service by _build_service_index(); the string is
+        interned so every group resolving to the same service shares it.
+        """
+        svc = self.services.get(name)
+        if svc is None:
+            return None
+        # Parser default protocol when none is set
+        return (sys.intern(f"{svc.get('protocol', 'TCP/UDP/SCTP')}/{svc.get('port', 'any')}"),)
+
+    def resolve_address(self, name: str) -> tuple[str, ...]:
+        """Resolves an address object or group name to its subnets.
+
+        The tuple is shared: every call for the same name returns the same
+        immutable object, with no per-call copy.
+
+        Args:
+            name: The name of the address object or address group.
+
+        Returns:
+            A tuple of IP network strings (e.g., '192.168.1.0/24'). Returns an
+            empty tuple if the name cannot be resolved.
+        """
+        return self._address_index.get(name, ())
 
-    def resolve_address(self, name: str) -> list:
-        """Recursively resolves an address object or group name to a list of subnets.
+    def contains(self, name: str, ip: Union[str, int, ipaddress._BaseAddress]) -> bool:
+        """Checks whether an address object or group covers an IP address.
+
+        A binary search over the name's merged ranges (see
+        _build_address_ranges), instead of testing each subnet in turn.
 
         Args:
             name: The name of the address object or address group.
+            ip: An IP address string, ipaddress address object, or an int
+                (taken as IPv4).
 
         Returns:
-            A list of IP network strings (e.g., '192.168.1.0/24'). Returns an
-            empty list if the name cannot be resolved.
+            True if any subnet or IP range of the object/group contains the
+            IP. False for unknown names and other address types (FQDN,
+            geography...).
         """
-        if name in self.addresses:
-            return [self.addresses[name]['subnet']]
-        if name in self.addr_groups:
-            out = []
-            for m in self.addr_groups[name]:
-                out += self.resolve_address(m)
-            return out
-        return []
-
-    def resolve_service(self, name: str) -> list:
-        """Recursively resolves a service object or group name to a list of services.
+        if isinstance(ip, int):
+            version, value = 4, ip
+        else:
+            ip = ipaddress.ip_address(ip)
+            version, value = ip.version, int(ip)
+        ranges = self.address_ranges.get(name, {}).get(version)
+        if ranges is None:
+            return False
+        lows, highs = ranges
+        i = bisect_right(lows, value) - 1
+        return i >= 0 and value <= highs[i]
+
+    def resolve_service(self, name: str) -> tuple[str, ...]:
+        """Resolves a service object or group name to its services.
+
+        Like resolve_address, the returned tuple is shared between calls.
 
         Args:
             name: The name of the service object or service group.
 
         Returns:
-            A list of service strings (e.g., 'TCP/80'). Returns an empty list
-            if the name cannot be resolved.
+            A tuple of service strings (e.g., 'TCP/80'). Returns an empty
+            tuple if the name cannot be resolved.
         """
-        if name in self.services:
-            svc = self.services[name]
-            return [f"{svc['protocol']}/{svc['port']}"]
-        if name in self.svc_groups:
-            out = []
-            for m in self.svc_groups[name]:
-                out += self.resolve_service(m)
-            return out
-        return []
+        return self._service_index.get(name, ())
 
     def expand_policy(self, pol: dict) -> dict:
         """Expands a policy dictionary by resolving address/service objects and groups.
@@ -161,25 +526,43 @@ class ConfigModel:
         Adds 'src_subnets', 'dst_subnets', and 'services_expanded' keys with
         resolved values. Also adds 'poolname' if IP pooling is enabled.
 
+        Each policy dict is expanded on first use and cached (at most
+        len(self.policies) + _EXPANDED_POLICIES_SLACK entries, oldest dropped
+        first), so later calls only copy the cached result. finalize() empties
+        the cache; call it after editing a policy or the objects it references.
+
         Args:
             pol: The original policy dictionary.
 
         Returns:
             A new dictionary representing the expanded policy.
         """
+        cached = self._expanded_policies.get(id(pol))
+        if cached is None or cached[0] is not pol: # Missing, or a recycled id()
+            cached = (pol, self._expand_policy(pol))
+            cache = self._expanded_policies
+            cache.pop(id(pol), None) # Re-insert a recycled id() as the newest entry
+            while len(cache) >= len(self.policies) + self._EXPANDED_POLICIES_SLACK:
+                del cache[next(iter(cache))] # Evict oldest
+            cache[id(pol)] = cached
+        # Hand out a copy (lists included) so callers cannot alter the cached entry
+        ep = cached[1].copy()
+        for key in ('src_subnets', 'dst_subnets', 'services_expanded'):
+            ep[key] = list(ep[key])
+        return ep
+
+    def _expand_policy(self, pol: dict) -> dict:
+        """Uncached expand_policy."""
         ep = pol.copy()
-        ep['src_subnets'] = []
-        for a in pol['srcaddr']:
-            ep['src_subnets'] += self.resolve_address(a)
-        ep['dst_subnets'] = []
-        for a in pol['dstaddr']:
-            ep['dst_subnets'] += self.resolve_address(a)
-        ep['services_expanded'] = []
-        for s in pol['service']:
-            ep['services_expanded'] += self.resolve_service(s)
+        # Each field is built in one pass over the members' shared leaf tuples
+        resolve_address = self.resolve_address
+        flatten = chain.from_iterable
+        ep['src_subnets'] = list(flatten(map(resolve_address, pol['srcaddr'])))
+        ep['dst_subnets'] = list(flatten(map(resolve_address, pol['dstaddr'])))
+        ep['services_expanded'] = list(flatten(map(self.resolve_service, pol['service'])))
         # Add pool name if present
         # Check if ippool is enabled first
         if pol.get('ippool') == 'enable':
              ep['poolname'] = pol.get('poolname', 'N/A') # Add poolname if exists
 
-        return ep 
+        return ep
@@ -5,8 +5,12 @@ Generates network topology diagrams using Graphviz.
 """
 
 import ipaddress
+import subprocess
 import sys
+from collections import defaultdict
+from types import MappingProxyType
 from graphviz import Digraph
+from graphviz.quoting import quote, quote_edge
 # Import ConfigModel if needed for type hinting or direct access (adjust path as necessary)
 # from config_model import ConfigModel
 import logging # Add logging import
@@ -14,6 +18,36 @@ import logging # Add logging import
 # Setup basic logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
+# Shared default for missing list fields (e.g. policy_data.get('srcintf', _EMPTY))
+_EMPTY: tuple = ()
+
+# --- DOT statement formatting ---
+# Quoting is graphviz's own (the same functions Digraph.node()/edge() use), so
+# statements written straight into Digraph.body are identical to the API's.
+def _dot_attr_fragments(attrs):
+    """Returns {key: 'key=value'} DOT fragments for an attribute dict (label and None values left out)."""
+    return {k: f'{quote(k)}={quote(v)}' for k, v in attrs.items()
+            if k != 'label' and v is not None}
+
+def _dot_attr_list(attrs, base_fragments=None):
+    """Returns ' [label=... key=value ...]' for an attribute dict (label first, rest sorted).
+
+    `base_fragments` are pre-serialized attributes (see _dot_attr_fragments)
+    that `attrs` overrides; a None value in `attrs` drops the attribute.
+    """
+    fragments = dict(base_fragments) if base_fragments else {}
+    for k, v in attrs.items():
+        if k == 'label':
+            continue
+        if v is None:
+            fragments.pop(k, None)
+        else:
+            fragments[k] = f'{quote(k)}={quote(v)}'
+    label = attrs.get('label')
+    parts = [f'label={quote(label)}'] if label is not None else []
+    parts += [fragments[k] for k in sorted(fragments)]
+    return f" [{' '.join(parts)}]" if parts else ''
+
 # --- ConfigAuditor Class (New) ---
 class ConfigAuditor:
     """Performs analysis and auditing checks on the parsed configuration."""
@@ -269,6 +303,10 @@ class NetworkDiagramGenerator:
         self.address_groups_expanded = {}
         self.service_groups_expanded = {}
         self.processed_nodes = set()  # Track processed nodes to avoid duplicates
+        self._interface_to_node_id = {} # Interface name -> drawn node ID (zone-prefixed if inside a zone cluster)
+        self._net_cache = {} # Subnet/IP string -> parsed ipaddress network (None if invalid)
+        self._subnet_node_id_cache = {} # Subnet/IP string -> 'net_<compressed>' node ID (None if invalid)
+        self._subnet_label_cache = {} # Subnet string -> node label
 
         # Sets to track used objects (populated by analyze_relationships)
         self.used_addresses = set()
@@ -280,6 +318,7 @@ class NetworkDiagramGenerator:
         self.used_vips = set()
         self.used_ippools = set()
         self.used_routes = set() # Track used static routes (by generated ID)
+        self.used_policy_ids = set() # Track policies drawn as nodes (by policy ID)
         self.used_phase1 = set() # Track used VPN Phase 1 (by name)
         self.used_phase2 = set() # Track used VPN Phase 2 (by name)
         self.used_dhcp_servers = set() # Track used DHCP servers (by ID)
@@ -296,6 +335,8 @@ class NetworkDiagramGenerator:
         self.unused_routes = set()
         self.unused_phase1 = set()
         self.unused_phase2 = set()
+        # Unused report data from the last generate_diagram() (None if it failed)
+        self.unused_report_data = None
 
         # Relationship stats (populated by analyze_relationships)
         self.relationship_stats = {
@@ -472,42 +513,104 @@ class NetworkDiagramGenerator:
              'fontsize': '8'
         }
 
-    def _add_node(self, name, **attrs):
-        """Add a node idempotently with specified attributes and default styling."""
-        if name not in self.processed_nodes:
-            # Basic default styling for nodes if not overridden
-            default_attrs = {
-                'fontname': 'Helvetica',
-                'fontsize': '9',
-                'margin': '0.2',
-                'height': '0.4',
-                'width': '1.0' # Default width
-            }
-            # Merge provided attrs with defaults, provided attrs take precedence
-            final_attrs = {**default_attrs, **attrs}
-            self.graph.node(name, **final_attrs)
-            self.processed_nodes.add(name)
-
-    def _add_edge(self, src, dst, **attrs):
-        """Add an edge with specified attributes and default styling."""
-        # Apply default modern styling for edges
-        default_attrs = {
+        # Per-node/per-edge defaults applied by _add_node/_add_edge (caller attrs take precedence)
+        self._NODE_DEFAULTS = {
+            'fontname': 'Helvetica',
+            'fontsize': '9',
+            'margin': '0.2',
+            'height': '0.4',
+            'width': '1.0' # Default width
+        }
+        self._EDGE_DEFAULTS = {
             'fontname': 'Helvetica',
             'fontsize': '7',
             'arrowsize': '0.7',
             'penwidth': '0.8',
             'color': '#555555'
         }
-        # Merge provided attrs with defaults
-        final_attrs = {**default_attrs, **attrs}
+
+        # Styles never change after setup: freeze them and serialize each one
+        # (merged over the node defaults) to DOT fragments once, keyed by identity
+        node_styles = ('INTERFACE_STYLE', 'NETWORK_STYLE', 'POLICY_STYLE', 'ROUTE_STYLE', 'VIP_STYLE', 'ZONE_STYLE',
+                       'GROUP_STYLE', 'SERVICE_STYLE', 'POOL_STYLE', 'SD_WAN_STYLE', 'VPN_STYLE', 'ANY_STYLE')
+        self._NODE_STYLE_FRAGMENTS = {None: _dot_attr_fragments(self._NODE_DEFAULTS)}
+        for style_name in node_styles:
+            style = MappingProxyType(getattr(self, style_name))
+            setattr(self, style_name, style)
+            self._NODE_STYLE_FRAGMENTS[id(style)] = _dot_attr_fragments({**self._NODE_DEFAULTS, **style})
+        self._EDGE_FRAGMENTS = _dot_attr_fragments(self._EDGE_DEFAULTS)
+
+    def _add_node(self, name, *, node_style=None, **attrs):
+        """Add a node idempotently with specified attributes and default styling.
+
+        Args:
+            name: Node ID.
+            node_style: One of the *_STYLE presets; its attributes are pre-serialized.
+            attrs: Further DOT attributes (label, tooltip, style...), overriding the preset.
+        """
+        processed = self.processed_nodes
+        # One hash operation: add() grows the set only if the node is new
+        seen_before = len(processed)
+        processed.add(name)
+        if len(processed) == seen_before:
+            return
+        base_fragments = self._NODE_STYLE_FRAGMENTS.get(None if node_style is None else id(node_style))
+        if base_fragments is None: # Not one of the registered presets
+            base_fragments = _dot_attr_fragments({**self._NODE_DEFAULTS, **node_style})
+        # Write the DOT statement directly instead of going through Digraph.node()
+        self.graph.body.append(f"\t{quote(name)}{_dot_attr_list(attrs, base_fragments)}\n")
+
+    def _add_edge(self, src, dst, **attrs):
+        """Add an edge with specified attributes and default styling."""
+        # Provided attrs override the pre-serialized default edge styling
         # Ensure constraint=false edges don't affect ranking if specified
         # final_attrs['constraint'] = attrs.get('constraint', 'true') # Keep explicit constraint if provided
-        self.graph.edge(src, dst, **final_attrs)
+        # Write the DOT statement directly instead of going through Digraph.edge()
+        self.graph.body.append(f"\t{quote_edge(src)} -> {quote_edge(dst)}{_dot_attr_list(attrs, self._EDGE_FRAGMENTS)}\n")
+
+    def _parse_net(self, value):
+        """Cached ipaddress.ip_network(value, strict=False); raises ValueError if invalid."""
+        if type(value) is not str: # Unhashable/odd input: parse uncached
+            return ipaddress.ip_network(value, strict=False)
+        try:
+            net = self._net_cache[value]
+        except KeyError:
+            try:
+                net = ipaddress.ip_network(value, strict=False)
+            except ValueError:
+                net = None
+            self._net_cache[value] = net
+        if net is None:
+            raise ValueError(f"'{value}' does not appear to be an IPv4 or IPv6 network")
+        return net
+
+    def _subnet_node_id(self, value):
+        """Cached 'net_<network>' node ID for a subnet/IP string, or None if it isn't one."""
+        try:
+            return self._subnet_node_id_cache[value]
+        except (KeyError, TypeError):
+            pass
+        try:
+            node_id = f"net_{self._parse_net(value).compressed}"
+        except ValueError:
+            node_id = None
+        if type(value) is str: # Same rule as _parse_net: only strings are cached
+            self._subnet_node_id_cache[value] = node_id
+        return node_id
 
     def _get_subnet_label(self, subnet):
-        """Create a concise label for a subnet node."""
+        """Create a concise label for a subnet node (cached per subnet string)."""
+        label = self._subnet_label_cache.get(subnet) if type(subnet) is str else None
+        if label is None:
+            label = self._make_subnet_label(subnet)
+            if type(subnet) is str:
+                self._subnet_label_cache[subnet] = label
+        return label
+
+    def _make_subnet_label(self, subnet):
+        """Builds the _get_subnet_label label."""
         try:
-            net = ipaddress.ip_network(subnet, strict=False)
+            net = self._parse_net(subnet)
             return f"NET:\n{net.compressed}"
         except ValueError:
             # Print warning and return a placeholder label
@@ -518,56 +621,103 @@ class NetworkDiagramGenerator:
             return f"ADDR:\n{subnet}\n(Parse Error)"
 
     def _expand_address_group(self, group_name):
-        """Recursively expands address groups and adds nodes/edges."""
-        if group_name in self.address_groups_expanded:
-            return  # Already expanded
-
-        members = self.model.addr_groups.get(group_name, [])
-        self._add_node(group_name, label=f"GRP:\n{group_name}", tooltip=f"Address Group ({len(members)} members)", **self.GROUP_STYLE)
-        self.address_groups_expanded[group_name] = True
-
-        for member in members:
-            if member in self.model.addr_groups: # Nested group
-                self._expand_address_group(member) # Ensure nested group node exists
-                self._add_edge(group_name, member, arrowhead='empty', style='dashed', label='Group Member ->', color='#999999', penwidth='0.8') # Lighter/Thinner
-            elif member in self.model.addresses:
-                addr_obj = self.model.addresses[member]
-                label = self._get_subnet_label(addr_obj['subnet'])
+        """Expands an address group and its nested groups, adding nodes/edges."""
+        # Bound once; the callbacks below run for every group/member
+        addresses = self.model.addresses
+        add_node = self._add_node
+        add_member_edge = self._add_group_member_edge
+        get_subnet_label = self._get_subnet_label
+        group_style, network_style = self.GROUP_STYLE, self.NETWORK_STYLE
+
+        def draw_group(name, members):
+            add_node(name, label=f"GRP:\n{name}", tooltip=f"Address Group ({len(members)} members)", node_style=group_style)
+
+        def draw_member(name, member):
+            addr_obj = addresses.get(member)
+            if addr_obj is not None:
+                label = get_subnet_label(addr_obj['subnet'])
                 tooltip = f"Type: {addr_obj.get('type', 'N/A')}\nSubnet: {addr_obj.get('subnet', 'N/A')}\nComment: {addr_obj.get('comment', '')}"
-                self._add_node(member, label=label, tooltip=tooltip, **self.NETWORK_STYLE)
-                self._add_edge(group_name, member, arrowhead='empty', style='dashed', label='Group Member ->', color='#999999', penwidth='0.8') # Lighter/Thinner
+                add_node(member, label=label, tooltip=tooltip, node_style=network_style)
+                add_member_edge(name, member)
             else:
-                print(f"Warning: Address object '{member}' referenced in group '{group_name}' not found.", file=sys.stderr)
+                print(f"Warning: Address object '{member}' referenced in group '{name}' not found.", file=sys.stderr)
 
-    def _expand_service_group(self, group_name):
-        """Recursively expands service groups and adds nodes/edges."""
-        if group_name in self.service_groups_expanded:
-            return
-
-        members = self.model.svc_groups.get(group_name, [])
-        self._add_node(group_name, label=f"SVC GRP:\n{group_name}", tooltip=f"Service Group ({len(members)} members)", **self.GROUP_STYLE)
-        self.service_groups_expanded[group_name] = True
+        self._expand_group(group_name, self.model.addr_groups, self.address_groups_expanded, draw_group, draw_member)
 
-        for member in members:
-            if member in self.model.svc_groups: # Nested group
-                self._expand_service_group(member)
-                self._add_edge(group_name, member, arrowhead='empty', style='dashed', label='Group Member ->', color='#999999', penwidth='0.8') # Lighter/Thinner
-            elif member in self.model.services:
-                svc_obj = self.model.services[member]
+    def _expand_service_group(self, group_name):
+        """Expands a service group and its nested groups, adding nodes/edges."""
+        # Bound once; the callbacks below run for every group/member
+        services = self.model.services
+        add_node = self._add_node
+        add_member_edge = self._add_group_member_edge
+        group_style, service_style = self.GROUP_STYLE, self.SERVICE_STYLE
+
+        def draw_group(name, members):
+            add_node(name, label=f"SVC GRP:\n{name}", tooltip=f"Service Group ({len(members)} members)", node_style=group_style)
+
+        def draw_member(name, member):
+            svc_obj = services.get(member)
+            if svc_obj is not None:
                 proto = svc_obj.get('protocol','?')
                 port = svc_obj.get('port','any')
                 label = f"SVC:\n{member}\n{proto}/{port}"
                 tooltip = f"Protocol: {proto}\nPort(s): {port}\nComment: {svc_obj.get('comment', '')}"
-                self._add_node(member, label=label, tooltip=tooltip, **self.SERVICE_STYLE)
-                self._add_edge(group_name, member, arrowhead='empty', style='dashed', label='Group Member ->', color='#999999', penwidth='0.8') # Lighter/Thinner
+                add_node(member, label=label, tooltip=tooltip, node_style=service_style)
+                add_member_edge(name, member)
+            else:
+                print(f"Warning: Service object '{member}' referenced in group '{name}' not found.", file=sys.stderr)
+
+        self._expand_group(group_name, self.model.svc_groups, self.service_groups_expanded, draw_group, draw_member)
+
+    def _add_group_member_edge(self, group_name, member):
+        self._add_edge(group_name, member, arrowhead='empty', style='dashed', label='Group Member ->', color='#999999', penwidth='0.8') # Lighter/Thinner
+
+    def _expand_group(self, group_name, groups, expanded, draw_group, draw_member):
+        """Depth-first expansion of nested groups with an explicit stack (no recursion).
+
+        Emits nodes/edges in the same order as a recursive walk: a nested
+        group is fully expanded before the edge to it is added. `expanded`
+        is shared across calls, so a subgroup reached from several used
+        groups is drawn once.
+
+        Args:
+            group_name: Group to expand.
+            groups: The model's name -> members dict for this group type.
+            expanded: Dict of already expanded group names (updated in place).
+            draw_group: Callable(name, members) adding the group's node.
+            draw_member: Callable(group, member) handling a non-group member.
+        """
+        if group_name in expanded:
+            return  # Already expanded
+
+        def enter(name):
+            members = groups.get(name, [])
+            draw_group(name, members)
+            expanded[name] = True
+            return name, iter(members)
+
+        stack = [enter(group_name)]
+        while stack:
+            name, members = stack[-1]
+            for member in members:
+                if member not in groups:
+                    draw_member(name, member)
+                elif member in expanded: # Already drawn (or on the current path)
+                    self._add_group_member_edge(name, member)
+                else: # Expand the nested group first, then link to it
+                    stack.append(enter(member))
+                    break
             else:
-                print(f"Warning: Service object '{member}' referenced in group '{group_name}' not found.", file=sys.stderr)
+                stack.pop()
+                if stack:
+                    self._add_group_member_edge(stack[-1][0], name)
 
     def generate_zones(self):
         """Generate zone clusters and place interfaces inside them."""
         # Ensure all used interfaces are processed first (nodes created)
         self.generate_interfaces() # Creates nodes for interfaces not in zones
         
+        processed_nodes = self.processed_nodes
         for zone_name, zone_data in self.model.zones.items():
             if zone_name in self.used_zones:
                 zone_cluster_name = f'cluster_zone_{zone_name}'
@@ -592,61 +742,60 @@ class NetworkDiagramGenerator:
                             node_id = f"{zone_name}_{intf_name}" 
                             # Add node using the subgraph context
                             zone_cluster.node(node_id, label=label, tooltip=tooltip, **self.INTERFACE_STYLE)
-                            self.processed_nodes.add(node_id) # Track globally as well
+                            processed_nodes.add(node_id) # Track globally as well
+                            # The first zone node drawn for an interface is the one it resolves to
+                            if self._interface_to_node_id.get(intf_name, intf_name) == intf_name:
+                                self._interface_to_node_id[intf_name] = node_id
 
     def generate_address_objects(self):
         """Generate nodes for used address objects and groups."""
-        # Addresses used directly
-        for addr_name in self.used_addresses:
-            if addr_name not in self.processed_nodes:
-                 if addr_name in self.model.addresses:
-                     addr_obj = self.model.addresses[addr_name]
-                     label = self._get_subnet_label(addr_obj['subnet'])
-                     tooltip = f"Type: {addr_obj.get('type', 'N/A')}\nSubnet: {addr_obj.get('subnet', 'N/A')}\nComment: {addr_obj.get('comment', '')}"
-                     self._add_node(addr_name, label=label, tooltip=tooltip, **self.NETWORK_STYLE)
-                 # else: Warning should be printed during analysis if not found
-
-        # Address groups (expand recursively)
-        for grp_name in self.used_addr_groups:
-            if grp_name not in self.address_groups_expanded: # Only expand top-level used groups
-                self._expand_address_group(grp_name)
+        # Addresses used directly (the set difference skips already drawn nodes)
+        for addr_name in self.used_addresses - self.processed_nodes:
+            if addr_name in self.model.addresses:
+                addr_obj = self.model.addresses[addr_name]
+                label = self._get_subnet_label(addr_obj['subnet'])
+                tooltip = f"Type: {addr_obj.get('type', 'N/A')}\nSubnet: {addr_obj.get('subnet', 'N/A')}\nComment: {addr_obj.get('comment', '')}"
+                self._add_node(addr_name, label=label, tooltip=tooltip, node_style=self.NETWORK_STYLE)
+            # else: Warning should be printed during analysis if not found
+
+        # Address groups (expand recursively); groups already expanded as a
+        # subgroup of an earlier one are skipped again by _expand_group
+        for grp_name in self.used_addr_groups - self.address_groups_expanded.keys():
+            self._expand_address_group(grp_name)
 
 
     def generate_services(self):
         """Generate nodes for used service objects and groups."""
-        # Services used directly
-        for svc_name in self.used_services:
-            if svc_name not in self.processed_nodes:
-                 if svc_name in self.model.services:
-                     svc_obj = self.model.services[svc_name]
-                     proto = svc_obj.get('protocol','?')
-                     port = svc_obj.get('port','any')
-                     label = f"SVC:\n{svc_name}\n{proto}/{port}"
-                     tooltip = f"Protocol: {proto}\nPort(s): {port}\nComment: {svc_obj.get('comment', '')}"
-                     self._add_node(svc_name, label=label, tooltip=tooltip, **self.SERVICE_STYLE)
-                 # else: Warning should be printed during analysis if not found
+        # Services used directly (the set difference skips already drawn nodes)
+        for svc_name in self.used_services - self.processed_nodes:
+            if svc_name in self.model.services:
+                svc_obj = self.model.services[svc_name]
+                proto = svc_obj.get('protocol','?')
+                port = svc_obj.get('port','any')
+                label = f"SVC:\n{svc_name}\n{proto}/{port}"
+                tooltip = f"Protocol: {proto}\nPort(s): {port}\nComment: {svc_obj.get('comment', '')}"
+                self._add_node(svc_name, label=label, tooltip=tooltip, node_style=self.SERVICE_STYLE)
+            # else: Warning should be printed during analysis if not found
 
         # Service groups (expand recursively)
-        for grp_name in self.used_svc_groups:
-            if grp_name not in self.service_groups_expanded:
-                self._expand_service_group(grp_name)
+        for grp_name in self.used_svc_groups - self.service_groups_expanded.keys():
+            self._expand_service_group(grp_name)
 
     def generate_routes(self):
         """Generate nodes for used static routes visually near their interfaces."""
-        routes_by_interface = {}
+        routes_by_interface = defaultdict(list)
+        used_routes, used_interfaces = self.used_routes, self.used_interfaces
+        route_id = self.model.route_id
+        # Model order; only the used routes, by their generated ID (see ConfigModel.route_id)
         for route_data in self.model.routes:
-             # Generate a consistent ID for the route based on its properties
-             dst = route_data.get('dst', '')
+             route_name_or_id = route_id(route_data)
              dev = route_data.get('device', '')
-             gw = route_data.get('gateway', '')
-             # Use seq-num if available, otherwise construct ID. Ensure uniqueness.
-             route_name_or_id = route_data.get('name') or f"route_{dst}_{dev}_{gw}"
-             
-             if route_name_or_id in self.used_routes and dev in self.used_interfaces:
-                 if dev not in routes_by_interface:
-                     routes_by_interface[dev] = []
+             if route_name_or_id in used_routes and dev in used_interfaces:
                  routes_by_interface[dev].append((route_name_or_id, route_data))
 
+        add_node, add_edge = self._add_node, self._add_edge
+        connect_to_destination = self._connect_route_to_destination
+        route_style = self.ROUTE_STYLE
         for intf_name, routes in routes_by_interface.items():
             # Find the primary node ID for this interface (could be zone-prefixed)
             interface_node_id = self._find_interface_node_id(intf_name)
@@ -661,38 +810,38 @@ class NetworkDiagramGenerator:
                  label = f"ROUTE:\n{dst}\nvia {gw}"
                  tooltip = f"ID: {route_id}\nDevice: {intf_name}\nDistance: {route_data.get('distance')}\nComment: {route_data.get('comment')}"
                  
-                 self._add_node(route_id, label=label, tooltip=tooltip, **self.ROUTE_STYLE)
+                 add_node(route_id, label=label, tooltip=tooltip, node_style=route_style)
                  
                  # Connect route TO the interface
-                 self._add_edge(route_id, interface_node_id, label='Egresses Via Interface', style='bold', dir='forward') # Changed label & style
+                 add_edge(route_id, interface_node_id, label='Egresses Via Interface', style='bold', dir='forward') # Changed label & style
 
                  # Connect route to destination (if destination is a drawn node)
-                 self._connect_route_to_destination(route_id, dst)
+                 connect_to_destination(route_id, dst)
 
     def _connect_route_to_destination(self, route_id, destination_str):
         """Connects a route node to its destination if the destination is drawn."""
          # Resolve destination: check if it's an address object/group name first
-        if destination_str in self.model.addresses or destination_str in self.model.addr_groups:
+        model = self.model
+        processed_nodes = self.processed_nodes
+        if destination_str in model.addresses or destination_str in model.addr_groups:
              # If the object/group node exists (was used elsewhere), connect to it
-             if destination_str in self.processed_nodes:
+             if destination_str in processed_nodes:
                  self._add_edge(route_id, destination_str, label='Route Towards', style='bold,dashed', constraint='false') # Changed label & style
              # else: Dest object/group exists in config but wasn't used by a policy, so no node drawn.
              #       We could potentially draw it here if desired.
         else:
-             # Assume it's a subnet/IP
-             try:
-                 # Generate the standard node ID for this subnet
-                 net = ipaddress.ip_network(destination_str, strict=False)
-                 subnet_node_id = f"net_{net.compressed}"
+             # Assume it's a subnet/IP; generate the standard node ID for this subnet
+             subnet_node_id = self._subnet_node_id(destination_str)
+             if subnet_node_id is not None:
                  # If the subnet node exists (e.g., from a direct connection), connect to it
-                 if subnet_node_id in self.processed_nodes:
+                 if subnet_node_id in processed_nodes:
                      self._add_edge(route_id, subnet_node_id, label='Route Towards', style='bold,dashed', constraint='false') # Changed label & style
                  else:
                      # Subnet node doesn't exist. Create it now.
-                     subnet_label = f"NET:\n{net.compressed}"
-                     self._add_node(subnet_node_id, label=subnet_label, **self.NETWORK_STYLE)
+                     subnet_label = f"NET:\n{self._parse_net(destination_str).compressed}"
+                     self._add_node(subnet_node_id, label=subnet_label, node_style=self.NETWORK_STYLE)
                      self._add_edge(route_id, subnet_node_id, label='Route Towards', style='bold,dashed', constraint='false') # Changed label & style
-             except ValueError:
+             else:
                  print(f"Warning [Diagram]: Could not parse destination '{destination_str}' for route '{route_id}' as object or subnet.", file=sys.stderr)
 
     def generate_vips(self):
@@ -702,47 +851,42 @@ class NetworkDiagramGenerator:
         with self.graph.subgraph(name='cluster_vips') as vip_subgraph:
              vip_subgraph.attr(label='Virtual IPs', style='invis', fontname='Helvetica Bold', fontsize='11')
              
-             for vip_name in self.used_vips:
-                  if vip_name in self.model.vips:
-                      vip_data = self.model.vips[vip_name]
-                      extip = vip_data.get('extip', 'N/A')
-                      mapip_list = vip_data.get('mappedip', []) # Should be a list now
-                      mapip_str = ",".join(ip.get('range', '?') for ip in mapip_list) if mapip_list else 'N/A'
+             for vip_name in self.used_vips & self.model.vips.keys(): # Defined VIPs only
+                  vip_data = self.model.vips[vip_name]
+                  extip = vip_data.get('extip', 'N/A')
+                  mapip_list = vip_data.get('mappedip', []) # Should be a list now
+                  mapip_str = ",".join(ip.get('range', '?') for ip in mapip_list) if mapip_list else 'N/A'
                       
-                      portfwd_str = ""
-                      if vip_data.get('portforward') == 'enable':
-                          proto = vip_data.get('protocol','any')
-                          extport = vip_data.get('extport','any')
-                          mapport = vip_data.get('mappedport','any')
-                          portfwd_str = f"\n{proto}:{extport}->{mapport}"
+                  portfwd_str = ""
+                  if vip_data.get('portforward') == 'enable':
+                      proto = vip_data.get('protocol','any')
+                      extport = vip_data.get('extport','any')
+                      mapport = vip_data.get('mappedport','any')
+                      portfwd_str = f"\n{proto}:{extport}->{mapport}"
                       
-                      label = f"VIP: {vip_name}\n{extip} -> {mapip_str}{portfwd_str}"
-                      tooltip = f"Interface: {vip_data.get('interface', 'any')}\nComment: {vip_data.get('comment', '')}"
-                      self._add_node(vip_name, label=label, tooltip=tooltip, **self.VIP_STYLE)
-
-                      # Connect VIP to its mapped IP/address object if possible
-                      for mapped_ip_info in mapip_list:
-                          mapip = mapped_ip_info.get('range')
-                          if not mapip: continue
+                  label = f"VIP: {vip_name}\n{extip} -> {mapip_str}{portfwd_str}"
+                  tooltip = f"Interface: {vip_data.get('interface', 'any')}\nComment: {vip_data.get('comment', '')}"
+                  self._add_node(vip_name, label=label, tooltip=tooltip, node_style=self.VIP_STYLE)
+
+                  # Connect VIP to its mapped IP/address object if possible
+                  for mapped_ip_info in mapip_list:
+                      mapip = mapped_ip_info.get('range')
+                      if not mapip: continue
                           
-                          # Check if mapped IP string is an address object name
-                          if mapip in self.model.addresses:
-                              if mapip in self.processed_nodes:
-                                   self._add_edge(vip_name, mapip, label='VIP Maps To ->', style='dashed', constraint='false') # Changed label
-                          elif mapip in self.model.addr_groups:
-                              if mapip in self.processed_nodes:
-                                  self._add_edge(vip_name, mapip, label='VIP Maps To ->', style='dashed', constraint='false') # Changed label
-                          else:
-                              # Try adding as a network node if it looks like an IP/subnet
-                              try:
-                                   net = ipaddress.ip_network(mapip, strict=False)
-                                   subnet_node_id = f"net_{net.compressed}"
-                                   if subnet_node_id not in self.processed_nodes:
-                                       self._add_node(subnet_node_id, label=self._get_subnet_label(mapip), **self.NETWORK_STYLE)
-                                   self._add_edge(vip_name, subnet_node_id, label='VIP Maps To ->', style='dashed', constraint='false') # Changed label
-                              except ValueError:
-                                  # Error handled by the inner try/except for ipaddress.ip_network
-                                  pass
+                      # Check if mapped IP string is an address object name
+                      if mapip in self.model.addresses:
+                          if mapip in self.processed_nodes:
+                               self._add_edge(vip_name, mapip, label='VIP Maps To ->', style='dashed', constraint='false') # Changed label
+                      elif mapip in self.model.addr_groups:
+                          if mapip in self.processed_nodes:
+                              self._add_edge(vip_name, mapip, label='VIP Maps To ->', style='dashed', constraint='false') # Changed label
+                      else:
+                          # Try adding as a network node if it looks like an IP/subnet
+                          subnet_node_id = self._subnet_node_id(mapip)
+                          if subnet_node_id is not None: # Not an IP/subnet otherwise
+                               if subnet_node_id not in self.processed_nodes:
+                                   self._add_node(subnet_node_id, label=self._get_subnet_label(mapip), node_style=self.NETWORK_STYLE)
+                               self._add_edge(vip_name, subnet_node_id, label='VIP Maps To ->', style='dashed', constraint='false') # Changed label
 
              # TODO: VIP Groups - if needed, similar expansion logic
 
@@ -750,12 +894,11 @@ class NetworkDiagramGenerator:
         """Generate nodes for used IP Pool objects."""
         with self.graph.subgraph(name='cluster_ippools') as pool_subgraph:
              pool_subgraph.attr(label='IP Pools', style='invis', fontname='Helvetica Bold', fontsize='11')
-             for pool_name in self.used_ippools:
-                  if pool_name in self.model.ippools:
-                      pool_data = self.model.ippools[pool_name]
-                      label = f"POOL: {pool_name}\n{pool_data.get('startip', '?')} - {pool_data.get('endip', '?')}"
-                      tooltip = f"Type: {pool_data.get('type', 'N/A')}\nComment: {pool_data.get('comment', '')}"
-                      self._add_node(pool_name, label=label, tooltip=tooltip, **self.POOL_STYLE)
+             for pool_name in self.used_ippools & self.model.ippools.keys(): # Defined pools only
+                  pool_data = self.model.ippools[pool_name]
+                  label = f"POOL: {pool_name}\n{pool_data.get('startip', '?')} - {pool_data.get('endip', '?')}"
+                  tooltip = f"Type: {pool_data.get('type', 'N/A')}\nComment: {pool_data.get('comment', '')}"
+                  self._add_node(pool_name, label=label, tooltip=tooltip, node_style=self.POOL_STYLE)
 
     def _create_cluster(self, name, label):
         """Helper to create a styled subgraph cluster context."""
@@ -783,12 +926,11 @@ class NetworkDiagramGenerator:
         
     def _find_interface_node_id(self, intf_name):
         """Finds the correct graph node ID for an interface, considering zones."""
-        # Check if it's drawn inside a zone first
-        for zone_name in self.used_zones:
-            zone_intf_id = f"{zone_name}_{intf_name}"
-            if zone_intf_id in self.processed_nodes:
-                 return zone_intf_id
-        # If not in a zone, check if it exists as a top-level node
+        # Zone-prefixed node if drawn inside a zone, else the top-level node (see generate_zones/generate_interfaces)
+        node_id = self._interface_to_node_id.get(intf_name)
+        if node_id is not None:
+            return node_id
+        # Any other node drawn under the interface's name
         if intf_name in self.processed_nodes:
              return intf_name
         # Interface node wasn't found/drawn
@@ -807,21 +949,18 @@ class NetworkDiagramGenerator:
             if intf_name in self.used_interfaces and 'ip' in intf_data and '/' in intf_data['ip']:
                 interface_node_id = self._find_interface_node_id(intf_name)
                 if interface_node_id: # Ensure interface node exists
-                    try:
-                         iface = ipaddress.ip_interface(intf_data['ip'])
-                         if not isinstance(iface, (ipaddress.IPv4Interface, ipaddress.IPv6Interface)):
-                             raise ValueError("Parsed result is not an interface object")
-                         network = iface.network
-                         net_label = f"NET:\n{network.compressed}"
-                         net_node_id = f"net_{network.compressed}" # Unique ID for network node
-                         
+                    # Unique ID for network node (same network as ip_interface(...).network)
+                    net_node_id = self._subnet_node_id(intf_data['ip'])
+                    if net_node_id is not None:
                          # Add network node if it doesn't exist
                          if net_node_id not in self.processed_nodes:
-                             self._add_node(net_node_id, label=net_label, tooltip=f"Connected to {intf_name}", **self.NETWORK_STYLE)
+                             net_label = f"NET:\n{self._parse_net(intf_data['ip']).compressed}"
+                             self._add_node(net_node_id, label=net_label, tooltip=f"Connected to {intf_name}", node_style=self.NETWORK_STYLE)
                          # Add edge from interface to its network
                          self._add_edge(interface_node_id, net_node_id, arrowhead='none', style='bold')
-                    except ValueError as e:
-                         print(f"Warning [Diagram]: Could not parse IP for interface '{intf_name}' ('{intf_data['ip']}'): {e}", file=sys.stderr)
+                    else:
+                         print(f"Warning [Diagram]: Could not parse IP for interface '{intf_name}' ('{intf_data['ip']}'): "
+                               f"'{intf_data['ip']}' does not appear to be an IPv4 or IPv6 network", file=sys.stderr)
                     
         # 4. Add routes (visually connected to interfaces and destinations)
         #    This should happen after interfaces and potential destination networks are drawn.
@@ -838,34 +977,33 @@ class NetworkDiagramGenerator:
         # 3. Generate Firewall Policies (nodes only, connections handled separately)
         with self.graph.subgraph(name='cluster_policies') as policy_subgraph:
              policy_subgraph.attr(label='Firewall Policies', style='invis', fontname='Helvetica Bold', fontsize='11')
+             used_policy_ids, processed_nodes = self.used_policy_ids, self.processed_nodes
              for policy_data in self.model.policies:
-                 policy_id_num = policy_data['id']
+                 policy_id_num = policy_data.get('id')
+                 if policy_id_num not in used_policy_ids: # Only policies marked as used
+                     continue
                  policy_id = f"pol_{policy_id_num}"
-                 if policy_id in self.processed_nodes: # Only add if it was marked as used
+                 if policy_id in processed_nodes:
                      action = policy_data.get('action','N/A')
                      label = f"Policy {policy_id_num}\nAction: {action}"
                      # Build a comprehensive tooltip
-                     tooltip_parts = [
-                         f"ID: {policy_id_num}",
-                         f"Status: {policy_data.get('status','N/A')}",
-                         f"Action: {action}",
-                         f"Src Intf: {', '.join(policy_data.get('srcintf',[]))}",
-                         f"Dst Intf: {', '.join(policy_data.get('dstintf',[]))}",
-                         f"Src Addr: {', '.join(policy_data.get('srcaddr',[]))}",
-                         f"Dst Addr: {', '.join(policy_data.get('dstaddr',[]))}",
-                         f"Service: {', '.join(policy_data.get('service',[]))}",
-                     ]
+                     tooltip = (f"ID: {policy_id_num}\n"
+                                f"Status: {policy_data.get('status','N/A')}\n"
+                                f"Action: {action}\n"
+                                f"Src Intf: {', '.join(policy_data.get('srcintf', _EMPTY))}\n"
+                                f"Dst Intf: {', '.join(policy_data.get('dstintf', _EMPTY))}\n"
+                                f"Src Addr: {', '.join(policy_data.get('srcaddr', _EMPTY))}\n"
+                                f"Dst Addr: {', '.join(policy_data.get('dstaddr', _EMPTY))}\n"
+                                f"Service: {', '.join(policy_data.get('service', _EMPTY))}")
                      if policy_data.get('nat') == 'enable':
-                         nat_str = "NAT: Outgoing IF IP"
                          if policy_data.get('ippool') == 'enable':
-                             nat_str = f"NAT Pool: {policy_data.get('poolname', '-')}"
-                         tooltip_parts.append(nat_str)
+                             tooltip += f"\nNAT Pool: {policy_data.get('poolname', '-')}"
+                         else:
+                             tooltip += "\nNAT: Outgoing IF IP"
                      if policy_data.get('comments'):
-                         tooltip_parts.append(f"Comment: {policy_data['comments']}")
-                         
-                     tooltip = "\n".join(tooltip_parts)
+                         tooltip += f"\nComment: {policy_data['comments']}"
                      # Add policy node within the policy subgraph
-                     self._add_node(policy_id, label=label, tooltip=tooltip, **self.POLICY_STYLE)
+                     self._add_node(policy_id, label=label, tooltip=tooltip, node_style=self.POLICY_STYLE)
 
     def generate_nat_configuration(self):
         """Generate nodes and connections related to NAT (VIPs, IP Pools)."""
@@ -876,8 +1014,11 @@ class NetworkDiagramGenerator:
         self.generate_ip_pools()
         
         # 3. Connect policies to IP Pools if NAT pool is used
+        used_policy_ids = self.used_policy_ids
         for policy_data in self.model.policies:
-            policy_id_num = policy_data['id']
+            policy_id_num = policy_data.get('id')
+            if policy_id_num not in used_policy_ids:
+                continue
             policy_id = f"pol_{policy_id_num}"
             if policy_id in self.processed_nodes: # If policy node exists
                 if policy_data.get('ippool') == 'enable' and 'poolname' in policy_data:
@@ -963,7 +1104,7 @@ class NetworkDiagramGenerator:
                     tooltip = f"Phase 1: {tunnel_name}\\nLocal IF: {local_gw_intf}\\nRemote GW: {remote_gw}\\nProposal: {p1_data.get('proposal', '?')}"
                     
                     # Add Phase 1 node (representing the tunnel interface)
-                    self._add_node(tunnel_name, label=label, tooltip=tooltip, **self.VPN_STYLE)
+                    self._add_node(tunnel_name, label=label, tooltip=tooltip, node_style=self.VPN_STYLE)
                     # self.processed_nodes is updated by _add_node
                     
                     # Connect Phase 1 to its underlying local physical interface if used
@@ -1003,7 +1144,8 @@ class NetworkDiagramGenerator:
                     # Create it in the main graph.
                     label = f"INTF:\n{intf_name}\n{intf_data.get('ip', 'DHCP/Unset')}"
                     tooltip = intf_data.get('description', intf_name) # Use description for tooltip, fallback to name
-                    self._add_node(intf_name, label=label, tooltip=tooltip, **self.INTERFACE_STYLE)
+                    self._add_node(intf_name, label=label, tooltip=tooltip, node_style=self.INTERFACE_STYLE)
+                    self._interface_to_node_id.setdefault(intf_name, intf_name)
 
     def generate_policies(self):
         """Generate policy nodes and connect them to relevant elements."""
@@ -1106,7 +1248,7 @@ class NetworkDiagramGenerator:
             if addr_name.lower() == 'all' or addr_name.lower() == 'any':
                  target_node_id = "any_address"
                  if target_node_id not in self.processed_nodes:
-                      self._add_node(target_node_id, label="ANY", **self.ANY_STYLE)
+                      self._add_node(target_node_id, label="ANY", node_style=self.ANY_STYLE)
                  conn_color = any_color
                  current_label = f'Policy Dst: Any' if direction == 'dst' else 'Policy Src: Any'
             # Check if it's a VIP (only relevant for destination)
@@ -1154,7 +1296,7 @@ class NetworkDiagramGenerator:
             if svc_name.upper() == 'ALL' or svc_name.upper() == 'ANY':
                  target_node_id = "any_service"
                  if target_node_id not in self.processed_nodes:
-                      self._add_node(target_node_id, label="ANY Svc", **self.ANY_STYLE)
+                      self._add_node(target_node_id, label="ANY Svc", node_style=self.ANY_STYLE)
                  conn_color = any_color
                  current_label = 'Policy Allows: Any Svc'
             # Check if it's a used Service Object or Group
@@ -1193,10 +1335,12 @@ class NetworkDiagramGenerator:
         self.used_vips = set()
         self.used_ippools = set()
         self.used_routes = set()
+        self.used_policy_ids = set()
         self.used_phase1 = set()
         self.used_phase2 = set()
         self.used_dhcp_servers = set()
         self.processed_nodes = set() # Reset nodes intended for the final graph
+        self._interface_to_node_id = {}
         # Reset relationship counts
         self.relationship_stats = {k: {} for k in self.relationship_stats}
         
@@ -1268,6 +1412,7 @@ class NetworkDiagramGenerator:
             # Mark the policy node itself for drawing if it's enabled and references something specific
             if is_enabled and is_referenced:
                 self.processed_nodes.add(policy_id_node)
+                self.used_policy_ids.add(policy_id_num)
                 # Update relationship counts for summary
                 for endpoint in policy_endpoints: # Count refs per IF/Zone/Tunnel
                     self.relationship_stats['interface_policy_count'][endpoint] = self.relationship_stats['interface_policy_count'].get(endpoint, 0) + 1
@@ -1299,14 +1444,16 @@ class NetworkDiagramGenerator:
                  if dst_sel: self._add_used_address_recursive(dst_sel)
 
         # --- Identify interfaces used by Static Routes ---
+        used_interfaces = self.used_interfaces
+        used_routes = self.used_routes
+        route_id_of = self.model.route_id
         for route_data in self.model.routes:
              dev = route_data.get('device')
              # Only consider routes whose egress interface is used by policies/VPNs/etc.
-             if dev and dev in self.used_interfaces:
+             if dev and dev in used_interfaces:
                  dst = route_data.get('dst', '')
-                 gw = route_data.get('gateway', '')
-                 route_id = route_data.get('name') or f"route_{dst}_{dev}_{gw}"
-                 self.used_routes.add(route_id) 
+                 route_id = route_id_of(route_data)
+                 used_routes.add(route_id) 
                  # Mark the destination address/subnet as potentially used if it's an object/group
                  if dst:
                      self._add_used_address_recursive(dst)
@@ -1873,7 +2020,7 @@ class NetworkDiagramGenerator:
         """Check if an IP address string is within a subnet string."""
         try:
             ip = ipaddress.ip_address(ip_str)
-            subnet = ipaddress.ip_network(subnet_str, strict=False)
+            subnet = self._parse_net(subnet_str)
             return ip in subnet
         except ValueError as e:
             # Suppress printing errors here as this is often called speculatively
@@ -1881,68 +2028,6 @@ class NetworkDiagramGenerator:
              # Handle cases where subnet_str might be FQDN or invalid
              return False
 
-    def _resolve_address_object(self, name, visited=None):
-        """Recursively resolve an address object/group name to a list of network objects.
-           Returns list containing ipaddress.ip_network, ipaddress.ip_address, or str (for FQDN).
-           Handles cycles.
-        """
-        if visited is None: visited = set()
-        if name in visited: 
-            # print(f"DEBUG: Cycle detected resolving address object: {name}")
-            return [] # Cycle detected
-        visited.add(name)
-        
-        resolved = []
-        if name in self.model.addresses:
-            addr_data = self.model.addresses[name]
-            addr_type = addr_data.get('type')
-            subnet_val = addr_data.get('subnet')
-            if not subnet_val: 
-                 visited.remove(name)
-                 return []
-
-            if addr_type == 'ipmask':
-                try:
-                    resolved.append(ipaddress.ip_network(subnet_val, strict=False))
-                except ValueError:
-                     print(f"Warning [Resolve Addr]: Invalid IP/subnet format '{subnet_val}' in address object '{name}'.", file=sys.stderr)
-            elif addr_type == 'iprange':
-                 # Convert range to individual IPs or networks if possible (can be large!)
-                 # Simplification for trace: treat range start as representative? Or return range tuple?
-                 # For now, just try to parse start/end as IPs
-                 try:
-                     start_ip_str, end_ip_str = subnet_val.split('-')
-                     start_ip = ipaddress.ip_address(start_ip_str.strip())
-                     end_ip = ipaddress.ip_address(end_ip_str.strip())
-                     # Return start/end tuple to represent range for policy check?
-                     # For routing check, maybe just the start IP?
-                     resolved.append((start_ip, end_ip)) # Represent range as tuple for policy check
-                 except ValueError:
-                      # Improved error message for range parsing
-                      print(f"Warning [Resolve Addr]: Invalid IP range format '{subnet_val}' in address object '{name}'. Expected 'start_ip-end_ip'.", file=sys.stderr)
-            elif addr_type == 'fqdn':
-                 resolved.append(subnet_val) # Keep FQDN as string
-            elif addr_type == 'wildcard': # Very difficult to resolve for path tracing
-                 print(f"Warning: Wildcard address object '{name}' ({subnet_val}) not supported for path tracing.", file=sys.stderr)
-            # TODO: Add other types like geography, dynamic etc. if needed
-            
-        elif name in self.model.addr_groups:
-            for member in self.model.addr_groups[name]:
-                resolved.extend(self._resolve_address_object(member, visited.copy()))
-        else:
-             # Maybe it's a direct IP or subnet string? Try parsing.
-             try:
-                  resolved.append(ipaddress.ip_network(name, strict=False))
-             except ValueError:
-                  # Not an address object, group, or valid IP/subnet string
-                  # Could be an FQDN implicitly, or just not found. 
-                  # Let policy check handle FQDNs if necessary.
-                  # print(f"Debug: Address '{name}' not found in objects/groups and not valid IP/subnet.")
-                  pass 
-        
-        visited.remove(name) # Backtrack
-        return resolved
-        
     def _resolve_service_object(self, name, visited=None):
         """Recursively resolve a service object/group to a list of (protocol, port_start, port_end) tuples.
            Port range uses start/end, single port has start=end.
@@ -2036,7 +2121,7 @@ class NetworkDiagramGenerator:
             # Check primary IP
             if 'ip' in intf_data and '/' in intf_data['ip']:
                 try:
-                    iface_network = ipaddress.ip_network(intf_data['ip'], strict=False)
+                    iface_network = self._parse_net(intf_data['ip'])
                     if source_ip in iface_network:
                         if iface_network.prefixlen > longest_prefix:
                             longest_prefix = iface_network.prefixlen
@@ -2054,7 +2139,7 @@ class NetworkDiagramGenerator:
                      sec_ip_str = sec_ip_data.get('ip') # Assuming format {'ip': '1.1.1.1/24', ...}
                      if sec_ip_str and '/' in sec_ip_str:
                          try:
-                             sec_network = ipaddress.ip_network(sec_ip_str, strict=False)
+                             sec_network = self._parse_net(sec_ip_str)
                              if source_ip in sec_network:
                                  if sec_network.prefixlen > longest_prefix:
                                      longest_prefix = sec_network.prefixlen
@@ -2092,7 +2177,7 @@ class NetworkDiagramGenerator:
             if not dst_subnet_str: continue
             
             try:
-                route_network = ipaddress.ip_network(dst_subnet_str, strict=False)
+                route_network = self._parse_net(dst_subnet_str)
                 if dest_ip in route_network:
                     prefixlen = route_network.prefixlen
                     distance = int(route.get('distance', 10)) # Default static distance
@@ -2119,7 +2204,7 @@ class NetworkDiagramGenerator:
             # Check primary IP
             if 'ip' in intf_data and '/' in intf_data['ip']:
                 try:
-                    iface_network = ipaddress.ip_network(intf_data['ip'], strict=False)
+                    iface_network = self._parse_net(intf_data['ip'])
                     if dest_ip in iface_network:
                         prefixlen = iface_network.prefixlen
                         # Compare with current best match (static or previous connected)
@@ -2140,7 +2225,7 @@ class NetworkDiagramGenerator:
                      sec_ip_str = sec_ip_data.get('ip')
                      if sec_ip_str and '/' in sec_ip_str:
                          try:
-                             sec_network = ipaddress.ip_network(sec_ip_str, strict=False)
+                             sec_network = self._parse_net(sec_ip_str)
                              if dest_ip in sec_network:
                                  prefixlen = sec_network.prefixlen
                                  if prefixlen > longest_prefix:
@@ -2298,21 +2383,20 @@ class NetworkDiagramGenerator:
         """Check if check_ip matches any resolved address in policy_addrs."""
         if not policy_addrs: return False # Or True if empty means 'all'? Assume False.
         
+        # Objects and groups are matched against the model's merged range index
+        contains = self.model.contains
         for addr_name in policy_addrs:
             if addr_name.lower() in ['all', 'any']:
                 return True
-            resolved_items = self._resolve_address_object(addr_name)
-            for item in resolved_items:
-                 if isinstance(item, (ipaddress.IPv4Network, ipaddress.IPv6Network)):
-                     if check_ip in item:
-                         return True
-                 elif isinstance(item, tuple) and len(item) == 2: # IP Range (start_ip, end_ip)
-                      start_ip, end_ip = item
-                      if start_ip <= check_ip <= end_ip:
-                           return True
-                 elif isinstance(item, str): # FQDN - cannot resolve/match in trace
-                      # print(f"Debug Addr Check: Skipping FQDN '{item}'")
-                      pass 
+            if contains(addr_name, check_ip):
+                return True
+            if addr_name not in self.model.addresses and addr_name not in self.model.addr_groups:
+                # Not an object or group: may be a literal IP/subnet
+                try:
+                    if check_ip in self._parse_net(addr_name):
+                        return True
+                except ValueError:
+                    pass
         return False
 
     def _check_service_match(self, policy_svcs, check_proto, check_port, check_icmp_type, check_icmp_code):
@@ -2440,7 +2524,7 @@ class NetworkDiagramGenerator:
                                       vip_data = current_vip_data
                                       break
                              else: # Single IP or Subnet
-                                 vip_ext_net = ipaddress.ip_network(vip_extip_str, strict=False)
+                                 vip_ext_net = self._parse_net(vip_extip_str)
                                  if check_dst_ip_obj in vip_ext_net:
                                       matched_vip_name = addr_name
                                       vip_data = current_vip_data
@@ -2459,7 +2543,7 @@ class NetworkDiagramGenerator:
                 if mapped_ip_str:
                     try:
                         # Try parsing as network first (most common for single IP map)
-                        mapped_net = ipaddress.ip_network(mapped_ip_str, strict=False)
+                        mapped_net = self._parse_net(mapped_ip_str)
                         # Use the network address if /32, else maybe first usable? Use network address for simplicity.
                         potential_new_dst_ip = str(mapped_net.network_address if mapped_net.prefixlen == 32 else mapped_net.network_address) 
                         # If it's a real range, might need refinement
@@ -2554,6 +2638,11 @@ class NetworkDiagramGenerator:
         print(f"Initial Packet: {current_src_ip} -> {current_dst_ip}:{current_dst_port} (proto: {current_proto})")
         print(f"Max Hops: {max_hops}")
         print("-"*25)
+        # Address groups on a membership cycle match on every member of the cycle
+        cyclic_groups = self.model.group_cycles('addr_groups')
+        if cyclic_groups:
+            print(f"Warning [Trace]: Membership cycle in address groups: {', '.join(sorted(cyclic_groups))}. "
+                  "Each group in a cycle matches the whole cycle's members.", file=sys.stderr)
 
         # --- 1. Find Ingress Interface --- 
         ingress_intf, msg = self._find_source_interface(current_src_ip)
@@ -2648,7 +2737,7 @@ class NetworkDiagramGenerator:
                  # Check primary IP subnet
                  if 'ip' in intf_data and '/' in intf_data['ip']:
                      try:
-                         egress_net = ipaddress.ip_network(intf_data['ip'], strict=False)
+                         egress_net = self._parse_net(intf_data['ip'])
                          if ipaddress.ip_address(current_dst_ip) in egress_net:
                              is_connected_on_egress = True
                      except ValueError:
@@ -2660,7 +2749,7 @@ class NetworkDiagramGenerator:
                           sec_ip_str = sec_ip_data.get('ip')
                           if sec_ip_str and '/' in sec_ip_str:
                                try:
-                                   sec_net = ipaddress.ip_network(sec_ip_str, strict=False)
+                                   sec_net = self._parse_net(sec_ip_str)
                                    if ipaddress.ip_address(current_dst_ip) in sec_net:
                                        is_connected_on_egress = True
                                        break
@@ -2767,7 +2856,7 @@ class NetworkDiagramGenerator:
             network_info = "(No direct subnet found)"
             if 'ip' in intf_data and '/' in intf_data['ip']:
                  try:
-                     network = ipaddress.ip_network(intf_data['ip'], strict=False)
+                     network = self._parse_net(intf_data['ip'])
                      network_info = f"Network: {network.with_netmask}"
                  except ValueError as e:
                      network_info = "(Invalid IP format)"
@@ -2913,6 +3002,30 @@ class NetworkDiagramGenerator:
                 #     edge_legend.edge(edge_node_ids[i+1], edge_node_ids[i+2], style='invis') # Link end of one pair to start of next
 
 
+    def _render_with_dot(self, output_path, fmt='png'):
+        """Renders the graph by piping its DOT source straight into Graphviz `dot`.
+
+        Unlike Digraph.render(), no intermediate .gv file is written and removed.
+
+        Args:
+            output_path: The output path without extension.
+            fmt: Graphviz output format (e.g. 'png', 'svg').
+
+        Returns:
+            The path of the rendered file.
+
+        Raises:
+            FileNotFoundError: If the `dot` executable is not on the PATH.
+            subprocess.CalledProcessError: If `dot` exits with an error.
+        """
+        rendered_path = f"{output_path}.{fmt}"
+        cmd = ['dot', f'-T{fmt}', '-o', rendered_path]
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        _, stderr = proc.communicate(self.graph.source.encode('utf-8'))
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=stderr)
+        return rendered_path
+
     def generate_diagram(self, output_file='network_topology'):
         """Generates the final network diagram focusing on used objects and relationships."""
         print("Generating network diagram...")
@@ -2943,7 +3056,7 @@ class NetworkDiagramGenerator:
         print(f"Attempting to render diagram to {output_path}.[png|svg]...")
         try:
             # Render PNG first as it's more likely to be displayable in Streamlit
-            png_filename = self.graph.render(output_path, format='png', view=False, cleanup=True)
+            png_filename = self._render_with_dot(output_path, fmt='png')
             print(f"Successfully generated PNG diagram: {png_filename}")
             rendered_file_path = png_filename # Return the PNG path
 
@@ -2971,10 +3084,16 @@ class NetworkDiagramGenerator:
                  logging.error(f"Error saving DOT source file: {dot_e}", exc_info=True)
             rendered_file_path = None # Ensure None is returned on failure
 
-        # 5. Generate the unused objects report (get data and write file)
-        # The function now returns the data, but we still call it to write the file
-        self.generate_unused_report(output_file)
-        
+        # 5. Generate the unused objects report (get data and write file).
+        # Guarded so a report failure can't discard the render result;
+        # callers fall back to generate_unused_report() when this is None.
+        self.unused_report_data = None
+        try:
+            self.unused_report_data = self.generate_unused_report(output_file)
+        except Exception as e:
+            print(f"Error generating unused objects report: {e}", file=sys.stderr)
+            logging.error(f"Error generating unused objects report: {e}", exc_info=True)
+
         # 6. Generate and print the relationship summary (Now handled in app.py)
         # summary = self.generate_relationship_summary()
         # print("\\n" + summary) # This line caused the TypeError
@@ -84,6 +84,8 @@ def compare_config_section(section1, section2, section_name, id_key='name'):
             # Check if both values are dicts before calling compare_objects
             val1 = section1[key]
             val2 = section2[key]
+            if val1 == val2:
+                continue # Identical (the common case) - skip the per-field comparison
             if isinstance(val1, dict) and isinstance(val2, dict):
                 diff = compare_objects(val1, val2)
                 if diff:
@@ -110,6 +112,8 @@ def compare_config_section(section1, section2, section_name, id_key='name'):
             results['deleted'].append(map1[key])
 
         for key in common_keys:
+            if map1[key] == map2[key]:
+                continue # Identical (the common case) - skip the per-field comparison
             # Use a unique identifier from the object itself if possible
             identifier = map1[key].get(id_key, f"item_{key}") # Fallback if key isn't in object
             diff = compare_objects(map1[key], map2[key])
@@ -134,56 +138,57 @@ def compare_config_section(section1, section2, section_name, id_key='name'):
         return None
 
 
-def compare_models(model1: ConfigModel, model2: ConfigModel):
-    """Compares two ConfigModel instances and returns a dictionary of differences.
+# --- Define sections and their primary identifier keys ---
+# Format: { 'attribute_name_in_model': ('Display Name', 'id_key') }
+SECTIONS_TO_COMPARE = {
+    'interfaces':       ('System Interfaces', 'name'),
+    'zones':            ('Firewall Zones', 'name'),
+    'routes':           ('Static Routes', 'name'), # Uses 'name' derived from seq-num in parser
+    'policies':         ('Firewall Policies', 'id'),
+    'addresses':        ('Address Objects', 'name'),
+    'addr_groups':      ('Address Groups', 'name'),
+    'services':         ('Custom Services', 'name'),
+    'svc_groups':       ('Service Groups', 'name'),
+    'vips':             ('Virtual IPs (VIPs)', 'name'),
+    'vip_groups':       ('VIP Groups', 'name'),
+    'ippools':          ('IP Pools', 'name'),
+    'dhcp_servers':     ('DHCP Servers', 'id'),
+    'admins':           ('Administrators', 'name'),
+    'phase1':           ('VPN Phase 1', 'name'),
+    'phase2':           ('VPN Phase 2', 'name'),
+    # System settings (often single dicts, compare as one modified item)
+    'dns':              ('System DNS', None), # Treat as single settings block
+    'ntp':              ('System NTP', None),
+    'ha':               ('System HA', None),
+    'system_global':    ('System Global', None),
+    'fortiguard':       ('System FortiGuard', None),
+    # Security Profiles
+    'antivirus':        ('Antivirus Profiles', 'name'),
+    'ips':              ('IPS Sensors', 'name'),
+    'web_filter':       ('Web Filter Profiles', 'name'),
+    'app_control':      ('Application Control Profiles', 'name'),
+    'ssl_inspection':   ('SSL Inspection Profiles', 'name'),
+    # Add other sections as needed...
+    'radius_servers':   ('RADIUS Servers', 'name'),
+    'ldap_servers':     ('LDAP Servers', 'name'),
+    'policy_routes':    ('Policy Routes', 'id'),
+}
+
+def iter_model_diffs(model1: ConfigModel, model2: ConfigModel):
+    """Yields the differences between two ConfigModel instances one section at a time.
+
+    Sections are compared lazily in SECTIONS_TO_COMPARE order, so a consumer
+    can format or discard each section's diff before the next is computed.
 
     Args:
         model1: The first ConfigModel instance (e.g., 'old').
         model2: The second ConfigModel instance (e.g., 'new').
 
-    Returns:
-        A dictionary where keys are section names and values describe
-        the differences found ('added', 'deleted', 'modified').
+    Yields:
+        (section display name, diff) tuples for sections that differ, where
+        diff describes the changes found ('added', 'deleted', 'modified').
     """
-    diff_results = {}
-
-    # --- Define sections and their primary identifier keys ---
-    # Format: { 'attribute_name_in_model': ('Display Name', 'id_key') }
-    sections_to_compare = {
-        'interfaces':       ('System Interfaces', 'name'),
-        'zones':            ('Firewall Zones', 'name'),
-        'routes':           ('Static Routes', 'name'), # Uses 'name' derived from seq-num in parser
-        'policies':         ('Firewall Policies', 'id'),
-        'addresses':        ('Address Objects', 'name'),
-        'addr_groups':      ('Address Groups', 'name'),
-        'services':         ('Custom Services', 'name'),
-        'svc_groups':       ('Service Groups', 'name'),
-        'vips':             ('Virtual IPs (VIPs)', 'name'),
-        'vip_groups':       ('VIP Groups', 'name'),
-        'ippools':          ('IP Pools', 'name'),
-        'dhcp_servers':     ('DHCP Servers', 'id'),
-        'admins':           ('Administrators', 'name'),
-        'phase1':           ('VPN Phase 1', 'name'),
-        'phase2':           ('VPN Phase 2', 'name'),
-        # System settings (often single dicts, compare as one modified item)
-        'dns':              ('System DNS', None), # Treat as single settings block
-        'ntp':              ('System NTP', None),
-        'ha':               ('System HA', None),
-        'system_global':    ('System Global', None),
-        'fortiguard':       ('System FortiGuard', None),
-        # Security Profiles
-        'antivirus':        ('Antivirus Profiles', 'name'),
-        'ips':              ('IPS Sensors', 'name'),
-        'web_filter':       ('Web Filter Profiles', 'name'),
-        'app_control':      ('Application Control Profiles', 'name'),
-        'ssl_inspection':   ('SSL Inspection Profiles', 'name'),
-        # Add other sections as needed...
-        'radius_servers':   ('RADIUS Servers', 'name'),
-        'ldap_servers':     ('LDAP Servers', 'name'),
-        'policy_routes':    ('Policy Routes', 'id'),
-    }
-
-    for attr_name, (display_name, id_key) in sections_to_compare.items():
+    for attr_name, (display_name, id_key) in SECTIONS_TO_COMPARE.items():
         section1 = getattr(model1, attr_name, None)
         section2 = getattr(model2, attr_name, None)
 
@@ -192,11 +197,15 @@ def compare_models(model1: ConfigModel, model2: ConfigModel):
             continue # Skip if section doesn't exist in either model
         elif section1 is None:
             # Entire section added
-            diff_results[display_name] = {'added': list(section2.values()) if isinstance(section2, dict) else section2, 'deleted': [], 'modified': {}}
+            yield display_name, {'added': list(section2.values()) if isinstance(section2, dict) else section2, 'deleted': [], 'modified': {}}
             continue
         elif section2 is None:
             # Entire section deleted
-            diff_results[display_name] = {'deleted': list(section1.values()) if isinstance(section1, dict) else section1, 'added': [], 'modified': {}}
+            yield display_name, {'deleted': list(section1.values()) if isinstance(section1, dict) else section1, 'added': [], 'modified': {}}
+            continue
+
+        # Whole section unchanged: a single C-level equality check avoids walking every item
+        if section1 == section2:
             continue
 
         # Special handling for single setting dictionaries
@@ -204,17 +213,28 @@ def compare_models(model1: ConfigModel, model2: ConfigModel):
             if isinstance(section1, dict) and isinstance(section2, dict):
                 diff = compare_objects(section1, section2)
                 if diff:
-                    diff_results[display_name] = {'added': [], 'deleted': [], 'modified': {'Settings': diff}}
+                    yield display_name, {'added': [], 'deleted': [], 'modified': {'Settings': diff}}
             elif section1 != section2: # If not dicts, basic comparison
-                 diff_results[display_name] = {'added': [], 'deleted': [], 'modified': {'Value': {'old': section1, 'new': section2}}}
+                 yield display_name, {'added': [], 'deleted': [], 'modified': {'Value': {'old': section1, 'new': section2}}}
         else:
             section_diff = compare_config_section(section1, section2, display_name, id_key)
             if section_diff:
-                diff_results[display_name] = section_diff
+                yield display_name, section_diff
 
     # TODO: Compare VDOMs if present model1.has_vdoms or model2.has_vdoms
 
-    return diff_results
+def compare_models(model1: ConfigModel, model2: ConfigModel):
+    """Compares two ConfigModel instances and returns a dictionary of differences.
+
+    Args:
+        model1: The first ConfigModel instance (e.g., 'old').
+        model2: The second ConfigModel instance (e.g., 'new').
+
+    Returns:
+        A dictionary where keys are section names and values describe
+        the differences found ('added', 'deleted', 'modified').
+    """
+    return dict(iter_model_diffs(model1, model2))
 
 def format_value(value):
     """Formats a value for display in the diff output."""
@@ -60,7 +60,11 @@ class FortiParser:
 
     # ADDED debug flag
     def __init__(self, lines, debug=False):
-        self.lines = lines
+        # Accept any iterable of lines (list, open file, TextIOWrapper...). The block readers
+        # peek ahead and rewind by index, so the input is materialized once here. Lines are
+        # stored stripped (every reader strips anyway), so a streamed file's indentation and
+        # newlines are never held in memory.
+        self.lines = [line.strip() for line in lines]
         self.i     = 0
         self.debug = debug # Store debug flag
         self.current_vdom = None # Initialize current VDOM tracking
@@ -68,6 +72,11 @@ class FortiParser:
         self.model.has_vdoms = False # Initialize VDOM flag
         self.fortios_version_found = False # Track if version line was found
 
+    @staticmethod
+    def _line_keyword(line):
+        """Returns the lowercased command word of a stripped line ('set', 'edit', ...), or ''."""
+        return line.split(None, 1)[0].lower() if line else ''
+
     # --- Helper to convert Mask to Prefix ---
     def _mask_to_prefix(self, mask_str):
         """Converts a netmask string (e.g., 255.255.255.0) to prefix length (e.g., 24)."""
@@ -245,7 +254,7 @@ class FortiParser:
             print(f"Detected FortiOS Version: {self.model.fortios_version}")
         else:
              print(f"Final Check: FortiOS Version not detected.")
-             
+
         if self.debug: print("*** FortiParser END ***") # DEBUG
         return self.model
 
@@ -436,6 +445,7 @@ class FortiParser:
 
             while self.i < len(self.lines):
                 line = self.lines[self.i].strip()
+                keyword = self._line_keyword(line) # Only the regex for this command is tried
                 original_line_index = self.i # Track line for error messages
                 if self.debug: print(f"    [L{self.i+1}, Lvl {nesting_level}] Read: {line}")
                 current_item_id = current_item.get('id', current_item.get('name', 'None')) if current_item else 'None'
@@ -483,12 +493,12 @@ class FortiParser:
                      # self.i was advanced by recursive call, so continue main loop
                      continue 
 
-                m_edit = self.EDIT_RE.match(line)
-                m_set = self.SET_RE.match(line)
-                m_append = self.APPEND_RE.match(line)
-                m_unset = self.UNSET_RE.match(line)
-                m_next = self.NEXT_RE.match(line)
-                m_end = self.END_RE.match(line)
+                m_edit = self.EDIT_RE.match(line) if keyword == 'edit' else None
+                m_set = self.SET_RE.match(line) if keyword == 'set' else None
+                m_append = self.APPEND_RE.match(line) if keyword == 'append' else None
+                m_unset = self.UNSET_RE.match(line) if keyword == 'unset' else None
+                m_next = self.NEXT_RE.match(line) if keyword == 'next' else None
+                m_end = self.END_RE.match(line) if keyword == 'end' else None
 
                 if m_edit:
                     if current_item is not None:
@@ -565,6 +575,7 @@ class FortiParser:
 
             while self.i < len(self.lines):
                 line = self.lines[self.i].strip()
+                keyword = self._line_keyword(line) # Only the regex for this command is tried
                 original_line_index = self.i # Track line for error messages
                 if self.debug: print(f"    [L{self.i+1}, Lvl {nesting_level}] Read: {line}")
 
@@ -606,10 +617,10 @@ class FortiParser:
                      # self.i was advanced by recursive call, so continue main loop
                      continue 
 
-                m_set = self.SET_RE.match(line)
-                m_append = self.APPEND_RE.match(line)
-                m_unset = self.UNSET_RE.match(line)
-                m_end = self.END_RE.match(line)
+                m_set = self.SET_RE.match(line) if keyword == 'set' else None
+                m_append = self.APPEND_RE.match(line) if keyword == 'append' else None
+                m_unset = self.UNSET_RE.match(line) if keyword == 'unset' else None
+                m_end = self.END_RE.match(line) if keyword == 'end' else None
 
                 if m_set:
                     key = m_set.group(1).replace('-', '_') # Normalize key
@@ -676,6 +687,7 @@ class FortiParser:
 
         while self.i < len(self.lines):
             line = self.lines[self.i].strip()
+            keyword = self._line_keyword(line) # Only the regex for this command is tried
             original_line_index = self.i
             
             # Get current context from stack top
@@ -766,7 +778,7 @@ class FortiParser:
                      self.i += 1; continue
 
             # Handle 'edit' command (Only valid in list contexts)
-            m_edit = self.EDIT_RE.match(line)
+            m_edit = self.EDIT_RE.match(line) if keyword == 'edit' else None
             if m_edit:
                 if context_type in ['list_item', 'nested_list']:
                      # Finalize the previous item being built in this list context
@@ -787,7 +799,7 @@ class FortiParser:
                 self.i += 1; continue
 
             # Handle 'set' command
-            m_set = self.SET_RE.match(line)
+            m_set = self.SET_RE.match(line) if keyword == 'set' else None
             if m_set:
                 if isinstance(target_dict_for_set, dict):
                     key = m_set.group(1).replace('-', '_')
@@ -802,7 +814,7 @@ class FortiParser:
                 self.i += 1; continue
 
             # Handle 'append' command
-            m_append = self.APPEND_RE.match(line)
+            m_append = self.APPEND_RE.match(line) if keyword == 'append' else None
             if m_append:
                 if isinstance(target_dict_for_set, dict):
                      key = m_append.group(1).replace('-', '_'); raw_val = m_append.group(2).strip()
@@ -817,7 +829,7 @@ class FortiParser:
                 self.i += 1; continue
 
             # Handle 'unset' command
-            m_unset = self.UNSET_RE.match(line)
+            m_unset = self.UNSET_RE.match(line) if keyword == 'unset' else None
             if m_unset:
                  if isinstance(target_dict_for_set, dict):
                      key = m_unset.group(1).replace('-', '_')
@@ -828,7 +840,7 @@ class FortiParser:
                  self.i += 1; continue
 
             # Handle 'next' command (Only valid in list contexts)
-            m_next = self.NEXT_RE.match(line)
+            m_next = self.NEXT_RE.match(line) if keyword == 'next' else None
             if m_next:
                  if context_type in ['list_item', 'nested_list']:
                      # Finalize the current item and add it to the list in the context data
@@ -845,7 +857,7 @@ class FortiParser:
                  self.i += 1; continue
 
             # Handle 'end' command
-            m_end = self.END_RE.match(line)
+            m_end = self.END_RE.match(line) if keyword == 'end' else None
             if m_end:
                 # Finalize the last item if we are ending a list context
                 if context_type in ['list_item', 'nested_list']:
@@ -902,6 +914,7 @@ class FortiParser:
 
         while self.i < len(self.lines):
             line = self.lines[self.i].strip()
+            keyword = self._line_keyword(line) # Only the regex for this command is tried
             original_line_index = self.i
             
             if not stack: # Should not happen
@@ -975,7 +988,7 @@ class FortiParser:
                      self.i += 1; continue
 
             # Handle 'edit' (Only valid if inside a 'nested_list' context)
-            m_edit = self.EDIT_RE.match(line)
+            m_edit = self.EDIT_RE.match(line) if keyword == 'edit' else None
             if m_edit:
                  if context_type == 'nested_list':
                      list_to_append_to = current_context['data']
@@ -993,7 +1006,7 @@ class FortiParser:
                  self.i += 1; continue
 
             # Handle 'set' command
-            m_set = self.SET_RE.match(line)
+            m_set = self.SET_RE.match(line) if keyword == 'set' else None
             if m_set:
                  if isinstance(target_dict_for_set, dict):
                      key = m_set.group(1).replace('-', '_')
@@ -1006,7 +1019,7 @@ class FortiParser:
                  self.i += 1; continue
 
             # Handle 'append' command
-            m_append = self.APPEND_RE.match(line)
+            m_append = self.APPEND_RE.match(line) if keyword == 'append' else None
             if m_append:
                  if isinstance(target_dict_for_set, dict):
                      key = m_append.group(1).replace('-', '_'); raw_val = m_append.group(2).strip()
@@ -1021,7 +1034,7 @@ class FortiParser:
                  self.i += 1; continue
 
             # Handle 'unset' command
-            m_unset = self.UNSET_RE.match(line)
+            m_unset = self.UNSET_RE.match(line) if keyword == 'unset' else None
             if m_unset:
                  if isinstance(target_dict_for_set, dict):
                      key = m_unset.group(1).replace('-', '_')
@@ -1032,7 +1045,7 @@ class FortiParser:
                  self.i += 1; continue
 
             # Handle 'next' command (Only valid in 'nested_list' context)
-            m_next = self.NEXT_RE.match(line)
+            m_next = self.NEXT_RE.match(line) if keyword == 'next' else None
             if m_next:
                  if context_type == 'nested_list':
                      list_to_append_to = current_context.get('data')
@@ -1048,7 +1061,7 @@ class FortiParser:
                  self.i += 1; continue
 
             # Handle 'end' command
-            m_end = self.END_RE.match(line)
+            m_end = self.END_RE.match(line) if keyword == 'end' else None
             if m_end:
                 # Finalize the last item if we are ending a nested list context
                 if context_type == 'nested_list':
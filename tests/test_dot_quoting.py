@@ -0,0 +1,52 @@
+"""DOT statements written by NetworkDiagramGenerator must match graphviz's own."""
+
+import pytest
+
+graphviz = pytest.importorskip('graphviz')
+
+from config_model import ConfigModel
+from diagram_generator import NetworkDiagramGenerator
+
+AWKWARD_NAMES = [
+    'plain',
+    'with space',
+    'say "hi"',
+    'trailing quote"',
+    'back\\slash',
+    'escaped \\"quote\\"',
+    'double \\\\"backslash',
+    'host:10.0.0.1',
+    'node',
+    '-1.5',
+    '<b>html</b>',
+]
+
+
+@pytest.fixture
+def generator():
+    gen = NetworkDiagramGenerator(ConfigModel())
+    gen.graph.body.clear()
+    return gen
+
+
+@pytest.mark.parametrize('name', AWKWARD_NAMES)
+def test_add_node_matches_digraph_node(generator, name):
+    generator._add_node(name, node_style=generator.NETWORK_STYLE, label=name, tooltip=f'{name}\\n"x"')
+    expected = graphviz.Digraph()
+    expected.node(name, **{**generator._NODE_DEFAULTS, **generator.NETWORK_STYLE,
+                           'label': name, 'tooltip': f'{name}\\n"x"'})
+    assert generator.graph.body == expected.body
+
+
+@pytest.mark.parametrize('name', AWKWARD_NAMES)
+def test_add_edge_matches_digraph_edge(generator, name):
+    generator._add_edge(name, 'dst:port', label=name, style=None)
+    expected = graphviz.Digraph()
+    expected.edge(name, 'dst:port', **{**generator._EDGE_DEFAULTS, 'label': name, 'style': None})
+    assert generator.graph.body == expected.body
+
+
+def test_add_node_is_idempotent(generator):
+    generator._add_node('a "b"', label='first')
+    generator._add_node('a "b"', label='second')
+    assert len(generator.graph.body) == 1
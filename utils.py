@@ -45,12 +45,11 @@ def get_table_dataframe(data: list[dict], columns: list[str], display_columns: d
         # Return empty DataFrame with specified columns if no data
         return pd.DataFrame(columns=display_columns.values() if display_columns else columns)
         
-    df = pd.DataFrame(data)
-    
     # Select and potentially rename columns
-    # Make sure only existing columns are selected
-    existing_columns = [col for col in columns if col in df.columns]
-    df_selected = df[existing_columns]
+    # Make sure only existing columns are selected (keys present in at least one row)
+    existing_columns = [col for col in columns if any(col in row for row in data)]
+    # Build just the selected columns; keys not shown are never turned into columns
+    df_selected = pd.DataFrame.from_records(data, columns=existing_columns)
     
     # Rename columns for display if mapping provided
     if display_columns: